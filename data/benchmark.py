@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 数据管道基准测试
+对导入、导出、ObjectId转换和数据校验进行基准测试，记录每秒文档数、
+峰值内存和数据库往返次数，结果写入JSON文件并可与基线对比
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import json_util
+from colorama import Fore, init
+from pymongo import MongoClient, monitoring
+
+from data_exporter import DatabaseExporter
+from data_generator import PRESETS, generate
+from data_seeder import DatabaseSeeder
+from file_validator import validate_data_files
+from integrity_check import normalize_id, verify_integrity
+from json_stream import iter_json_documents, resolve_data_file
+from objectid_fields import _legacy_walkers, get_converter
+
+init(autoreset=True)
+
+BACKENDS = ['mongomock', 'mongod']
+
+# 参与ObjectId转换基准测试的数据文件
+CONVERSION_FILES = {
+    'users': 'users.json',
+    'classes': 'classes.json',
+    'knowledgepoints': 'knowledge_points.json',
+    'learningpaths': 'learning_paths.json',
+    'exams': 'exams.json',
+    'knowledgeprogresses': 'knowledge_progress.json',
+}
+
+DEFAULT_THRESHOLD = 0.15
+
+
+class CommandCounter(monitoring.CommandListener):
+    """统计发送到服务器的命令数量（即网络往返次数）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands: Counter = Counter()
+
+    def reset(self):
+        with self._lock:
+            self.commands = Counter()
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.commands.values())
+
+    def started(self, event):
+        with self._lock:
+            self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _reset_peak_rss():
+    """重置进程的峰值内存统计（仅Linux支持，其他平台记录的是进程生命周期内的峰值）"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """读取进程的峰值常驻内存（MB）"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS以字节为单位，Linux以KB为单位
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        return None
+
+
+def _plain_value(dct: Dict[str, Any]) -> Any:
+    """将 {"$oid": ...}、{"$date": ...} 还原为字符串"""
+    if len(dct) == 1:
+        for key in ('$oid', '$date'):
+            if key in dct:
+                return dct[key]
+    return dct
+
+
+def _as_seed_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """将文档转换回种子文件中的字符串形式（ObjectId和日期均为字符串），用于转换基准测试"""
+    return json.loads(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS),
+                      object_hook=_plain_value)
+
+
+class PipelineBenchmark:
+    """数据管道基准测试"""
+
+    def __init__(self, backend: str = 'mongomock', mongo_uri: str = 'mongodb://localhost:27017',
+                 database_name: str = 'sports_knowledge_benchmark', data_dir: str = '.',
+                 batch_size: int = 1000, repeat: int = 1, formats: Optional[List[str]] = None,
+                 conversion_documents: int = 20000):
+        """
+        初始化基准测试
+
+        Args:
+            backend: mongomock（进程内模拟）或 mongod（本地MongoDB服务）
+            mongo_uri: mongod后端的连接字符串
+            database_name: 测试使用的数据库，测试前后会被删除
+            data_dir: 测试数据目录
+            batch_size: 导入和导出的批量大小
+            repeat: 每项测试的重复次数，取最快的一次
+            formats: 导出格式
+            conversion_documents: 每个集合参与转换测试的文档数量
+        """
+        self.backend = backend
+        self.mongo_uri = mongo_uri
+        self.database_name = database_name
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.repeat = max(1, repeat)
+        self.formats = formats or ['json', 'ndjson']
+        self.conversion_documents = conversion_documents
+        self.counter = CommandCounter()
+        self.client = None
+        self.db = None
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def connect(self):
+        """连接测试数据库"""
+        if self.backend == 'mongomock':
+            try:
+                import mongomock
+            except ImportError:
+                raise RuntimeError("mongomock后端需要安装mongomock：pip install mongomock")
+            self.client = mongomock.MongoClient()
+        else:
+            self.client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000,
+                                      event_listeners=[self.counter])
+            self.client.admin.command('ping')
+        self.db = self.client[self.database_name]
+
+    def close(self):
+        """删除测试数据库并断开连接"""
+        if self.client is not None:
+            self.client.drop_database(self.database_name)
+            self.client.close()
+
+    def measure(self, name: str, documents: int, func: Callable[[], Any],
+                setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+        """
+        运行一项测试并记录结果
+
+        Args:
+            name: 测试名称（如 import.exams）
+            documents: 处理的文档数量
+            func: 被测函数，setup的返回值作为参数传入
+            setup: 每次运行前的准备函数，不计入耗时
+        """
+        best = None
+        for _ in range(self.repeat):
+            argument = setup() if setup else None
+            _reset_peak_rss()
+            self.counter.reset()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                if setup:
+                    func(argument)
+                else:
+                    func()
+            seconds = time.perf_counter() - start
+            result = {
+                'documents': documents,
+                'seconds': round(seconds, 4),
+                'docs_per_sec': round(documents / seconds, 1) if seconds > 0 else None,
+                'peak_rss_mb': _peak_rss_mb(),
+                # mongomock不经过网络，不统计往返次数
+                'round_trips': self.counter.total() if self.backend == 'mongod' else None,
+            }
+            if best is None or result['seconds'] < best['seconds']:
+                best = result
+        self.results[name] = best
+        print(f"  {name:<70}{best['documents']:>10}{best['seconds']:>10.3f}"
+              f"{best['docs_per_sec'] or 0:>14,.0f}{best['peak_rss_mb'] or 0:>10.1f}"
+              f"{best['round_trips'] if best['round_trips'] is not None else '-':>10}")
+        return best
+
+    def _new_seeder(self) -> DatabaseSeeder:
+        seeder = DatabaseSeeder(self.mongo_uri, self.database_name, batch_size=self.batch_size,
+                                workers=1, data_dir=self.data_dir)
+        seeder.client = self.client
+        seeder.db = self.db
+        return seeder
+
+    def _file_documents(self, data_key: str, seeder: DatabaseSeeder) -> int:
+        file_path = resolve_data_file(os.path.join(self.data_dir, seeder.data_files[data_key]['file']))
+        return sum(1 for _ in iter_json_documents(file_path)) if file_path else 0
+
+    def bench_conversion(self):
+        """ObjectId转换：编译转换函数与原递归实现对比"""
+        walkers = _legacy_walkers()
+        for collection_name, filename in CONVERSION_FILES.items():
+            file_path = resolve_data_file(os.path.join(self.data_dir, filename))
+            if not file_path:
+                continue
+            docs = []
+            for doc in iter_json_documents(file_path):
+                docs.append(_as_seed_document(doc))
+                if len(docs) >= self.conversion_documents:
+                    break
+            if not docs:
+                continue
+            payload = json.dumps(docs)
+
+            def run(batch, func):
+                for doc in batch:
+                    func(doc)
+
+            implementations = {'compiled': get_converter(collection_name), **walkers}
+            for name, func in implementations.items():
+                self.measure(f'conversion.{collection_name}.{name}', len(docs),
+                             lambda batch, func=func: run(batch, func), lambda: json.loads(payload))
+
+    def bench_import(self):
+        """按导入顺序逐个导入数据文件"""
+        self.client.drop_database(self.database_name)
+        seeder = self._new_seeder()
+        total_documents = 0
+        total_seconds = 0.0
+        for data_key in seeder.import_dependencies:
+            documents = self._file_documents(data_key, seeder)
+            if not documents:
+                continue
+            collection_name = seeder.data_files[data_key]['collection']
+            # 重复测试时先清空该文件写入的数据，保证每次都是全新导入
+            # （数据文件中的_id是字符串，入库后为ObjectId，需同样转换后才能匹配）
+            ids = [normalize_id(doc['_id']) for doc in seeder.iter_json_data(
+                resolve_data_file(os.path.join(self.data_dir, seeder.data_files[data_key]['file'])))] \
+                if self.repeat > 1 else None
+
+            def setup(collection_name=collection_name, ids=ids):
+                if ids is not None:
+                    self.db[collection_name].delete_many({'_id': {'$in': ids}})
+
+            result = self.measure(f'import.{data_key}', documents,
+                                  lambda _, data_key=data_key: seeder.import_data(data_key), setup)
+            total_documents += documents
+            total_seconds += result['seconds']
+        self.results['import.total'] = {
+            'documents': total_documents,
+            'seconds': round(total_seconds, 4),
+            'docs_per_sec': round(total_documents / total_seconds, 1) if total_seconds else None,
+            'peak_rss_mb': max((r['peak_rss_mb'] or 0 for k, r in self.results.items() if k.startswith('import.')),
+                               default=None),
+            'round_trips': sum(r['round_trips'] or 0 for k, r in self.results.items() if k.startswith('import.'))
+            if self.backend == 'mongod' else None,
+        }
+
+    def bench_export(self, output_dir: str):
+        """以各导出格式导出全部集合"""
+        for export_format in self.formats:
+            if export_format == 'bson' and self.backend == 'mongomock':
+                # mongomock不支持RawBSONDocument
+                continue
+            exporter = DatabaseExporter(self.mongo_uri, self.database_name, export_format=export_format,
+                                        batch_size=self.batch_size)
+            exporter.client = self.client
+            exporter.db = self.db
+            format_dir = os.path.join(output_dir, export_format)
+            os.makedirs(format_dir, exist_ok=True)
+            for config in exporter.collections_config.values():
+                collection_name = config['collection']
+                documents = self.db[collection_name].count_documents({})
+                if not documents:
+                    continue
+                output_file = os.path.join(format_dir, exporter.output_filename(config['filename']))
+                self.measure(f'export.{export_format}.{collection_name}', documents,
+                             lambda: exporter.export_collection(collection_name, output_file,
+                                                                config['description']))
+
+    def bench_verification(self):
+        """数据库引用完整性检查和离线文件校验"""
+        seeder = self._new_seeder()
+        documents = sum(self.db[name].estimated_document_count()
+                        for name in ['users', 'classes', 'knowledgepoints', 'learningpaths',
+                                     'exams', 'knowledgeprogresses'])
+        self.measure('verify.integrity', documents, lambda: verify_integrity(self.db, workers=4))
+
+        file_documents = sum(self._file_documents(key, seeder) for key in seeder.data_files)
+        self.measure('verify.files', file_documents,
+                     lambda: validate_data_files(seeder.data_files, self.data_dir,
+                                                 list(seeder.import_dependencies)))
+
+    def run(self, stages: List[str]) -> Dict[str, Any]:
+        """运行指定的测试阶段，返回测试结果"""
+        print(f"  {'测试项':<67}{'文档数':>8}{'耗时(s)':>10}{'文档/秒':>11}{'峰值MB':>9}{'往返':>8}")
+        export_dir = tempfile.mkdtemp(prefix='benchmark_export_')
+        try:
+            if 'conversion' in stages:
+                self.bench_conversion()
+            if 'import' in stages or 'export' in stages or 'verify' in stages:
+                self.bench_import()
+            if 'export' in stages:
+                self.bench_export(export_dir)
+            if 'verify' in stages:
+                self.bench_verification()
+        finally:
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+        if 'import' not in stages:
+            self.results = {k: v for k, v in self.results.items() if not k.startswith('import.')}
+        return self.results
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    与基线结果对比每秒文档数
+
+    Args:
+        current: 本次测试结果文件内容
+        baseline: 基线结果文件内容
+        threshold: 允许的性能下降比例（0.15表示下降超过15%视为回退）
+
+    Returns:
+        List[Dict[str, Any]]: 每个共同测试项的对比结果
+    """
+    comparisons = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('docs_per_sec') or not result.get('docs_per_sec'):
+            continue
+        change = result['docs_per_sec'] / base['docs_per_sec'] - 1
+        comparisons.append({
+            'name': name,
+            'baseline': base['docs_per_sec'],
+            'current': result['docs_per_sec'],
+            'change': round(change, 4),
+            'regression': change < -threshold,
+        })
+    return comparisons
+
+
+def print_comparison(comparisons: List[Dict[str, Any]], threshold: float):
+    """输出与基线的对比结果"""
+    print(f"\n{Fore.YELLOW}与基线对比 (回退阈值: {threshold:.0%}):")
+    print(f"  {'测试项':<67}{'基线':>12}{'本次':>12}{'变化':>9}")
+    for item in comparisons:
+        color = Fore.RED if item['regression'] else (Fore.GREEN if item['change'] >= 0 else '')
+        print(f"  {color}{item['name']:<70}{item['baseline']:>14,.0f}{item['current']:>14,.0f}"
+              f"{item['change']:>+10.1%}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台数据管道基准测试',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python benchmark.py                                          # mongomock + small规模生成数据
+  python benchmark.py --backend mongod --preset medium         # 本地mongod
+  python benchmark.py --data-dir .                             # 使用种子数据
+  python benchmark.py --output new.json --baseline old.json    # 与基线对比，回退时退出码为1
+        """
+    )
+    parser.add_argument('--backend', choices=BACKENDS, default='mongomock',
+                        help='数据库后端 (默认: mongomock)')
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='mongod后端的连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default='sports_knowledge_benchmark',
+                        help='测试数据库名称，测试前后会被删除 (默认: sports_knowledge_benchmark)')
+    parser.add_argument('--data-dir', default=None,
+                        help='使用已有的数据目录，不指定时用data_generator.py生成数据')
+    parser.add_argument('--preset', choices=list(PRESETS), default='small',
+                        help='生成数据的预设规模 (默认: small)')
+    parser.add_argument('--students', type=int, default=None, help='覆盖预设中的学生数量')
+    parser.add_argument('--questions', type=int, default=None, help='覆盖预设中的题目数量')
+    parser.add_argument('--exams', type=int, default=None, help='覆盖预设中的考试记录数量')
+    parser.add_argument('--progress', type=int, default=None, help='覆盖预设中的学习进度数量')
+    parser.add_argument('--seed', type=int, default=42, help='生成数据的随机种子 (默认: 42)')
+    parser.add_argument('--stages', nargs='+', choices=['conversion', 'import', 'export', 'verify'],
+                        default=['conversion', 'import', 'export', 'verify'],
+                        help='要运行的测试阶段 (默认: 全部)')
+    parser.add_argument('--formats', nargs='+', default=['json', 'ndjson'],
+                        help='导出测试的格式 (默认: json ndjson)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='导入和导出的批量大小 (默认: 1000)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='每项测试的重复次数，取最快的一次 (默认: 1)')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='结果输出文件 (默认: benchmark_results.json)')
+    parser.add_argument('--baseline', default=None,
+                        help='用于对比的基线结果文件')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'每秒文档数下降超过该比例视为回退 (默认: {DEFAULT_THRESHOLD})')
+    args = parser.parse_args()
+
+    print(f"{Fore.CYAN}{'='*60}")
+    print(f"{Fore.CYAN}体育知识智能题库平台 - 数据管道基准测试 ({args.backend})")
+    print(f"{Fore.CYAN}{'='*60}")
+
+    generated_dir = None
+    data_dir = args.data_dir
+    scale = None
+    if data_dir is None:
+        scale = dict(PRESETS[args.preset])
+        for key in ['students', 'questions', 'exams', 'progress']:
+            if getattr(args, key) is not None:
+                scale[key] = getattr(args, key)
+        generated_dir = data_dir = tempfile.mkdtemp(prefix='benchmark_data_')
+        print(f"{Fore.YELLOW}生成测试数据: {json.dumps(scale, ensure_ascii=False)}")
+        with contextlib.redirect_stderr(io.StringIO()):
+            generate(data_dir, scale, seed=args.seed)
+
+    benchmark = PipelineBenchmark(args.backend, args.mongo_uri, args.database, data_dir,
+                                  batch_size=args.batch_size, repeat=args.repeat, formats=args.formats)
+    try:
+        benchmark.connect()
+        results = benchmark.run(args.stages)
+    except Exception as e:
+        print(f"{Fore.RED}✗ 基准测试失败：{e}")
+        sys.exit(2)
+    finally:
+        benchmark.close()
+        if generated_dir:
+            shutil.rmtree(generated_dir, ignore_errors=True)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'backend': args.backend,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': {'data_dir': args.data_dir, 'preset': None if args.data_dir else args.preset,
+                    'scale': scale, 'seed': args.seed},
+        'batch_size': args.batch_size,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n{Fore.GREEN}✓ 结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('backend') != args.backend or baseline.get('dataset') != report['dataset']:
+            print(f"{Fore.YELLOW}⚠️  基线的后端或数据集与本次不同，对比结果仅供参考")
+        comparisons = compare_results(report, baseline, args.threshold)
+        print_comparison(comparisons, args.threshold)
+        regressions = [item['name'] for item in comparisons if item['regression']]
+        if regressions:
+            print(f"\n{Fore.RED}✗ {len(regressions)} 项性能回退: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n{Fore.GREEN}✓ 未发现性能回退")
+
+
+if __name__ == '__main__':
+    main()
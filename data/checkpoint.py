@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 断点续传检查点
+以JSON文件记录长时间运行的导入/导出进度，每次更新先写临时文件再原子替换，
+进程在任意时刻中断都不会留下损坏的检查点
+"""
+
+import copy
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from json_stream import data_file_size
+
+CHECKPOINT_VERSION = 1
+
+
+def file_signature(file_path: str) -> Dict[str, Any]:
+    """
+    数据文件的大小和修改时间，用于判断检查点记录的进度是否仍然有效
+
+    分片清单的大小计入全部分片文件
+    """
+    return {
+        'size': data_file_size(file_path),
+        'mtime': os.path.getmtime(file_path),
+    }
+
+
+def write_json_atomic(output_file: str, data: Any, fsync: bool = True):
+    """
+    先写入同目录下的临时文件，再替换目标文件
+
+    Args:
+        output_file: 目标文件路径
+        data: 可JSON序列化的数据
+        fsync: 替换前是否将临时文件刷到磁盘。只需防止进程中断时可以关闭，
+            此时断电可能丢失目标文件的最新内容
+    """
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = f"{output_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_file, output_file)
+
+
+class Checkpoint:
+    """
+    检查点文件
+
+    meta记录检查点适用的运行参数（如数据库名、数据目录），恢复时参数不一致的检查点会被丢弃；
+    entries按任务（如数据类型键名、集合名）记录各自的进度。
+    多个线程并行更新时通过锁串行写入。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta: Dict[str, Any] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, meta: Dict[str, Any]) -> bool:
+        """
+        读取检查点文件
+
+        Args:
+            meta: 本次运行的参数
+
+        Returns:
+            bool: 文件存在、格式正确且参数与meta一致时返回True，否则不加载任何进度
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('version') != CHECKPOINT_VERSION or state.get('meta') != meta:
+            return False
+        self.meta = state['meta']
+        self.entries = state.get('entries', {})
+        return True
+
+    def reset(self, meta: Dict[str, Any]):
+        """丢弃全部进度并以新的运行参数重新开始"""
+        with self._lock:
+            self.meta = dict(meta)
+            self.entries = {}
+            self._save()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """返回任务进度的副本，不存在时返回None"""
+        with self._lock:
+            entry = self.entries.get(key)
+            return copy.deepcopy(entry) if entry is not None else None
+
+    def update(self, key: str, **fields):
+        """更新任务进度并立即写入文件"""
+        with self._lock:
+            entry = self.entries.setdefault(key, {})
+            entry.update(fields)
+            entry['updated_at'] = datetime.now().isoformat()
+            self._save()
+
+    def remove(self):
+        """全部任务完成后删除检查点文件"""
+        with self._lock:
+            self.entries = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _save(self):
+        # 每批写入后都会更新，不fsync；文件损坏或丢失时load()返回False，从头开始
+        write_json_atomic(self.path, {
+            'version': CHECKPOINT_VERSION,
+            'meta': self.meta,
+            'entries': self.entries,
+        }, fsync=False)
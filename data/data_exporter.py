@@ -1,34 +1,127 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import contextlib
 import os
+import io
+import gzip
+import hashlib
 import json
 import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from pymongo import MongoClient
 from pymongo.collection import Collection
-from bson import ObjectId
-from colorama import init, Fore, Style
+import bson
+from bson import ObjectId, json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from checkpoint import Checkpoint, write_json_atomic
+from instrumentation import Metrics, finish_metrics
+from json_stream import iter_json_documents
+from colorama import init, Fore
 from tqdm import tqdm
 import sys
 
 # 初始化colorama
 init(autoreset=True)
 
+# 支持的导出格式：
+#   json        带缩进的JSON数组，ObjectId和日期转换为字符串（兼容旧版导出）
+#   ndjson      每行一个MongoDB扩展JSON对象，保留ObjectId、日期等类型
+#   ndjson.gz   gzip压缩的ndjson
+#   ndjson.zst  zstd压缩的ndjson（需要安装zstandard）
+#   bson        mongodump格式的原始BSON，直接写入服务器返回的字节，不在Python中解码
+EXPORT_FORMATS = ['json', 'ndjson', 'ndjson.gz', 'ndjson.zst', 'bson']
+
+# 分区导出时的并行方式
+PARTITION_EXECUTORS = ['thread', 'process']
+
+# 导出过程中写入的临时文件后缀，完成后原子重命名为最终文件名
+PARTIAL_SUFFIX = '.partial'
+
+# 断点续传检查点文件名（位于输出目录中）
+CHECKPOINT_FILENAME = '.export_checkpoint.json'
+
+# 每导出多少个文档更新一次检查点
+CHECKPOINT_INTERVAL = 10000
+
+# 可从中断位置追加写入的格式，压缩格式中断后整个集合重新导出
+APPENDABLE_FORMATS = ['json', 'ndjson', 'bson']
+
+
+def file_sha256(file_path: str) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def finalize_output(partial_file: str, output_file: str):
+    """将写完的临时文件刷到磁盘后原子替换为最终文件"""
+    with open(partial_file, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(partial_file, output_file)
+    try:
+        # 同步目录项，确保重命名本身在断电后也不会丢失（Windows不支持，忽略）
+        fd = os.open(os.path.dirname(os.path.abspath(output_file)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
 class DatabaseExporter:
     def __init__(self, 
                  connection_string: str = "mongodb://localhost:27017",
-                 database_name: str = "sports_knowledge_platform"):
+                 database_name: str = "sports_knowledge_platform",
+                 export_format: str = "json",
+                 batch_size: int = 1000,
+                 write_buffer: int = 1 << 20,
+                 partitions: int = 1,
+                 partition_executor: str = "thread",
+                 metrics: Optional[Metrics] = None):
         """
         初始化数据库导出器
         
         Args:
             connection_string: MongoDB连接字符串
             database_name: 数据库名称
+            export_format: 导出格式（见EXPORT_FORMATS）
+            batch_size: 游标每批从服务器读取的文档数量
+            write_buffer: 输出文件写缓冲区大小（字节）
+            partitions: 单个集合按_id范围拆分的分区数，大于1时各分区并行导出为分片文件
+            partition_executor: 分区导出使用线程池（thread）或进程池（process）
+            metrics: 运行指标采集器，为None时不记录阶段耗时和数据库命令
         """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+        if export_format == 'ndjson.zst' and zstandard is None:
+            raise ValueError("ndjson.zst格式需要安装zstandard：pip install zstandard")
+        if partition_executor not in PARTITION_EXECUTORS:
+            raise ValueError(f"不支持的分区执行方式: {partition_executor}")
+        
         self.connection_string = connection_string
         self.database_name = database_name
+        self.export_format = export_format
+        self.batch_size = max(1, batch_size)
+        self.write_buffer = max(4096, write_buffer)
+        self.partitions = max(1, partitions)
+        self.partition_executor = partition_executor
+        self.metrics = metrics
+        # 全量导出时创建（见export_all_collections），记录各集合的导出进度
+        self.checkpoint: Optional[Checkpoint] = None
         self.client: Optional[MongoClient] = None
         self.db = None
         
@@ -37,41 +130,49 @@ class DatabaseExporter:
             'institutions': {
                 'collection': 'institutions',
                 'filename': 'institutions_export.json',
+                'seed_file': 'institutions.json',
                 'description': '机构数据'
             },
             'users': {
                 'collection': 'users',
                 'filename': 'users_export.json',
+                'seed_file': 'users.json',
                 'description': '用户数据'
             },
             'knowledgebases': {
                 'collection': 'knowledgebases',
                 'filename': 'knowledge_bases_export.json',
+                'seed_file': 'knowledge_bases.json',
                 'description': '知识库数据'
             },
             'knowledgepoints': {
                 'collection': 'knowledgepoints',
                 'filename': 'knowledge_points_export.json',
+                'seed_file': 'knowledge_points.json',
                 'description': '知识点数据'
             },
             'learningpaths': {
                 'collection': 'learningpaths',
                 'filename': 'learning_paths_export.json',
+                'seed_file': 'learning_paths.json',
                 'description': '学习路径数据'
             },
             'questions': {
                 'collection': 'questions',
                 'filename': 'questions_export.json',
+                'seed_file': 'questions.json',
                 'description': '题目数据'
             },
             'exams': {
                 'collection': 'exams',
                 'filename': 'exams_export.json',
+                'seed_file': 'exams.json',
                 'description': '考试记录数据'
             },
             'knowledgeprogresses': {
                 'collection': 'knowledgeprogresses',
                 'filename': 'knowledge_progress_export.json',
+                'seed_file': 'knowledge_progress.json',
                 'description': '学习进度数据'
             }
         }
@@ -80,7 +181,8 @@ class DatabaseExporter:
         """连接到MongoDB数据库"""
         try:
             print(f"{Fore.YELLOW}正在连接数据库: {self.connection_string}")
-            self.client = MongoClient(self.connection_string)
+            listeners = [self.metrics.command_listener] if self.metrics else []
+            self.client = MongoClient(self.connection_string, event_listeners=listeners)
             
             # 测试连接
             self.client.admin.command('ping')
@@ -93,6 +195,10 @@ class DatabaseExporter:
             print(f"{Fore.RED}❌ 数据库连接失败: {str(e)}")
             return False
     
+    def stage(self, name: str):
+        """记录代码块耗时的上下文管理器，未启用指标采集时不做任何事"""
+        return self.metrics.stage(name) if self.metrics else contextlib.nullcontext()
+    
     def disconnect(self):
         """断开数据库连接"""
         if self.client:
@@ -110,6 +216,69 @@ class DatabaseExporter:
         else:
             return obj
     
+    def serialize_document(self, doc: Any, first: bool = False) -> Any:
+        """
+        将单个文档序列化为输出文件中的一段内容
+        
+        json格式的输出与对整个列表调用 json.dump(..., indent=2) 的结果一致；
+        ndjson系列格式使用扩展JSON保留类型；bson格式直接返回原始字节
+        
+        Args:
+            doc: 游标返回的文档
+            first: 是否为文件中的第一个文档
+        """
+        if self.export_format == 'bson':
+            return doc.raw if isinstance(doc, RawBSONDocument) else bson.encode(doc)
+        
+        if self.export_format != 'json':
+            return json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS, ensure_ascii=False) + '\n'
+        
+        # JSON字符串中的换行均已转义，按行缩进不会影响内容
+        converted_doc = self.convert_objectid_to_string(doc)
+        text = json.dumps(converted_doc, ensure_ascii=False, indent=2, default=str).replace('\n', '\n  ')
+        return ('\n  ' if first else ',\n  ') + text
+    
+    def file_extension(self) -> str:
+        """导出格式对应的文件后缀"""
+        return '.' + self.export_format
+    
+    def output_filename(self, filename: str) -> str:
+        """根据导出格式调整输出文件名"""
+        if filename.endswith('.json'):
+            return filename[:-len('.json')] + self.file_extension()
+        return filename
+    
+    def split_output_path(self, output_file: str) -> Tuple[str, str]:
+        """拆分输出路径为前缀和格式后缀，用于生成分片和增量文件名"""
+        ext = self.file_extension()
+        if output_file.endswith(ext):
+            return output_file[:-len(ext)], ext
+        return os.path.splitext(output_file)
+    
+    def open_output(self, output_file: str, append: bool = False):
+        """按导出格式打开输出文件（bson为二进制，其余为文本），append仅适用于未压缩格式"""
+        if self.export_format == 'bson':
+            return open(output_file, 'ab' if append else 'wb', buffering=self.write_buffer)
+        if self.export_format == 'ndjson.gz':
+            # 由gzip打开底层文件，关闭时一并关闭（传入fileobj的文件不会随GzipFile关闭）
+            return gzip.open(output_file, 'wt', encoding='utf-8', compresslevel=6)
+        if self.export_format == 'ndjson.zst':
+            raw = open(output_file, 'wb', buffering=self.write_buffer)
+            writer = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+            return io.TextIOWrapper(writer, encoding='utf-8')
+        return open(output_file, 'a' if append else 'w', encoding='utf-8', buffering=self.write_buffer)
+    
+    def output_offset(self, f) -> int:
+        """已刷新的输出文件当前的字节位置"""
+        f.flush()
+        return f.tell() if self.export_format == 'bson' else f.buffer.tell()
+    
+    def source_collection(self, collection: Collection) -> Collection:
+        """bson格式以RawBSONDocument读取游标，跳过Python侧解码"""
+        if self.export_format == 'bson':
+            return collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+        return collection
+    
     def export_collection(self, collection_name: str, output_file: str, description: str) -> Dict[str, int]:
         """
         导出单个集合数据
@@ -139,49 +308,323 @@ class DatabaseExporter:
             print(f"{Fore.BLUE}📄 文档数量: {total_count}")
             print(f"{Fore.BLUE}💾 输出文件: {output_file}")
             
-            # 获取所有文档
-            documents = []
-            exported_count = 0
-            error_count = 0
-            
-            # 使用tqdm显示进度条
+            stats = {}
             with tqdm(total=total_count, desc=f"导出{description}", 
-                     bar_format='{desc}: {percentage:3.0f}%|{bar}| {n}/{total_fmt}') as pbar:
+                      bar_format='{desc}: {percentage:3.0f}%|{bar}| {n}/{total_fmt}') as pbar:
                 
-                for doc in collection.find():
-                    try:
-                        # 转换ObjectId为字符串
-                        converted_doc = self.convert_objectid_to_string(doc)
-                        documents.append(converted_doc)
-                        exported_count += 1
-                        
-                    except Exception as e:
-                        print(f"{Fore.RED}⚠️  转换文档失败: {str(e)}")
-                        error_count += 1
-                    
-                    pbar.update(1)
-            
-            # 保存到JSON文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(documents, f, ensure_ascii=False, indent=2, default=str)
+                if self.partitions > 1:
+                    exported_count, error_count, stats = self.export_partitioned(
+                        collection, output_file, total_count, pbar)
+                else:
+                    exported_count, error_count = self.export_sorted(collection, output_file, pbar)
+                    stats['sha256'] = file_sha256(output_file)
             
             print(f"{Fore.GREEN}✓ {description} 导出完成")
             print(f"  - 总计: {total_count} 条")
             print(f"  - 成功: {exported_count} 条")
             if error_count > 0:
                 print(f"  - 错误: {error_count} 条")
-            print(f"  - 文件: {output_file}")
+            if 'shards' in stats:
+                print(f"  - 分片: {len(stats['shards'])} 个")
+                print(f"  - 清单: {os.path.join(os.path.dirname(output_file), stats['manifest'])}")
+            else:
+                print(f"  - 文件: {output_file}")
             
-            return {
+            stats.update({
                 'total': total_count,
                 'exported': exported_count,
                 'errors': error_count
-            }
+            })
+            return stats
             
         except Exception as e:
             print(f"{Fore.RED}❌ 导出集合 {collection_name} 失败: {str(e)}")
             return {'total': 0, 'exported': 0, 'errors': 1}
     
+    def export_sorted(self, collection: Collection, output_file: str, pbar: tqdm) -> Tuple[int, int]:
+        """
+        按_id顺序导出整个集合
+        
+        启用检查点且格式可追加写入时，每CHECKPOINT_INTERVAL个文档记录一次最后的_id和文件位置；
+        续传时截断临时文件到记录的位置，只查询该_id之后的文档继续写入
+        
+        Returns:
+            Tuple[int, int]: 成功导出数量和错误数量
+        """
+        key = collection.name
+        query = {}
+        resume_from = None
+        on_progress = None
+        
+        if self.checkpoint and self.export_format in APPENDABLE_FORMATS:
+            progress = (self.checkpoint.get(key) or {}).get('progress')
+            partial_file = output_file + PARTIAL_SUFFIX
+            if progress and os.path.exists(partial_file) and os.path.getsize(partial_file) >= progress['offset']:
+                resume_from = progress
+                query = {'_id': {'$gt': json_util.loads(progress['last_id'])}}
+                print(f"{Fore.YELLOW}↻ 从检查点继续：已导出 {progress['exported']} 条，"
+                      f"从 _id > {progress['last_id']} 开始")
+                pbar.update(progress['exported'] + progress['errors'])
+            on_progress = lambda progress: self.checkpoint.update(key, progress=progress)
+        
+        cursor = self.source_collection(collection).find(query).sort('_id', 1).batch_size(self.batch_size)
+        return self.write_documents(cursor, output_file, pbar, stage=f"export.{key}",
+                                    resume_from=resume_from, on_progress=on_progress)
+    
+    def write_documents(self, cursor, output_file: str, pbar: Optional[tqdm] = None,
+                        stage: str = 'export', resume_from: Optional[Dict[str, Any]] = None,
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[int, int]:
+        """
+        将游标中的文档逐条写入文件，内存占用与集合大小无关
+        
+        文档先写入 output_file + '.partial'，全部写完后fsync并原子重命名为output_file，
+        中断的导出不会留下截断的输出文件，也不会破坏上一次导出的同名文件
+        
+        Args:
+            cursor: pymongo游标
+            output_file: 输出文件路径
+            pbar: 进度条
+            stage: 启用指标采集时的阶段名称前缀，分别记录读取、序列化和写入耗时
+            resume_from: on_progress上一次报告的进度，截断.partial文件到该位置后继续追加
+                （游标应只返回该进度之后的文档，仅适用于APPENDABLE_FORMATS）
+            on_progress: 每写入CHECKPOINT_INTERVAL个文档调用一次，参数为
+                {'last_id', 'offset', 'exported', 'errors'}，last_id为扩展JSON字符串
+            
+        Returns:
+            Tuple[int, int]: 成功导出数量和错误数量（续传时包含之前已导出的部分）
+        """
+        partial_file = output_file + PARTIAL_SUFFIX
+        exported_count = resume_from['exported'] if resume_from else 0
+        error_count = resume_from['errors'] if resume_from else 0
+        serialize = self.serialize_document
+        since_progress = 0
+        
+        if resume_from:
+            # 丢弃最后一个检查点之后写入的内容
+            os.truncate(partial_file, resume_from['offset'])
+        
+        with self.open_output(partial_file, append=bool(resume_from)) as f:
+            write = f.write
+            if self.metrics:
+                cursor = self.metrics.timed_iter(f"{stage}.fetch", cursor)
+                serialize = self.metrics.timed_call(f"{stage}.serialize", serialize)
+                write = self.metrics.timed_call(f"{stage}.write", write)
+            
+            if self.export_format == 'json' and not resume_from:
+                f.write('[')
+            
+            for doc in cursor:
+                try:
+                    write(serialize(doc, first=exported_count == 0))
+                    exported_count += 1
+                    
+                except Exception as e:
+                    print(f"{Fore.RED}⚠️  转换文档失败: {str(e)}")
+                    error_count += 1
+                
+                if pbar is not None:
+                    pbar.update(1)
+                
+                if on_progress is not None:
+                    since_progress += 1
+                    if since_progress >= CHECKPOINT_INTERVAL:
+                        on_progress({
+                            'last_id': json_util.dumps(doc['_id']),
+                            'offset': self.output_offset(f),
+                            'exported': exported_count,
+                            'errors': error_count
+                        })
+                        since_progress = 0
+            
+            if self.export_format == 'json':
+                f.write('\n]' if exported_count else ']')
+        
+        finalize_output(partial_file, output_file)
+        
+        if self.metrics:
+            self.metrics.count(f"{stage}.documents", exported_count)
+            self.metrics.add_bytes('written', os.path.getsize(output_file))
+        return exported_count, error_count
+    
+    def compute_split_points(self, collection: Collection, total_count: int) -> List[Any]:
+        """
+        计算按_id划分分区的边界值
+        
+        优先对抽样文档执行$bucketAuto得到均衡的分区边界；
+        聚合不可用时按最小、最大ObjectId的时间戳等距划分
+        
+        Args:
+            collection: 集合对象
+            total_count: 集合文档数量
+            
+        Returns:
+            List[Any]: 升序排列的分区边界（不含首尾）
+        """
+        partitions = min(self.partitions, total_count)
+        if partitions <= 1:
+            return []
+        
+        try:
+            sample_size = min(total_count, max(partitions * 1000, 10000))
+            pipeline = [
+                {'$sample': {'size': sample_size}},
+                {'$bucketAuto': {'groupBy': '$_id', 'buckets': partitions}}
+            ]
+            buckets = list(collection.aggregate(pipeline, allowDiskUse=True))
+            points = [bucket['_id']['min'] for bucket in buckets[1:]]
+        except Exception:
+            points = self._timestamp_split_points(collection, partitions)
+        
+        return sorted(set(points))
+    
+    def _timestamp_split_points(self, collection: Collection, partitions: int) -> List[ObjectId]:
+        """按ObjectId生成时间等距划分分区"""
+        first = collection.find_one({}, {'_id': 1}, sort=[('_id', 1)])
+        last = collection.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+        if not first or not isinstance(first['_id'], ObjectId) or not isinstance(last['_id'], ObjectId):
+            return []
+        
+        start = first['_id'].generation_time
+        step = (last['_id'].generation_time - start) / partitions
+        return [ObjectId.from_datetime(start + step * i) for i in range(1, partitions)]
+    
+    @staticmethod
+    def range_query(lower: Any, upper: Any) -> Dict[str, Any]:
+        """构造 lower <= _id < upper 的查询条件，边界为None表示不限"""
+        condition = {}
+        if lower is not None:
+            condition['$gte'] = lower
+        if upper is not None:
+            condition['$lt'] = upper
+        return {'_id': condition} if condition else {}
+    
+    def export_range(self, collection: Collection, lower: Any, upper: Any, shard_file: str,
+                     pbar: Optional[tqdm] = None) -> Tuple[int, int]:
+        """按_id顺序导出一个分区到分片文件"""
+        cursor = self.source_collection(collection).find(self.range_query(lower, upper)) \
+            .sort('_id', 1).batch_size(self.batch_size)
+        return self.write_documents(cursor, shard_file, pbar, stage=f"export.{collection.name}")
+    
+    def worker_options(self) -> Dict[str, Any]:
+        """进程池中重建导出器所需的参数"""
+        return {
+            'connection_string': self.connection_string,
+            'database_name': self.database_name,
+            'export_format': self.export_format,
+            'batch_size': self.batch_size,
+            'write_buffer': self.write_buffer
+        }
+    
+    def export_partitioned(self, collection: Collection, output_file: str, total_count: int,
+                           pbar: tqdm) -> Tuple[int, int, Dict[str, Any]]:
+        """
+        按_id范围拆分集合，各分区并行导出为独立的分片文件，并生成分片清单
+        
+        分片文件按序号依次拼接即为按_id排序的完整集合，
+        可通过 json_stream.iter_json_documents(清单文件) 按顺序读取
+        
+        Args:
+            collection: 集合对象
+            output_file: 未分区时的输出文件路径，分片和清单文件以其为前缀
+            total_count: 集合文档数量
+            pbar: 进度条
+            
+        Returns:
+            Tuple[int, int, Dict[str, Any]]: 成功导出数量、错误数量和分片信息
+        """
+        key = collection.name
+        entry = (self.checkpoint.get(key) or {}) if self.checkpoint else {}
+        if entry.get('split_points') is not None:
+            # 续传时沿用中断前的分区边界，已完成的分片才能直接复用
+            points = json_util.loads(entry['split_points'])
+            completed = entry.get('shards', {})
+        else:
+            points = self.compute_split_points(collection, total_count)
+            completed = {}
+            if self.checkpoint:
+                self.checkpoint.update(key, split_points=json_util.dumps(points), shards={})
+        bounds = [None] + points + [None]
+        ranges = list(zip(bounds[:-1], bounds[1:]))
+        
+        root, ext = self.split_output_path(output_file)
+        shard_files = [f"{root}.part-{index:04d}{ext}" for index in range(1, len(ranges) + 1)]
+        print(f"{Fore.BLUE}🧩 分区数量: {len(ranges)} ({self.partition_executor})")
+        
+        # 分片序号 → (成功数量, 错误数量, SHA-256)，已完成且文件仍存在的分片不再导出
+        results: Dict[int, Tuple[int, int, str]] = {}
+        for index, shard_file in enumerate(shard_files, start=1):
+            done = completed.get(str(index))
+            if done and os.path.exists(shard_file):
+                results[index] = (done['documents'], done['errors'], done['sha256'])
+        if results:
+            print(f"{Fore.YELLOW}↻ 从检查点继续：跳过已完成的 {len(results)} 个分片")
+            pbar.update(sum(documents + errors for documents, errors, _ in results.values()))
+        jobs = [(index, lower, upper, shard_file)
+                for index, ((lower, upper), shard_file) in enumerate(zip(ranges, shard_files), start=1)
+                if index not in results]
+        lock = threading.Lock()
+        
+        def record(index: int, shard_file: str, result: Tuple[int, int]):
+            """记录完成的分片，检查点中保存全部已完成分片"""
+            with lock:
+                results[index] = (result[0], result[1], file_sha256(shard_file))
+                if self.checkpoint:
+                    self.checkpoint.update(key, shards={
+                        str(i): {'documents': r[0], 'errors': r[1], 'sha256': r[2]} for i, r in results.items()
+                    })
+        
+        def export_shard(job):
+            index, lower, upper, shard_file = job
+            record(index, shard_file, self.export_range(collection, lower, upper, shard_file, pbar))
+        
+        if self.partition_executor == 'process':
+            with ProcessPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+                futures = [
+                    (job, executor.submit(_export_range_in_process, self.worker_options(),
+                                          collection.name, job[1], job[2], job[3]))
+                    for job in jobs
+                ]
+                for job, future in futures:
+                    result = future.result()
+                    record(job[0], job[3], result)
+                    pbar.update(sum(result))
+            if self.metrics:
+                # 子进程中的耗时不计入指标，只统计写入的字节数
+                for job in jobs:
+                    self.metrics.add_bytes('written', os.path.getsize(job[3]))
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+                list(executor.map(export_shard, jobs))
+        
+        shards = []
+        for index, ((lower, upper), shard_file) in enumerate(zip(ranges, shard_files), start=1):
+            exported, errors, sha256 = results[index]
+            shards.append({
+                'index': index,
+                'file': os.path.basename(shard_file),
+                'lower_id': str(lower) if lower is not None else None,
+                'upper_id': str(upper) if upper is not None else None,
+                'documents': exported,
+                'errors': errors,
+                'sha256': sha256
+            })
+        
+        manifest_file = f"{root}.manifest.json"
+        manifest = {
+            'collection': collection.name,
+            'format': self.export_format,
+            'total_documents': sum(shard['documents'] for shard in shards),
+            'shards': shards
+        }
+        write_json_atomic(manifest_file, manifest)
+        
+        exported_count = sum(shard['documents'] for shard in shards)
+        error_count = sum(shard['errors'] for shard in shards)
+        return exported_count, error_count, {
+            'manifest': os.path.basename(manifest_file),
+            'shards': shards
+        }
+    
     def get_database_stats(self) -> Dict[str, Any]:
         """获取数据库统计信息"""
         try:
@@ -209,13 +652,242 @@ class DatabaseExporter:
             print(f"{Fore.RED}❌ 获取数据库统计失败: {str(e)}")
             return {}
     
-    def export_all_collections(self, output_dir: str = "./export", specific_collections: List[str] = None) -> bool:
+    def get_watermark(self, collection: Collection) -> Optional[Dict[str, Any]]:
+        """
+        读取集合当前的高水位标记
+        
+        集合中存在updatedAt字段时以其最大值为准，否则使用最大的_id（仅能识别新增文档）。
+        使用updatedAt时同时记录最大的_id（fallback），没有updatedAt字段的文档按_id识别新增。
+        标记在导出开始前读取，导出期间发生的修改会在下一次增量导出时被包含。
+        """
+        field = 'updatedAt' if collection.find_one({'updatedAt': {'$exists': True}}, {'_id': 1}) else '_id'
+        doc = collection.find_one({field: {'$exists': True}}, {field: 1}, sort=[(field, -1)])
+        if not doc:
+            return None
+        watermark = self.encode_watermark(field, doc[field])
+        if field != '_id':
+            last = collection.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+            watermark['fallback'] = self.encode_watermark('_id', last['_id'])
+        return watermark
+    
+    @staticmethod
+    def encode_watermark(field: str, value: Any) -> Dict[str, Any]:
+        """将高水位标记转换为可写入报告的形式"""
+        if isinstance(value, datetime):
+            return {'field': field, 'type': 'date', 'value': value.isoformat()}
+        if isinstance(value, ObjectId):
+            return {'field': field, 'type': 'objectid', 'value': str(value)}
+        if isinstance(value, str):
+            return {'field': field, 'type': 'string', 'value': value}
+        return {'field': field, 'type': type(value).__name__, 'value': value}
+    
+    @staticmethod
+    def delta_query(watermark: Dict[str, Any]) -> Dict[str, Any]:
+        """构造查询高水位标记之后变化文档的条件"""
+        field = watermark['field']
+        value = DatabaseExporter.decode_watermark(watermark)
+        
+        clauses = [{field: {'$gt': value}}]
+        if isinstance(value, str) and field != '_id':
+            # 种子数据中的时间为字符串，后端更新后写入的是日期类型，两者都需要覆盖
+            clauses.append({field: {'$type': 'date'}})
+        if watermark.get('fallback'):
+            # 没有updatedAt字段的文档只能按_id识别新增
+            clauses.append({field: {'$exists': False},
+                            '_id': {'$gt': DatabaseExporter.decode_watermark(watermark['fallback'])}})
+        return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+    
+    @staticmethod
+    def decode_watermark(watermark: Dict[str, Any]) -> Any:
+        """将报告中的高水位标记还原为查询用的值"""
+        value = watermark['value']
+        if watermark['type'] == 'date':
+            return datetime.fromisoformat(value)
+        if watermark['type'] == 'objectid':
+            return ObjectId(value)
+        return value
+    
+    def export_delta(self, collection_name: str, output_file: str, description: str,
+                     watermark: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        导出高水位标记之后新增或修改的文档到增量文件
+        
+        Args:
+            collection_name: 集合名称
+            output_file: 全量导出文件路径，增量文件以其为前缀
+            description: 集合描述
+            watermark: 上一次导出记录的高水位标记
+            
+        Returns:
+            导出统计信息，delta字段为本次增量文件的描述（没有变化时为None）
+        """
+        try:
+            collection: Collection = self.db[collection_name]
+            query = self.delta_query(watermark)
+            total_count = collection.count_documents(query)
+            
+            root, ext = self.split_output_path(output_file)
+            delta_file = f"{root}.delta-{datetime.now().strftime('%Y%m%dT%H%M%S')}{ext}"
+            
+            print(f"\n{Fore.CYAN}==================================================")
+            print(f"{Fore.CYAN}增量导出 {description}")
+            print(f"{Fore.CYAN}==================================================")
+            print(f"{Fore.BLUE}📊 集合: {collection_name}")
+            print(f"{Fore.BLUE}🔖 起始标记: {watermark['field']} > {watermark['value']}")
+            print(f"{Fore.BLUE}📄 变化文档: {total_count}")
+            
+            if total_count == 0:
+                print(f"{Fore.GREEN}✓ {description} 没有变化，无需生成增量文件")
+                return {'total': 0, 'exported': 0, 'errors': 0, 'delta': None}
+            
+            with tqdm(total=total_count, desc=f"导出{description}",
+                      bar_format='{desc}: {percentage:3.0f}%|{bar}| {n}/{total_fmt}') as pbar:
+                cursor = self.source_collection(collection).find(query).sort('_id', 1).batch_size(self.batch_size)
+                exported_count, error_count = self.write_documents(
+                    cursor, delta_file, pbar, stage=f"export.{collection_name}")
+            
+            print(f"{Fore.GREEN}✓ {description} 增量导出完成: {exported_count} 条 -> {delta_file}")
+            
+            return {
+                'total': total_count,
+                'exported': exported_count,
+                'errors': error_count,
+                'delta': {
+                    'file': os.path.basename(delta_file),
+                    'export_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'since': watermark,
+                    'exported_documents': exported_count,
+                    'errors': error_count,
+                    'sha256': file_sha256(delta_file)
+                }
+            }
+            
+        except Exception as e:
+            print(f"{Fore.RED}❌ 增量导出集合 {collection_name} 失败: {str(e)}")
+            return {'total': 0, 'exported': 0, 'errors': 1}
+    
+    def load_export_report(self, output_dir: str) -> Dict[str, Any]:
+        """读取输出目录中已有的导出报告，不存在时返回空字典"""
+        report_file = os.path.join(output_dir, 'export_report.json')
+        if not os.path.exists(report_file):
+            return {}
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"{Fore.YELLOW}⚠️  无法读取已有导出报告: {str(e)}")
+            return {}
+    
+    def merge_snapshot(self, export_dir: str, snapshot_dir: str) -> bool:
+        """
+        将全量导出与其后的增量文件合并为一份完整快照
+        
+        快照文件使用data_seeder.py期望的文件名（如 questions.json），
+        可通过 python data_seeder.py --data-dir <快照目录> 直接导入。
+        同一文档以最后一次增量中的版本为准；增量导出无法识别删除，已删除的文档仍保留在快照中。
+        
+        Args:
+            export_dir: 包含export_report.json的导出目录
+            snapshot_dir: 快照输出目录
+            
+        Returns:
+            是否成功
+        """
+        report = self.load_export_report(export_dir)
+        if not report.get('collections'):
+            print(f"{Fore.RED}❌ 未找到导出报告: {os.path.join(export_dir, 'export_report.json')}")
+            return False
+        
+        os.makedirs(snapshot_dir, exist_ok=True)
+        total_errors = 0
+        
+        for config_key, entry in report['collections'].items():
+            config = self.collections_config.get(config_key)
+            deltas = entry.get('deltas', [])
+            # 全量导出为空的集合没有全量文件，但之后的增量中仍可能有新增文档
+            has_base = bool(entry.get('total_documents'))
+            if not config or not (has_base or any(delta.get('exported_documents') for delta in deltas)):
+                continue
+            
+            # 增量文件通常远小于全量文件，按_id载入内存，后面的增量覆盖前面的
+            updates = {}
+            for delta in deltas:
+                for doc in iter_json_documents(os.path.join(export_dir, delta['file'])):
+                    updates[str(doc['_id'])] = doc
+            
+            def merged_documents():
+                if has_base:
+                    for doc in iter_json_documents(os.path.join(export_dir, entry['filename'])):
+                        yield updates.pop(str(doc['_id']), doc)
+                # 剩余的是全量导出之后新增的文档
+                yield from list(updates.values())
+            
+            output_file = os.path.join(snapshot_dir, self.output_filename(config['seed_file']))
+            with self.stage(f"merge.{config_key}"):
+                exported_count, error_count = self.write_documents(
+                    merged_documents(), output_file, stage=f"merge.{config_key}")
+            total_errors += error_count
+            
+            print(f"{Fore.GREEN}✓ {config['description']}: {exported_count} 条 "
+                  f"(增量文件 {len(deltas)} 个) -> {output_file}")
+        
+        print(f"{Fore.GREEN}📦 快照已生成: {snapshot_dir}")
+        return total_errors == 0
+    
+    def verify_checksums(self, export_dir: str) -> bool:
+        """
+        按export_report.json中记录的SHA-256校验导出文件（含分片和增量文件）
+        
+        Args:
+            export_dir: 包含export_report.json的导出目录
+            
+        Returns:
+            全部文件存在且内容一致时返回True
+        """
+        report = self.load_export_report(export_dir)
+        if not report.get('collections'):
+            print(f"{Fore.RED}❌ 未找到导出报告: {os.path.join(export_dir, 'export_report.json')}")
+            return False
+        
+        files = []
+        for entry in report['collections'].values():
+            if entry.get('sha256'):
+                files.append((entry['filename'], entry['sha256']))
+            files.extend((shard['file'], shard.get('sha256')) for shard in entry.get('shards', []))
+            files.extend((delta['file'], delta.get('sha256')) for delta in entry.get('deltas', []))
+        
+        failed = 0
+        for filename, expected in files:
+            path = os.path.join(export_dir, filename)
+            if not expected:
+                print(f"  {Fore.YELLOW}- {filename}: 报告中没有校验值（旧版本导出）")
+            elif not os.path.exists(path):
+                failed += 1
+                print(f"  {Fore.RED}✗ {filename}: 文件不存在")
+            elif file_sha256(path) != expected:
+                failed += 1
+                print(f"  {Fore.RED}✗ {filename}: SHA-256不一致")
+            else:
+                print(f"  {Fore.GREEN}✓ {filename}")
+        
+        if failed:
+            print(f"{Fore.RED}❌ {failed}/{len(files)} 个文件校验失败")
+            return False
+        print(f"{Fore.GREEN}✓ {len(files)} 个文件校验通过")
+        return True
+    
+    def export_all_collections(self, output_dir: str = "./export", specific_collections: List[str] = None,
+                               incremental: bool = False, resume: bool = False) -> bool:
         """
         导出所有或指定集合的数据
         
+        导出进度记录在输出目录的检查点文件中，全部集合导出成功后删除
+        
         Args:
             output_dir: 输出目录
             specific_collections: 指定要导出的集合列表
+            incremental: 是否只导出上一次导出记录的高水位标记之后变化的文档
+            resume: 是否从上一次中断时的检查点继续导出
             
         Returns:
             是否成功
@@ -231,6 +903,11 @@ class DatabaseExporter:
             
             print(f"{Fore.BLUE}📋 计划导出 {len(collections_to_export)} 个集合")
             
+            previous_report = self.load_export_report(output_dir)
+            previous_collections = previous_report.get('collections', {})
+            
+            self.load_checkpoint(output_dir, collections_to_export, incremental, resume)
+            
             # 导出统计
             export_stats = {}
             total_exported = 0
@@ -244,20 +921,54 @@ class DatabaseExporter:
                 
                 config = self.collections_config[config_key]
                 collection_name = config['collection']
-                filename = config['filename']
+                filename = self.output_filename(config['filename'])
                 description = config['description']
                 
                 output_file = os.path.join(output_dir, filename)
                 
-                # 导出集合
-                stats = self.export_collection(collection_name, output_file, description)
+                checkpoint_entry = self.checkpoint.get(collection_name) or {}
+                if checkpoint_entry.get('completed') and os.path.exists(
+                        os.path.join(output_dir, checkpoint_entry['file'])):
+                    print(f"{Fore.GREEN}✓ {description} 已在上次运行中导出完成，跳过")
+                    stats = checkpoint_entry['stats']
+                    export_stats[config_key] = stats
+                    total_exported += stats['exported']
+                    continue
+                
+                # 标记在导出前读取，导出期间的修改留给下一次增量导出；续传时沿用中断前读取的标记
+                if 'watermark' in checkpoint_entry:
+                    watermark = checkpoint_entry['watermark']
+                else:
+                    watermark = self.get_watermark(self.db[collection_name])
+                    self.checkpoint.update(collection_name, watermark=watermark)
+                previous = previous_collections.get(config_key, {})
+                
+                with self.stage(f"export.{collection_name}"):
+                    if incremental and previous.get('watermark'):
+                        stats = self.export_delta(collection_name, output_file, description,
+                                                  previous['watermark'])
+                    else:
+                        if incremental:
+                            print(f"{Fore.YELLOW}⚠️  {description} 没有高水位标记，执行全量导出")
+                        stats = self.export_collection(collection_name, output_file, description)
+                
+                if stats['errors'] == 0:
+                    stats['watermark'] = watermark
+                    written = (stats['delta'] or {}).get('file') if 'delta' in stats else \
+                        stats.get('manifest', filename)
+                    if written:
+                        self.checkpoint.update(collection_name, completed=True, file=written, stats=stats)
                 export_stats[config_key] = stats
                 
                 total_exported += stats['exported']
                 total_errors += stats['errors']
             
             # 生成导出报告
-            self.generate_export_report(export_stats, output_dir)
+            self.generate_export_report(export_stats, output_dir, previous_report)
+            if total_errors == 0:
+                self.checkpoint.remove()
+            else:
+                print(f"{Fore.YELLOW}检查点已保存，可使用 --resume 只重新导出失败的集合")
             
             print(f"\n{Fore.CYAN}======================================================================")
             print(f"{Fore.GREEN}✓ 数据导出完成！")
@@ -275,39 +986,87 @@ class DatabaseExporter:
             print(f"{Fore.RED}❌ 导出失败: {str(e)}")
             return False
     
-    def generate_export_report(self, export_stats: Dict[str, Dict[str, int]], output_dir: str):
-        """生成导出报告"""
+    def load_checkpoint(self, output_dir: str, collections: List[str], incremental: bool, resume: bool):
+        """
+        创建本次导出的检查点
+        
+        续传时只使用数据库、格式、分区数、集合列表和导出方式都与本次一致的检查点，
+        否则从头开始并覆盖旧的检查点
+        """
+        self.checkpoint = Checkpoint(os.path.join(output_dir, CHECKPOINT_FILENAME))
+        meta = {
+            'database': self.database_name,
+            'format': self.export_format,
+            'partitions': self.partitions,
+            'collections': list(collections),
+            'incremental': incremental
+        }
+        if resume and self.checkpoint.load(meta):
+            done = sum(1 for entry in self.checkpoint.entries.values() if entry.get('completed'))
+            print(f"{Fore.YELLOW}↻ 从检查点继续导出（已完成 {done} 个集合）")
+            return
+        if resume:
+            print(f"{Fore.YELLOW}⚠️  没有与本次参数匹配的检查点，从头开始导出")
+        self.checkpoint.reset(meta)
+    
+    def generate_export_report(self, export_stats: Dict[str, Dict[str, Any]], output_dir: str,
+                               previous_report: Optional[Dict[str, Any]] = None):
+        """
+        生成导出报告
+        
+        本次未导出的集合保留已有报告中的记录；增量导出追加到对应集合的deltas列表
+        """
         try:
+            previous_collections = (previous_report or {}).get('collections', {})
             report = {
                 'export_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'database_name': self.database_name,
                 'connection_string': self.connection_string,
-                'collections': {}
+                'collections': dict(previous_collections)
             }
             
             for config_key, stats in export_stats.items():
                 config = self.collections_config[config_key]
-                report['collections'][config_key] = {
+                previous = previous_collections.get(config_key, {})
+                
+                if 'delta' in stats:
+                    entry = dict(previous)
+                    entry['deltas'] = previous.get('deltas', []) + ([stats['delta']] if stats['delta'] else [])
+                    entry['watermark'] = stats.get('watermark') or previous.get('watermark')
+                    entry['success'] = previous.get('success', True) and stats['errors'] == 0
+                    report['collections'][config_key] = entry
+                    continue
+                
+                entry = {
                     'collection_name': config['collection'],
                     'description': config['description'],
-                    'filename': config['filename'],
+                    'filename': stats.get('manifest', self.output_filename(config['filename'])),
+                    'format': self.export_format,
                     'total_documents': stats['total'],
                     'exported_documents': stats['exported'],
                     'errors': stats['errors'],
                     'success': stats['errors'] == 0
                 }
+                if 'sha256' in stats:
+                    entry['sha256'] = stats['sha256']
+                if 'shards' in stats:
+                    entry['manifest'] = stats['manifest']
+                    entry['shards'] = stats['shards']
+                entry['watermark'] = stats.get('watermark')
+                entry['deltas'] = []
+                report['collections'][config_key] = entry
             
             # 保存报告
             report_file = os.path.join(output_dir, 'export_report.json')
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            write_json_atomic(report_file, report)
             
             print(f"{Fore.GREEN}📊 导出报告已生成: {report_file}")
             
         except Exception as e:
             print(f"{Fore.RED}❌ 生成导出报告失败: {str(e)}")
     
-    def run(self, output_dir: str = "./export", specific_collections: List[str] = None, show_stats: bool = True):
+    def run(self, output_dir: str = "./export", specific_collections: List[str] = None, show_stats: bool = True,
+            incremental: bool = False, resume: bool = False):
         """
         运行数据导出
         
@@ -315,6 +1074,8 @@ class DatabaseExporter:
             output_dir: 输出目录
             specific_collections: 指定集合列表
             show_stats: 是否显示统计信息
+            incremental: 是否执行增量导出
+            resume: 是否从上一次中断时的检查点继续导出
         """
         print(f"{Fore.CYAN}======================================================================")
         print(f"{Fore.CYAN}体育知识智能题库平台 - 数据导出工具")
@@ -328,15 +1089,18 @@ class DatabaseExporter:
             
             # 显示数据库统计
             if show_stats:
-                self.get_database_stats()
+                with self.stage('stats'):
+                    self.get_database_stats()
             
             # 导出数据
-            success = self.export_all_collections(output_dir, specific_collections)
+            success = self.export_all_collections(output_dir, specific_collections, incremental, resume)
             
             return success
             
         except KeyboardInterrupt:
             print(f"\n{Fore.YELLOW}⚠️  用户中断导出操作")
+            if self.checkpoint:
+                print(f"{Fore.YELLOW}已导出的进度保存在检查点中，可使用 --resume 继续")
             return False
         except Exception as e:
             print(f"{Fore.RED}❌ 导出过程发生错误: {str(e)}")
@@ -344,6 +1108,17 @@ class DatabaseExporter:
         finally:
             self.disconnect()
 
+def _export_range_in_process(options: Dict[str, Any], collection_name: str, lower: Any, upper: Any,
+                             shard_file: str) -> Tuple[int, int]:
+    """在子进程中使用独立连接导出一个分区"""
+    exporter = DatabaseExporter(**options)
+    exporter.client = MongoClient(exporter.connection_string)
+    try:
+        collection = exporter.client[exporter.database_name][collection_name]
+        return exporter.export_range(collection, lower, upper, shard_file)
+    finally:
+        exporter.client.close()
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(
@@ -355,6 +1130,16 @@ def main():
   python data_exporter.py --output ./backup                  # 指定输出目录
   python data_exporter.py --collections users questions      # 只导出用户和题目数据
   python data_exporter.py --no-stats                        # 不显示统计信息
+  python data_exporter.py --format ndjson --batch-size 5000  # 每行一个文档，加大游标批次
+  python data_exporter.py --collections exams --partitions 8 # 按_id范围拆分为8个分片并行导出
+  python data_exporter.py --format ndjson.gz                 # 压缩的扩展JSON，保留ObjectId和日期类型
+  python data_exporter.py --format bson                      # 原始BSON，导出和导入最快
+  python data_exporter.py --output ./backup --incremental    # 只导出上次导出之后的变化
+  python data_exporter.py --output ./backup --merge ./snapshot  # 合并全量与增量文件为快照
+  python data_exporter.py --output ./backup --resume         # 从上一次中断的位置继续导出
+  python data_exporter.py --output ./backup --verify-checksums  # 按导出报告中的SHA-256校验文件
+  python data_exporter.py --metrics-out                      # 在export_report.json旁写入export_metrics.json
+  python data_exporter.py --cprofile export.prof --tracemalloc  # 采集函数级耗时和内存分配
         """
     )
     
@@ -378,20 +1163,103 @@ def main():
                        action='store_true',
                        help='不显示数据库统计信息')
     
+    parser.add_argument('--format',
+                       choices=EXPORT_FORMATS,
+                       default='json',
+                       help='导出格式：json数组、ndjson扩展JSON（可gzip/zstd压缩）或原始bson (默认: json)')
+    
+    parser.add_argument('--batch-size',
+                       type=int,
+                       default=1000,
+                       help='游标每批读取的文档数量 (默认: 1000)')
+    
+    parser.add_argument('--write-buffer',
+                       type=int,
+                       default=1 << 20,
+                       help='输出文件写缓冲区大小，单位字节 (默认: 1048576)')
+    
+    parser.add_argument('--partitions',
+                       type=int,
+                       default=1,
+                       help='按_id范围将每个集合拆分为多个分片并行导出 (默认: 1，不拆分)')
+    
+    parser.add_argument('--incremental',
+                       action='store_true',
+                       help='只导出上一次导出之后新增或修改的文档（写入增量文件）')
+    
+    parser.add_argument('--merge',
+                       metavar='SNAPSHOT_DIR',
+                       help='将 --output 目录中的全量导出与增量文件合并为快照，写入SNAPSHOT_DIR')
+    
+    parser.add_argument('--partition-executor',
+                       choices=PARTITION_EXECUTORS,
+                       default='thread',
+                       help='分片并行导出使用线程池或进程池 (默认: thread)')
+    
+    parser.add_argument('--resume',
+                       action='store_true',
+                       help='从输出目录中的检查点继续上一次中断的导出')
+    
+    parser.add_argument('--verify-checksums',
+                       action='store_true',
+                       help='按export_report.json中记录的SHA-256校验 --output 目录中的导出文件')
+    
+    parser.add_argument('--metrics-out',
+                       nargs='?',
+                       const='export_metrics.json',
+                       metavar='FILE',
+                       help='将各阶段耗时、数据库命令统计和写入字节数写入JSON文件，'
+                            '不含目录的文件名写入输出目录 (默认: export_metrics.json)')
+    
+    parser.add_argument('--cprofile',
+                       metavar='FILE',
+                       help='使用cProfile采集各线程的函数级耗时并写入FILE（pstats格式，Python 3.12及以上只采集主线程）')
+    
+    parser.add_argument('--tracemalloc',
+                       action='store_true',
+                       help='使用tracemalloc记录内存分配峰值和主要分配位置（会明显降低速度）')
+    
     args = parser.parse_args()
     
+    metrics = None
+    metrics_file = args.metrics_out
+    if metrics_file and not os.path.dirname(metrics_file):
+        # 与export_report.json放在同一目录（合并快照时放在快照目录）
+        metrics_file = os.path.join(args.merge or args.output, metrics_file)
+    if metrics_file or args.cprofile or args.tracemalloc:
+        metrics = Metrics(cprofile_file=args.cprofile, trace_memory=args.tracemalloc)
+        metrics.start()
+    
     # 创建导出器
     exporter = DatabaseExporter(
         connection_string=args.connection,
-        database_name=args.database
+        database_name=args.database,
+        export_format=args.format,
+        batch_size=args.batch_size,
+        write_buffer=args.write_buffer,
+        partitions=args.partitions,
+        partition_executor=args.partition_executor,
+        metrics=metrics
     )
     
-    # 执行导出
-    success = exporter.run(
-        output_dir=args.output,
-        specific_collections=args.collections,
-        show_stats=not args.no_stats
-    )
+    if args.verify_checksums:
+        # 校验无需连接数据库
+        success = exporter.verify_checksums(args.output)
+    elif args.merge:
+        # 合并快照无需连接数据库
+        success = exporter.merge_snapshot(args.output, args.merge)
+    else:
+        # 执行导出
+        success = exporter.run(
+            output_dir=args.output,
+            specific_collections=args.collections,
+            show_stats=not args.no_stats,
+            incremental=args.incremental,
+            resume=args.resume
+        )
+    
+    if metrics:
+        finish_metrics(metrics, metrics_file)
     
     # 退出状态
     sys.exit(0 if success else 1)
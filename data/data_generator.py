@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 压测数据生成工具
+按规模参数生成与种子数据结构一致的九类数据，所有引用均有效，
+多进程并行写入NDJSON分片，并生成可由data_seeder.py直接导入的分片清单
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from colorama import Fore, init
+from tqdm import tqdm
+
+init(autoreset=True)
+
+# 预设规模；production对应约100万学生、10万题目、5000万条答题记录
+PRESETS: Dict[str, Dict[str, int]] = {
+    'small': {
+        'institutions': 4, 'teachers': 20, 'students': 1000, 'class_size': 40,
+        'knowledge_bases': 10, 'points_per_base': 20, 'paths_per_base': 2,
+        'questions': 2000, 'exams': 5000, 'answers_per_exam': 10, 'progress': 10000,
+    },
+    'medium': {
+        'institutions': 50, 'teachers': 2000, 'students': 100000, 'class_size': 40,
+        'knowledge_bases': 200, 'points_per_base': 50, 'paths_per_base': 3,
+        'questions': 20000, 'exams': 500000, 'answers_per_exam': 10, 'progress': 1000000,
+    },
+    'production': {
+        'institutions': 500, 'teachers': 20000, 'students': 1000000, 'class_size': 40,
+        'knowledge_bases': 1000, 'points_per_base': 100, 'paths_per_base': 5,
+        'questions': 100000, 'exams': 5000000, 'answers_per_exam': 10, 'progress': 10000000,
+    },
+}
+
+# 生成的数据文件（与DatabaseSeeder.data_files中的文件名对应）及其集合
+GENERATED_FILES: List[Tuple[str, str]] = [
+    ('institutions', 'institutions'),
+    ('users', 'users'),
+    ('additional_students', 'users'),
+    ('classes', 'classes'),
+    ('knowledge_bases', 'knowledgebases'),
+    ('knowledge_points', 'knowledgepoints'),
+    ('learning_paths', 'learningpaths'),
+    ('questions', 'questions'),
+    ('exams', 'exams'),
+    ('knowledge_progress', 'knowledgeprogresses'),
+]
+
+# 生成_id时使用的集合编号，_id由集合编号和序号确定，各进程无需共享状态即可生成有效引用
+COLLECTION_CODES = {
+    'institutions': 1, 'users': 2, 'classes': 3, 'knowledgebases': 4, 'knowledgepoints': 5,
+    'learningpaths': 6, 'questions': 7, 'exams': 8, 'knowledgeprogresses': 9,
+}
+
+SPORTS = ['足球', '篮球', '排球', '网球', '乒乓球', '羽毛球', '游泳', '田径', '体操', '武术']
+KNOWLEDGE_TYPES = ['规则', '技术', '战术', '历史', '裁判', '安全', '训练']
+QUESTION_DIFFICULTIES = ['easy', 'medium', 'hard']
+LEVELS = ['beginner', 'intermediate', 'advanced']
+INSTITUTION_TYPES = ['university', 'high_school', 'middle_school', 'training_center']
+GRADES = ['大一', '大二', '大三', '大四']
+EXAM_TYPES = ['practice', 'mock_exam', 'competition', 'assessment']
+ABILITY_KEYS = ['sportsKnowledge', 'rulesUnderstanding', 'technicalSkills',
+                'historyKnowledge', 'judgeAbility', 'safetyAwareness']
+
+# 各难度题目的答对概率
+CORRECT_RATE = {'easy': 0.85, 'medium': 0.65, 'hard': 0.45}
+
+# 生成数据的起始时间（UTC，不带时区以便直接格式化）
+BASE_TIME = datetime(2024, 1, 1)
+BASE_TIMESTAMP = int(BASE_TIME.replace(tzinfo=timezone.utc).timestamp())
+
+DEFAULT_SHARD_SIZE = 100000
+
+
+def make_id(collection_name: str, index: int) -> str:
+    """由集合编号和序号生成确定的24位十六进制ObjectId（时间戳部分随序号递增）"""
+    return f'{BASE_TIMESTAMP + index:08x}{COLLECTION_CODES[collection_name]:04x}{index:012x}'
+
+
+def oid(collection_name: str, index: int) -> Dict[str, str]:
+    """扩展JSON格式的ObjectId"""
+    return {'$oid': make_id(collection_name, index)}
+
+
+def date(value: datetime) -> Dict[str, str]:
+    """扩展JSON格式的日期（value为UTC时间）"""
+    return {'$date': value.isoformat(timespec='milliseconds') + 'Z'}
+
+
+def pick(values: List[Any], index: int, salt: int = 0) -> Any:
+    """按序号确定地选取一个值，同一序号在任何进程中结果相同"""
+    return values[((index + 1) * 2654435761 + salt * 40503) % 4294967296 % len(values)]
+
+
+class Layout:
+    """
+    根据规模参数计算各类数据的数量和相互引用关系
+
+    用户集合的序号依次为：超级管理员(0)、机构管理员、教师、学生；
+    学生按序号依次分入班级，班级按序号轮流分配到各机构。
+    """
+
+    def __init__(self, scale: Dict[str, int]):
+        self.scale = scale
+        self.institutions = max(1, scale['institutions'])
+        self.teachers = max(self.institutions, scale['teachers'])
+        self.students = scale['students']
+        self.class_size = max(1, scale['class_size'])
+        self.classes = math.ceil(self.students / self.class_size)
+        self.knowledge_bases = max(1, scale['knowledge_bases'])
+        self.points_per_base = max(1, scale['points_per_base'])
+        self.paths_per_base = max(0, scale['paths_per_base'])
+        self.questions = max(1, scale['questions'])
+        self.answers_per_exam = min(max(1, scale['answers_per_exam']), self.questions)
+        self.teachers_per_institution = self.teachers // self.institutions
+
+    def counts(self) -> Dict[str, int]:
+        """每个数据文件的文档数量"""
+        return {
+            'institutions': self.institutions,
+            'users': 1 + self.institutions + self.teachers,
+            'additional_students': self.students,
+            'classes': self.classes,
+            'knowledge_bases': self.knowledge_bases,
+            'knowledge_points': self.knowledge_bases * self.points_per_base,
+            'learning_paths': self.knowledge_bases * self.paths_per_base,
+            'questions': self.questions,
+            'exams': self.scale['exams'],
+            'knowledge_progress': self.scale['progress'],
+        }
+
+    def admin_index(self, institution: int) -> int:
+        return 1 + institution
+
+    def teacher_index(self, teacher: int) -> int:
+        return 1 + self.institutions + teacher
+
+    def student_index(self, student: int) -> int:
+        return 1 + self.institutions + self.teachers + student
+
+    def teacher_institution(self, teacher: int) -> int:
+        return teacher % self.institutions
+
+    def class_institution(self, class_index: int) -> int:
+        return class_index % self.institutions
+
+    def class_teacher(self, class_index: int) -> int:
+        institution = self.class_institution(class_index)
+        return institution + self.institutions * ((class_index // self.institutions) % self.teachers_per_institution)
+
+    def student_class(self, student: int) -> int:
+        return student // self.class_size
+
+    def base_author(self, base: int) -> int:
+        return base % self.teachers
+
+    def question_difficulty(self, question: int) -> str:
+        return pick(QUESTION_DIFFICULTIES, question, 1)
+
+
+def _generate_institution(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    created = BASE_TIME + timedelta(days=i % 30)
+    return {
+        '_id': oid('institutions', i),
+        'name': f'体育学院{i + 1:05d}',
+        'type': pick(INSTITUTION_TYPES, i),
+        'description': f'压测生成的第{i + 1}个机构',
+        'address': {'country': '中国', 'province': '北京市', 'city': '北京市'},
+        'contact': {'email': f'admin@inst{i + 1:05d}.edu.cn'},
+        'settings': {'maxUsers': 50000, 'maxClasses': 5000},
+        'adminUsers': [oid('users', layout.admin_index(i))],
+        'status': 'active',
+        'createdBy': oid('users', 0),
+        'subscription': {'plan': 'premium', 'status': 'active'},
+        'createdAt': date(created),
+        'updatedAt': date(created),
+    }
+
+
+def _user_document(index: int, username: str, role: str, institution: int, rng: random.Random,
+                   ctx: Dict[str, Any]) -> Dict[str, Any]:
+    created = BASE_TIME + timedelta(minutes=index % 100000)
+    return {
+        '_id': oid('users', index),
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': ctx['password_hash'],
+        'role': role,
+        'institution': oid('institutions', institution),
+        'learningStats': {'totalQuestions': 0, 'correctAnswers': 0, 'accuracy': 0, 'totalTime': 0,
+                          'totalExams': 0, 'passedExams': 0, 'continuousLoginDays': 0},
+        'settings': {'notifications': True, 'difficulty': 'adaptive', 'preferredSports': [rng.choice(SPORTS)]},
+        'abilityProfile': {key: rng.randint(30, 90) for key in ABILITY_KEYS},
+        'points': rng.randint(0, 5000),
+        'achievements': [],
+        'isActive': True,
+        'createdAt': date(created),
+        'updatedAt': date(created),
+    }
+
+
+def _generate_user(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    if i == 0:
+        return _user_document(0, 'superadmin', 'super_admin', 0, rng, ctx)
+    if i <= layout.institutions:
+        institution = i - 1
+        return _user_document(i, f'inst_admin_{institution:05d}', 'institution_admin', institution, rng, ctx)
+    teacher = i - 1 - layout.institutions
+    return _user_document(i, f'teacher_{teacher:06d}', 'teacher', layout.teacher_institution(teacher), rng, ctx)
+
+
+def _generate_student(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    class_index = layout.student_class(i)
+    doc = _user_document(layout.student_index(i), f'student_{i:07d}', 'student',
+                         layout.class_institution(class_index), rng, ctx)
+    doc['grade'] = pick(GRADES, class_index)
+    doc['classInfo'] = f'班级{class_index + 1:06d}'
+    return doc
+
+
+def _generate_class(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    teacher = layout.class_teacher(i)
+    grade = pick(GRADES, i)
+    enroll = date(BASE_TIME + timedelta(days=1))
+    first = i * layout.class_size
+    students = [{
+        'userId': oid('users', layout.student_index(s)),
+        'username': f'student_{s:07d}',
+        'email': f'student_{s:07d}@example.com',
+        'enrollDate': enroll,
+        'status': 'active',
+        'grade': grade,
+    } for s in range(first, min(first + layout.class_size, layout.students))]
+    return {
+        '_id': oid('classes', i),
+        'name': f'班级{i + 1:06d}',
+        'grade': grade,
+        'description': f'压测生成的第{i + 1}个班级',
+        'institutionId': oid('institutions', layout.class_institution(i)),
+        'teacherId': oid('users', layout.teacher_index(teacher)),
+        'teacherName': f'teacher_{teacher:06d}',
+        'capacity': max(layout.class_size, 1),
+        'status': 'active',
+        'students': students,
+        'statistics': {'totalStudents': len(students), 'activeStudents': len(students)},
+        'metadata': {'createdBy': oid('users', layout.teacher_index(teacher)),
+                     'createdAt': date(BASE_TIME), 'updatedAt': date(BASE_TIME)},
+    }
+
+
+def _generate_knowledge_base(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    author = layout.base_author(i)
+    created = BASE_TIME + timedelta(hours=i)
+    return {
+        '_id': oid('knowledgebases', i),
+        'title': f'{pick(SPORTS, i)}知识库{i + 1:05d}',
+        'description': f'压测生成的第{i + 1}个知识库',
+        'category': pick(SPORTS, i),
+        'level': pick(LEVELS, i),
+        'status': 'published',
+        'isPublic': True,
+        'tags': [pick(SPORTS, i)],
+        'author': oid('users', layout.teacher_index(author)),
+        'allowedInstitutions': [oid('institutions', layout.teacher_institution(author))],
+        'collaborators': [],
+        'stats': {'knowledgePoints': layout.points_per_base, 'learners': 0},
+        'createdAt': date(created),
+        'updatedAt': date(created),
+    }
+
+
+def _generate_knowledge_point(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    base, order = divmod(i, layout.points_per_base)
+    author = oid('users', layout.teacher_index(layout.base_author(base)))
+    created = BASE_TIME + timedelta(hours=base, minutes=order)
+    return {
+        '_id': oid('knowledgepoints', i),
+        'title': f'{pick(SPORTS, base)}知识点{order + 1:03d}',
+        'content': f'知识库{base + 1}的第{order + 1}个知识点内容',
+        'summary': f'知识点{order + 1}摘要',
+        'knowledgeBaseId': make_id('knowledgebases', base),
+        'parentId': None,
+        'level': 1,
+        'order': order + 1,
+        'category': pick(SPORTS, base),
+        'tags': [pick(KNOWLEDGE_TYPES, i)],
+        'difficulty': pick(LEVELS, i),
+        'estimatedTime': rng.randint(5, 60),
+        'sections': [],
+        'prerequisites': [oid('knowledgepoints', i - 1)] if order else [],
+        'related': [],
+        'children': [],
+        'version': {'current': '1.0', 'history': [{'version': '1.0', 'authorId': author}]},
+        'status': 'published',
+        'createdBy': author,
+        'createdAt': date(created),
+        'updatedAt': date(created),
+    }
+
+
+def _generate_learning_path(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    base = i // layout.paths_per_base
+    first = base * layout.points_per_base
+    size = min(layout.points_per_base, 5)
+    points = sorted(rng.sample(range(layout.points_per_base), size))
+    knowledge_points = [{'pointId': oid('knowledgepoints', first + p), 'order': order + 1,
+                         'isOptional': False, 'estimatedTime': 15}
+                        for order, p in enumerate(points)]
+    created = BASE_TIME + timedelta(hours=base)
+    return {
+        '_id': oid('learningpaths', i),
+        'knowledgeBase': oid('knowledgebases', base),
+        'title': f'学习路径{i + 1:05d}',
+        'description': f'知识库{base + 1}的学习路径',
+        'knowledgePoints': knowledge_points,
+        'difficulty': pick(LEVELS, i),
+        'estimatedDuration': 15 * len(knowledge_points),
+        'prerequisites': [],
+        'status': 'published',
+        'isDefault': i % layout.paths_per_base == 0,
+        'createdBy': oid('users', layout.teacher_index(layout.base_author(base))),
+        'createdAt': date(created),
+        'updatedAt': date(created),
+    }
+
+
+def _generate_question(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    question_type = pick(['single_choice', 'single_choice', 'multiple_choice', 'true_false'], i, 2)
+    if question_type == 'true_false':
+        correct = rng.randint(0, 1)
+        options = [{'text': '正确', 'isCorrect': correct == 0}, {'text': '错误', 'isCorrect': correct == 1}]
+    elif question_type == 'multiple_choice':
+        correct = sorted(rng.sample(range(4), 2))
+        options = [{'text': f'选项{chr(65 + k)}', 'isCorrect': k in correct} for k in range(4)]
+    else:
+        correct = rng.randint(0, 3)
+        options = [{'text': f'选项{chr(65 + k)}', 'isCorrect': k == correct} for k in range(4)]
+    created = BASE_TIME + timedelta(minutes=i)
+    return {
+        '_id': oid('questions', i),
+        'title': f'题目{i + 1:06d}',
+        'content': f'压测生成的第{i + 1}道题目',
+        'type': question_type,
+        'options': options,
+        'correctAnswer': correct,
+        'explanation': '压测数据解析',
+        'category': {'sport': pick(SPORTS, i, 3), 'knowledgeType': pick(KNOWLEDGE_TYPES, i, 4)},
+        'tags': [pick(SPORTS, i, 3)],
+        'difficulty': layout.question_difficulty(i),
+        'stats': {'totalAttempts': 0, 'correctAttempts': 0, 'accuracy': 0, 'averageTime': 0},
+        'status': 'published',
+        'creator': oid('users', layout.teacher_index(i % layout.teachers)),
+        'reviewedBy': oid('users', 0),
+        'isAIGenerated': False,
+        'version': 1,
+        'createdAt': date(created),
+        'updatedAt': date(created),
+    }
+
+
+def _generate_exam(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    student = rng.randrange(layout.students)
+    started = BASE_TIME + timedelta(seconds=i * 5 + rng.randrange(3600))
+    submitted = started
+    answers = []
+    correct_count = 0
+    total_time = 0
+    for question in rng.sample(range(layout.questions), layout.answers_per_exam):
+        is_correct = rng.random() < CORRECT_RATE[layout.question_difficulty(question)]
+        time_spent = rng.randint(5, 120)
+        submitted += timedelta(seconds=time_spent)
+        correct_count += is_correct
+        total_time += time_spent
+        answers.append({'questionId': oid('questions', question), 'userAnswer': 0 if is_correct else 1,
+                        'isCorrect': is_correct, 'timeSpent': time_spent, 'submittedAt': date(submitted)})
+    accuracy = round(correct_count / len(answers) * 100, 2)
+    return {
+        '_id': oid('exams', i),
+        'title': f'测试{i + 1:08d}',
+        'config': {'timeLimit': 30, 'questionCount': len(answers), 'passingScore': 60},
+        'user': oid('users', layout.student_index(student)),
+        'status': 'completed',
+        'startedAt': date(started),
+        'completedAt': date(submitted),
+        'answers': answers,
+        'result': {'score': round(accuracy), 'accuracy': accuracy, 'totalTime': math.ceil(total_time / 60),
+                   'passed': accuracy >= 60},
+        'examType': pick(EXAM_TYPES, i),
+        'createdAt': date(started),
+        'updatedAt': date(submitted),
+    }
+
+
+def _generate_progress(i: int, layout: Layout, rng: random.Random, ctx: Dict[str, Any]) -> Dict[str, Any]:
+    student = rng.randrange(layout.students)
+    base = rng.randrange(layout.knowledge_bases)
+    point = base * layout.points_per_base + rng.randrange(layout.points_per_base)
+    progress = rng.choice([0, 25, 50, 75, 100, 100])
+    started = BASE_TIME + timedelta(seconds=i * 3)
+    updated = started + timedelta(minutes=rng.randint(1, 120))
+    doc = {
+        '_id': oid('knowledgeprogresses', i),
+        'user': oid('users', layout.student_index(student)),
+        'knowledgeBase': oid('knowledgebases', base),
+        'knowledgePoint': oid('knowledgepoints', point),
+        'learningPath': oid('learningpaths', base * layout.paths_per_base) if layout.paths_per_base else None,
+        'progress': progress,
+        'status': 'completed' if progress == 100 else ('not_started' if progress == 0 else 'in_progress'),
+        'startedAt': date(started),
+        'totalTime': rng.randint(1, 120),
+        'sessions': [],
+        'bookmarks': [],
+        'createdAt': date(started),
+        'updatedAt': date(updated),
+    }
+    if progress == 100:
+        doc['completedAt'] = date(updated)
+        doc['score'] = rng.randint(60, 100)
+    return doc
+
+
+GENERATORS: Dict[str, Callable[[int, Layout, random.Random, Dict[str, Any]], Dict[str, Any]]] = {
+    'institutions': _generate_institution,
+    'users': _generate_user,
+    'additional_students': _generate_student,
+    'classes': _generate_class,
+    'knowledge_bases': _generate_knowledge_base,
+    'knowledge_points': _generate_knowledge_point,
+    'learning_paths': _generate_learning_path,
+    'questions': _generate_question,
+    'exams': _generate_exam,
+    'knowledge_progress': _generate_progress,
+}
+
+
+def _write_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    生成并写入一个分片（在工作进程中执行）
+
+    每个分片使用由种子、文件名和分片序号确定的随机数生成器，
+    因此输出与进程数量和执行顺序无关。
+    """
+    stem, index, start, end = task['stem'], task['index'], task['start'], task['end']
+    layout = Layout(task['scale'])
+    rng = random.Random(f"{task['seed']}:{stem}:{index}")
+    generate = GENERATORS[stem]
+    ctx = task['ctx']
+
+    file_name = f"{stem}.part-{index:04d}{task['extension']}"
+    path = os.path.join(task['output_dir'], file_name)
+    opener = gzip.open if task['extension'].endswith('.gz') else open
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    with opener(path, 'wt', encoding='utf-8') as f:
+        lines = []
+        for i in range(start, end):
+            lines.append(dumps(generate(i, layout, rng, ctx)))
+            if len(lines) >= 1000:
+                f.write('\n'.join(lines) + '\n')
+                lines = []
+        if lines:
+            f.write('\n'.join(lines) + '\n')
+
+    return {
+        'stem': stem,
+        'index': index,
+        'file': file_name,
+        'lower_id': make_id(task['collection'], _id_index(stem, start, layout)),
+        'upper_id': make_id(task['collection'], _id_index(stem, end - 1, layout)),
+        'documents': end - start,
+        'errors': 0,
+    }
+
+
+def _id_index(stem: str, index: int, layout: Layout) -> int:
+    """数据文件中第index个文档的_id序号（学生的_id排在管理员和教师之后）"""
+    return layout.student_index(index) if stem == 'additional_students' else index
+
+
+def _default_password_hash(seed: int) -> str:
+    """
+    所有生成用户共用测试密码admin123456的哈希，避免逐个计算bcrypt
+
+    盐值由随机种子确定，保证相同种子生成的数据文件完全一致。
+    """
+    import bcrypt
+    alphabet = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+    rng = random.Random(seed)
+    # bcrypt盐值为22个字符，最后一个字符只有高2位有效
+    salt = ''.join(rng.choice(alphabet) for _ in range(21)) + rng.choice('.Oeu')
+    return bcrypt.hashpw(b'admin123456', f'$2b$10${salt}'.encode('ascii')).decode('utf-8')
+
+
+def generate(output_dir: str, scale: Dict[str, int], seed: int = 42, workers: int = None,
+             shard_size: int = DEFAULT_SHARD_SIZE, compress: bool = False) -> Dict[str, Any]:
+    """
+    生成全部数据文件
+
+    Args:
+        output_dir: 输出目录
+        scale: 规模参数（见PRESETS）
+        seed: 随机种子，相同的种子和规模参数生成相同的数据
+        workers: 工作进程数量，默认为CPU核数
+        shard_size: 每个分片的文档数量
+        compress: 是否以gzip压缩分片
+
+    Returns:
+        Dict[str, Any]: 每个数据文件的文档数量和分片清单
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    layout = Layout(scale)
+    counts = layout.counts()
+    extension = '.ndjson.gz' if compress else '.ndjson'
+    ctx = {'password_hash': _default_password_hash(seed)}
+
+    tasks = []
+    for stem, collection_name in GENERATED_FILES:
+        total = counts[stem]
+        for index, start in enumerate(range(0, total, shard_size), 1):
+            tasks.append({
+                'stem': stem, 'collection': collection_name, 'index': index,
+                'start': start, 'end': min(start + shard_size, total),
+                'scale': scale, 'seed': seed, 'ctx': ctx,
+                'output_dir': output_dir, 'extension': extension,
+            })
+
+    # 文档较大的分片先提交，缩短最后一个进程的等待时间
+    tasks.sort(key=lambda task: (task['stem'] != 'exams', -(task['end'] - task['start'])))
+
+    shards: Dict[str, List[Dict[str, Any]]] = {stem: [] for stem, _ in GENERATED_FILES}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        futures = [executor.submit(_write_shard, task) for task in tasks]
+        with tqdm(total=sum(counts.values()), desc='生成文档', unit='条') as pbar:
+            for future in as_completed(futures):
+                shard = future.result()
+                shards[shard.pop('stem')].append(shard)
+                pbar.update(shard['documents'])
+
+    summary = {}
+    for stem, collection_name in GENERATED_FILES:
+        stem_shards = sorted(shards[stem], key=lambda shard: shard['index'])
+        manifest = {
+            'collection': collection_name,
+            'format': extension.lstrip('.'),
+            'total_documents': sum(shard['documents'] for shard in stem_shards),
+            'shards': stem_shards,
+        }
+        with open(os.path.join(output_dir, f'{stem}.manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        summary[stem] = {'documents': manifest['total_documents'], 'shards': len(stem_shards)}
+    return summary
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台压测数据生成工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python data_generator.py --output ./generated                       # small规模
+  python data_generator.py --preset production --output /data/gen     # 100万学生、5000万条答题记录
+  python data_generator.py --students 200000 --exams 1000000 --workers 16
+  python data_seeder.py --data-dir ./generated --defer-indexes         # 导入生成的数据
+        """
+    )
+    parser.add_argument('--output', default='generated',
+                        help='输出目录 (默认: generated)')
+    parser.add_argument('--preset', choices=list(PRESETS), default='small',
+                        help='预设规模 (默认: small)')
+    for key in PRESETS['small']:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=None,
+                            help=f'覆盖预设中的 {key}')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='随机种子 (默认: 42)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='工作进程数量 (默认: CPU核数)')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'每个分片的文档数量 (默认: {DEFAULT_SHARD_SIZE})')
+    parser.add_argument('--gzip', action='store_true',
+                        help='以gzip压缩分片 (.ndjson.gz)')
+    args = parser.parse_args()
+
+    scale = dict(PRESETS[args.preset])
+    for key in scale:
+        value = getattr(args, key)
+        if value is not None:
+            scale[key] = value
+    if args.shard_size < 1 or any(value < 0 for value in scale.values()):
+        parser.error('规模参数不能为负数，分片大小必须大于0')
+    if scale['students'] < 1 and (scale['exams'] or scale['progress']):
+        parser.error('生成考试记录或学习进度时至少需要1名学生')
+
+    print(f"{Fore.CYAN}{'='*60}")
+    print(f"{Fore.CYAN}体育知识智能题库平台 - 压测数据生成")
+    print(f"{Fore.CYAN}{'='*60}")
+    print(f"{Fore.YELLOW}规模参数: {json.dumps(scale, ensure_ascii=False)}")
+    print(f"{Fore.YELLOW}预计答题记录: {scale['exams'] * scale['answers_per_exam']:,} 条")
+
+    start = time.perf_counter()
+    try:
+        summary = generate(args.output, scale, args.seed, args.workers, args.shard_size, args.gzip)
+    except OSError as e:
+        print(f"{Fore.RED}✗ 写入失败：{e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    total = sum(item['documents'] for item in summary.values())
+    print(f"\n{Fore.GREEN}✓ 数据生成完成: {args.output}")
+    for stem, item in summary.items():
+        print(f"  - {stem}: {item['documents']:,} 条记录, {item['shards']} 个分片")
+    print(f"  - 总计: {total:,} 条记录, 耗时 {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} 条/秒)")
+
+
+if __name__ == '__main__':
+    main()
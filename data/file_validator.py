@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 数据文件离线校验工具
+不连接数据库，流式读取种子数据文件，检查重复_id、唯一字段、
+跨文件外键和字段类型
+"""
+
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+import bson
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from colorama import Fore
+
+from index_catalog import INDEX_CATALOG
+from integrity_check import (DEFAULT_SAMPLE_LIMIT, FOREIGN_KEYS, check_document, check_references,
+                             finish_reference_checks, new_reference_checks, normalize_id, print_integrity_report)
+from json_stream import iter_json_documents, resolve_data_file
+from objectid_fields import OBJECT_ID_FIELDS, parse_field_path
+
+# 各集合的字段类型声明（与backend/src/models保持一致），字段存在且不为null时检查类型
+FIELD_TYPES: Dict[str, Dict[str, str]] = {
+    'institutions': {
+        'name': 'string', 'type': 'string', 'status': 'string', 'address': 'object',
+        'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'users': {
+        'username': 'string', 'email': 'string', 'password': 'string', 'role': 'string',
+        'points': 'number', 'isActive': 'boolean', 'learningStats': 'object', 'achievements': 'array',
+        'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'knowledgebases': {
+        'title': 'string', 'category': 'string', 'level': 'string', 'status': 'string',
+        'isPublic': 'boolean', 'tags': 'array', 'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'knowledgepoints': {
+        'title': 'string', 'content': 'string', 'summary': 'string', 'level': 'number',
+        'order': 'number', 'category': 'string', 'difficulty': 'string', 'estimatedTime': 'number',
+        'sections': 'array', 'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'learningpaths': {
+        'title': 'string', 'knowledgePoints': 'array', 'difficulty': 'string',
+        'estimatedDuration': 'number', 'status': 'string', 'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'questions': {
+        'title': 'string', 'content': 'string', 'type': 'string', 'options': 'array',
+        'explanation': 'string', 'category.sport': 'string', 'category.knowledgeType': 'string',
+        'difficulty': 'string', 'status': 'string', 'stats': 'object',
+        'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'exams': {
+        'title': 'string', 'status': 'string', 'examType': 'string', 'config.timeLimit': 'number',
+        'config.questionCount': 'number', 'answers': 'array', 'answers[].isCorrect': 'boolean',
+        'answers[].timeSpent': 'number', 'answers[].submittedAt': 'date',
+        'startedAt': 'date', 'completedAt': 'date', 'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'knowledgeprogresses': {
+        'progress': 'number', 'status': 'string', 'totalTime': 'number', 'score': 'number',
+        'startedAt': 'date', 'completedAt': 'date', 'createdAt': 'date', 'updatedAt': 'date',
+    },
+    'classes': {
+        'name': 'string', 'grade': 'string', 'teacherName': 'string', 'capacity': 'number',
+        'students': 'array', 'students[].username': 'string', 'status': 'string',
+    },
+}
+
+# 各集合的必填字段（backend/src/models中 required: true 的字段）
+REQUIRED_FIELDS: Dict[str, List[str]] = {
+    'institutions': ['name', 'type'],
+    'users': ['username', 'email', 'password', 'institution'],
+    'knowledgebases': ['title', 'category', 'level', 'author'],
+    'knowledgepoints': ['title', 'content', 'summary', 'knowledgeBaseId', 'category', 'estimatedTime'],
+    'learningpaths': ['title', 'knowledgeBase'],
+    'questions': ['title', 'content', 'type', 'correctAnswer', 'explanation',
+                  'category.sport', 'category.knowledgeType', 'difficulty', 'creator'],
+    'exams': ['title', 'user', 'answers[].questionId', 'answers[].isCorrect'],
+    'knowledgeprogresses': ['user', 'knowledgeBase'],
+    'classes': ['name', 'grade', 'institutionId', 'teacherId', 'teacherName',
+                'students[].userId', 'students[].username'],
+}
+
+
+def _is_date(value: Any) -> bool:
+    """日期字段可以是datetime（扩展JSON）或ISO 8601字符串"""
+    if isinstance(value, datetime):
+        return True
+    if value.__class__ is not str:
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return True
+    except ValueError:
+        return False
+
+
+TYPE_CHECKS = {
+    'string': lambda value: value.__class__ is str,
+    'number': lambda value: isinstance(value, (int, float)) and value.__class__ is not bool,
+    'boolean': lambda value: value.__class__ is bool,
+    'array': lambda value: value.__class__ is list,
+    'object': lambda value: value.__class__ is dict,
+    'date': _is_date,
+    'objectid': lambda value: value.__class__ is ObjectId or normalize_id(value).__class__ is ObjectId,
+}
+
+
+def unique_fields(collection_name: str) -> List[str]:
+    """返回索引目录中单字段唯一索引的字段"""
+    return [next(iter(model.document['key']))
+            for model in INDEX_CATALOG.get(collection_name, [])
+            if model.document.get('unique') and len(model.document['key']) == 1]
+
+
+def _iter_slots(value: Any, segments: List[str]):
+    """按字段路径逐个返回字段的值，缺失的字段返回None"""
+    segment = segments[0]
+    is_array = segment.endswith('[]')
+    value = value.get(segment[:-2] if is_array else segment)
+    rest = segments[1:]
+    if is_array and value.__class__ is list:
+        for item in value:
+            if rest:
+                if item.__class__ is dict:
+                    yield from _iter_slots(item, rest)
+            else:
+                yield item
+    elif rest:
+        if value.__class__ is dict:
+            yield from _iter_slots(value, rest)
+        else:
+            yield None
+    else:
+        yield value
+
+
+class FileValidator:
+    """数据文件离线校验器"""
+
+    def __init__(self, data_files: Dict[str, Dict[str, str]], data_dir: str = '.',
+                 order: Optional[List[str]] = None, sample_limit: int = DEFAULT_SAMPLE_LIMIT):
+        """
+        初始化校验器
+
+        Args:
+            data_files: DatabaseSeeder.data_files格式的数据文件配置
+            data_dir: 数据文件所在目录
+            order: 数据文件的处理顺序（通常为导入顺序），被引用的集合先处理时只需读取一遍文件
+            sample_limit: 每项问题最多记录的样例数量
+        """
+        self.data_files = data_files
+        self.data_dir = data_dir
+        self.order = [key for key in (order or []) if key in data_files]
+        self.order += [key for key in data_files if key not in self.order]
+        self.sample_limit = sample_limit
+
+        # 集合名称 → _id → 首次出现的数据文件（多个数据文件可能写入同一集合）
+        self.id_sets: Dict[str, Dict[Any, str]] = {}
+        # 集合名称 → 唯一字段 → 已出现的值 → 首次出现的数据文件
+        self.unique_values: Dict[str, Dict[str, Dict[Any, str]]] = {}
+        self.duplicates: List[Dict[str, Any]] = []
+        self.type_errors: List[Dict[str, Any]] = []
+        self.type_error_count = 0
+        self.reference_checks: List[Dict[str, Any]] = []
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+        self._field_checks = {}
+        for config in data_files.values():
+            collection_name = config['collection']
+            self.id_sets.setdefault(collection_name, {})
+            self.unique_values.setdefault(collection_name, {field: {} for field in unique_fields(collection_name)})
+        for collection_name in self.id_sets:
+            self._field_checks[collection_name] = self._compile_field_checks(collection_name)
+
+    @staticmethod
+    def _compile_field_checks(collection_name: str) -> List[Dict[str, Any]]:
+        """合并类型声明、必填字段和ObjectId字段为检查列表"""
+        types = dict(FIELD_TYPES.get(collection_name, {}))
+        for path in OBJECT_ID_FIELDS.get(collection_name, ['_id']):
+            types.setdefault(path, 'objectid')
+        required = set(REQUIRED_FIELDS.get(collection_name, [])) | {'_id'}
+        return [{
+            'field': path,
+            'segments': parse_field_path(path),
+            'type': types.get(path),
+            'required': path in required,
+        } for path in sorted(set(types) | required)]
+
+    def _record_type_error(self, data_key: str, doc: Dict[str, Any], field: str, expected: str, value: Any):
+        """记录字段类型错误或必填字段缺失"""
+        self.type_error_count += 1
+        if len(self.type_errors) < self.sample_limit:
+            self.type_errors.append({
+                'file': self.data_files[data_key]['file'], '_id': str(doc.get('_id')),
+                'field': field, 'expected': expected,
+                'value': None if value is None else str(value)[:80],
+            })
+
+    def _check_fields(self, data_key: str, doc: Dict[str, Any], checks: List[Dict[str, Any]]):
+        """检查单个文档的必填字段和字段类型"""
+        for check in checks:
+            type_check = TYPE_CHECKS.get(check['type'])
+            for value in _iter_slots(doc, check['segments']):
+                if value is None:
+                    if check['required']:
+                        self._record_type_error(data_key, doc, check['field'], 'required', None)
+                elif type_check and not type_check(value):
+                    self._record_type_error(data_key, doc, check['field'], check['type'], value)
+
+    def _index_document(self, data_key: str, collection_name: str, doc: Dict[str, Any], index: int):
+        """记录_id和唯一字段，发现重复时记录来源文件"""
+        file_name = self.data_files[data_key]['file']
+        doc_id = normalize_id(doc.get('_id'))
+        ids = self.id_sets[collection_name]
+        if doc_id is not None:
+            if doc_id in ids:
+                self._record_duplicate(collection_name, '_id', doc_id, file_name, index, ids[doc_id])
+            else:
+                ids[doc_id] = file_name
+
+        for field, seen in self.unique_values[collection_name].items():
+            value = doc.get(field)
+            if value is None:
+                continue
+            if value in seen:
+                self._record_duplicate(collection_name, field, value, file_name, index, seen[value])
+            else:
+                seen[value] = file_name
+
+    def _record_duplicate(self, collection_name: str, field: str, value: Any, file_name: str,
+                          index: int, first_file: Optional[str] = None):
+        """记录重复的_id或唯一字段值"""
+        self.duplicates.append({
+            'collection': collection_name, 'field': field, 'value': str(value),
+            'file': file_name, 'index': index, 'first_file': first_file,
+        })
+
+    def _iter_file(self, file_path: str):
+        """流式读取数据文件"""
+        for doc in iter_json_documents(file_path):
+            # 原始BSON文件按普通文档解码后再检查
+            if isinstance(doc, RawBSONDocument):
+                doc = bson.decode(doc.raw)
+            yield doc
+
+    def _targets_complete(self, collection_name: str, processed: Set[str]) -> bool:
+        """外键引用的集合是否已经读取完全部数据文件"""
+        targets = {target for _, target in FOREIGN_KEYS.get(collection_name, [])}
+        return all(config['collection'] not in targets or key in processed
+                   for key, config in self.data_files.items())
+
+    def run(self) -> Dict[str, Any]:
+        """
+        执行校验
+
+        按处理顺序流式读取每个文件，同时建立_id索引、检查唯一字段和字段类型；
+        被引用集合已全部读取的文件在同一遍中检查外键，其余文件在所有_id
+        索引建立后再读取一遍检查外键。
+
+        Returns:
+            Dict[str, Any]: 校验报告
+        """
+        start = time.perf_counter()
+        processed: Set[str] = set()
+        deferred: List[str] = []
+
+        for data_key in self.order:
+            config = self.data_files[data_key]
+            collection_name = config['collection']
+            file_path = resolve_data_file(os.path.join(self.data_dir, config['file']))
+            if not file_path:
+                self.files[data_key] = {'file': config['file'], 'documents': 0, 'missing': True}
+                processed.add(data_key)
+                continue
+
+            reference_checks = None
+            if self._targets_complete(collection_name, processed):
+                reference_checks = new_reference_checks(collection_name, self.id_sets)
+            else:
+                deferred.append(data_key)
+
+            field_checks = self._field_checks[collection_name]
+            count = 0
+            for count, doc in enumerate(self._iter_file(file_path), 1):
+                self._index_document(data_key, collection_name, doc, count)
+                self._check_fields(data_key, doc, field_checks)
+                if reference_checks:
+                    check_document(doc, reference_checks, self.sample_limit)
+
+            self.files[data_key] = {'file': os.path.basename(file_path), 'documents': count}
+            if reference_checks:
+                self._add_reference_checks(data_key, reference_checks)
+            processed.add(data_key)
+
+        for data_key in deferred:
+            config = self.data_files[data_key]
+            file_path = resolve_data_file(os.path.join(self.data_dir, config['file']))
+            checks = check_references(self._iter_file(file_path), config['collection'],
+                                      self.id_sets, self.sample_limit)
+            self._add_reference_checks(data_key, checks, finished=True)
+
+        dangling = sum(check['dangling_count'] for check in self.reference_checks)
+        return {
+            'data_dir': os.path.abspath(self.data_dir),
+            'generated_at': datetime.now().isoformat(),
+            'elapsed_seconds': round(time.perf_counter() - start, 3),
+            'files': self.files,
+            'total_errors': len(self.duplicates) + self.type_error_count + dangling,
+            'duplicates': self.duplicates,
+            'type_error_count': self.type_error_count,
+            'type_errors': self.type_errors,
+            'total_dangling': dangling,
+            'checks': self.reference_checks,
+        }
+
+    def _add_reference_checks(self, data_key: str, checks: List[Dict[str, Any]], finished: bool = False):
+        """将外键检查结果加入报告，并标注来源文件"""
+        if not finished:
+            checks = finish_reference_checks(checks)
+        for check in checks:
+            check['file'] = self.data_files[data_key]['file']
+        self.reference_checks.extend(checks)
+
+
+def validate_data_files(data_files: Dict[str, Dict[str, str]], data_dir: str = '.',
+                        order: Optional[List[str]] = None,
+                        sample_limit: int = DEFAULT_SAMPLE_LIMIT) -> Dict[str, Any]:
+    """
+    离线校验数据文件（不连接数据库）
+
+    Args:
+        data_files: DatabaseSeeder.data_files格式的数据文件配置
+        data_dir: 数据文件所在目录
+        order: 数据文件的处理顺序
+        sample_limit: 每项问题最多记录的样例数量
+
+    Returns:
+        Dict[str, Any]: 校验报告
+    """
+    return FileValidator(data_files, data_dir, order, sample_limit).run()
+
+
+def print_validation_report(report: Dict[str, Any]):
+    """输出数据文件校验结果"""
+    print(f"\n{Fore.YELLOW}数据文件:")
+    for info in report['files'].values():
+        if info.get('missing'):
+            print(f"  {Fore.YELLOW}⚠ {info['file']}: 文件不存在")
+        else:
+            print(f"  - {info['file']}: {info['documents']} 条记录")
+
+    print(f"\n{Fore.YELLOW}重复值检查:")
+    if report['duplicates']:
+        for item in report['duplicates'][:20]:
+            source = f"（首次出现于 {item['first_file']}）" if item.get('first_file') else ''
+            print(f"  {Fore.RED}✗ {item['collection']}.{item['field']} = {item['value']}: "
+                  f"{item['file']} 第{item['index']}条{source}")
+    else:
+        print(f"  {Fore.GREEN}✓ 未发现重复的_id或唯一字段")
+
+    print(f"\n{Fore.YELLOW}字段类型检查:")
+    if report['type_error_count']:
+        for item in report['type_errors'][:20]:
+            expected = '必填字段缺失' if item['expected'] == 'required' else f"应为 {item['expected']}"
+            print(f"  {Fore.RED}✗ {item['file']} {item['_id']}.{item['field']}: {expected} ({item['value']})")
+        print(f"  {Fore.RED}共 {report['type_error_count']} 个类型错误")
+    else:
+        print(f"  {Fore.GREEN}✓ 字段类型正确")
+
+    print_integrity_report(report)
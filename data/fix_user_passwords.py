@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import csv
 import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import bcrypt
-from colorama import init, Fore, Style
+from colorama import init, Fore
 
 # 初始化colorama
 init(autoreset=True)
 
-def generate_password_hash(password):
+def generate_password_hash(password, rounds=10):
     """生成bcrypt密码哈希，与Node.js后端保持一致"""
-    # 使用与后端相同的cost factor (10)
-    salt = bcrypt.gensalt(rounds=10)
+    # 默认使用与后端相同的cost factor (10)
+    salt = bcrypt.gensalt(rounds=rounds)
     # 生成哈希
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password.decode('utf-8')
@@ -97,9 +104,211 @@ def update_user_passwords():
         print(f"{Fore.RED}❌ 更新密码失败: {str(e)}")
         return False
 
-if __name__ == "__main__":
+def load_password_mapping(file_path):
+    """
+    读取用户名→密码映射
+
+    支持两种格式:
+      .csv   表头包含 username,password 两列
+      .json  {"用户名": "密码"} 对象，或 [{"username": ..., "password": ...}] 数组
+    """
+    if file_path.lower().endswith('.csv'):
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or not {'username', 'password'} <= set(reader.fieldnames):
+                raise ValueError("CSV文件必须包含 username 和 password 两列")
+            return {row['username']: row['password'] for row in reader if row['username']}
+
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return {str(username): str(password) for username, password in data.items()}
+    if isinstance(data, list):
+        return {item['username']: item['password'] for item in data}
+    raise ValueError("JSON文件必须是对象或数组")
+
+def _hash_and_verify(task):
+    """在工作进程中生成并验证单个密码哈希"""
+    username, password, rounds = task
+    hashed_password = generate_password_hash(password, rounds)
+    return username, hashed_password, verify_password(password, hashed_password)
+
+def hash_passwords(mapping, rounds=10, workers=None):
+    """
+    使用进程池并行生成并验证密码哈希
+
+    bcrypt计算受CPU限制，按进程并行才能利用多核。
+
+    Args:
+        mapping: 用户名→密码映射
+        rounds: bcrypt cost factor
+        workers: 进程数量，默认为CPU核数
+
+    Returns:
+        tuple: (用户名→哈希映射, 验证失败的用户名列表, 每秒哈希数)
+    """
+    tasks = [(username, password, rounds) for username, password in mapping.items()]
+    workers = workers or os.cpu_count() or 1
+    # 每个任务耗时在毫秒级以上，分块提交以减少进程间通信次数
+    chunksize = max(1, len(tasks) // (workers * 4))
+
+    hashes = {}
+    failed = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for username, hashed_password, is_valid in executor.map(_hash_and_verify, tasks, chunksize=chunksize):
+            if is_valid:
+                hashes[username] = hashed_password
+            else:
+                failed.append(username)
+    elapsed = time.perf_counter() - start
+    return hashes, failed, len(tasks) / elapsed if elapsed > 0 else 0.0
+
+def update_users_file(hashes, users_file, output_file):
+    """将密码哈希写入用户数据文件，返回(已更新数量, 未找到的用户名)"""
+    with open(users_file, 'r', encoding='utf-8') as f:
+        users = json.load(f)
+
+    updated = 0
+    for user in users:
+        hashed_password = hashes.get(user.get('username'))
+        if hashed_password:
+            user['password'] = hashed_password
+            updated += 1
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(users, f, ensure_ascii=False, indent=2)
+
+    known = {user.get('username') for user in users}
+    return updated, sorted(set(hashes) - known)
+
+def update_database(hashes, mongo_uri, database_name, batch_size=1000):
+    """批量更新数据库中用户的密码哈希，返回(已匹配数量, 未找到的用户名)"""
+    from pymongo import MongoClient, UpdateOne
+
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        collection = client[database_name]['users']
+        now = datetime.now()
+        items = list(hashes.items())
+        matched = 0
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            operations = [UpdateOne({'username': username},
+                                    {'$set': {'password': hashed_password, 'updatedAt': now}})
+                          for username, hashed_password in batch]
+            matched += collection.bulk_write(operations, ordered=False).matched_count
+
+        found = set(collection.distinct('username', {'username': {'$in': list(hashes)}}))
+        return matched, sorted(set(hashes) - found)
+    finally:
+        client.close()
+
+def run_hash_benchmark(rounds_list, count=64, workers=None):
+    """测量不同cost factor下的并行哈希速度"""
+    mapping = {f'bench_{i}': f'password_{i}' for i in range(count)}
+    workers = workers or os.cpu_count() or 1
+    print(f"{Fore.YELLOW}⏱  bcrypt哈希速度 ({count} 个密码, {workers} 个进程，含验证):")
+    print(f"   {'cost':>6}{'哈希/秒':>12}{'毫秒/哈希':>12}")
+    for rounds in rounds_list:
+        _, _, rate = hash_passwords(mapping, rounds, workers)
+        print(f"   {rounds:>6}{rate:>12.1f}{1000 / rate if rate else 0:>12.1f}")
+
+def update_passwords_from_mapping(args):
+    """按用户名→密码映射为每个用户生成独立的密码哈希"""
+    try:
+        print(f"{Fore.CYAN}======================================================================")
+        print(f"{Fore.CYAN}体育知识智能题库平台 - 密码修复工具 (批量独立密码)")
+        print(f"{Fore.CYAN}======================================================================")
+
+        mapping = load_password_mapping(args.passwords)
+        workers = args.workers or os.cpu_count() or 1
+        print(f"{Fore.YELLOW}📋 密码映射数量: {len(mapping)}")
+        print(f"{Fore.YELLOW}🔐 cost factor: {args.rounds}，进程数量: {workers}")
+        print()
+
+        hashes, failed, rate = hash_passwords(mapping, args.rounds, workers)
+        print(f"{Fore.GREEN}✓ 生成并验证密码哈希: {len(hashes)} 个 ({rate:.1f} 哈希/秒, cost {args.rounds})")
+        if failed:
+            print(f"{Fore.RED}❌ 哈希验证失败: {', '.join(failed)}")
+            return False
+
+        if args.update_db:
+            updated, missing = update_database(hashes, args.mongo_uri, args.database, args.batch_size)
+            print(f"{Fore.GREEN}✅ 数据库密码更新完成，匹配用户数量: {updated}")
+        else:
+            output_file = args.output or args.users_file
+            updated, missing = update_users_file(hashes, args.users_file, output_file)
+            print(f"{Fore.GREEN}✅ 密码更新完成，已写入 {output_file}，更新用户数量: {updated}")
+
+        if missing:
+            print(f"{Fore.YELLOW}⚠️  未找到的用户 ({len(missing)}): {', '.join(missing[:20])}"
+                  f"{' ...' if len(missing) > 20 else ''}")
+        return True
+
+    except FileNotFoundError as e:
+        print(f"{Fore.RED}❌ 找不到文件: {e.filename}")
+        return False
+    except (ValueError, KeyError) as e:
+        print(f"{Fore.RED}❌ 密码映射格式错误: {str(e)}")
+        return False
+    except Exception as e:
+        print(f"{Fore.RED}❌ 更新密码失败: {str(e)}")
+        return False
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台密码修复工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python fix_user_passwords.py                                  # 所有用户统一设置为 admin123456
+  python fix_user_passwords.py --passwords accounts.csv         # 按映射为每个用户设置独立密码
+  python fix_user_passwords.py --passwords accounts.json --rounds 12 --workers 8
+  python fix_user_passwords.py --passwords accounts.csv --update-db  # 直接批量更新数据库
+  python fix_user_passwords.py --benchmark 8 10 12              # 测量不同cost factor的哈希速度
+        """
+    )
+    parser.add_argument('--passwords', metavar='FILE',
+                        help='用户名→密码映射文件 (.csv 或 .json)')
+    parser.add_argument('--rounds', type=int, default=10,
+                        help='bcrypt cost factor (默认: 10，与后端一致)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='哈希计算进程数量 (默认: CPU核数)')
+    parser.add_argument('--users-file', default='users.json',
+                        help='用户数据文件 (默认: users.json)')
+    parser.add_argument('--output', default=None,
+                        help='更新后的用户数据输出文件 (默认: 覆盖 --users-file)')
+    parser.add_argument('--update-db', action='store_true',
+                        help='批量更新数据库中的用户密码，而不是写入用户数据文件')
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='每批bulk_write的用户数量 (默认: 1000)')
+    parser.add_argument('--benchmark', type=int, nargs='+', metavar='ROUNDS',
+                        help='测量指定cost factor下的每秒哈希数量')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_hash_benchmark(args.benchmark, workers=args.workers)
+        return
+
+    if args.passwords:
+        success = update_passwords_from_mapping(args)
+        if success:
+            print(f"\n{Fore.GREEN}🎉 现在可以使用映射文件中的用户名和密码登录了！")
+        else:
+            print(f"\n{Fore.RED}💥 密码修复失败，请检查错误信息。")
+        sys.exit(0 if success else 1)
+
     success = update_user_passwords()
     if success:
         print(f"\n{Fore.GREEN}🎉 现在可以使用任意测试账户的用户名和密码 'admin123456' 登录了！")
     else:
-        print(f"\n{Fore.RED}💥 密码修复失败，请检查错误信息。") 
\ No newline at end of file
+        print(f"\n{Fore.RED}💥 密码修复失败，请检查错误信息。")
+
+if __name__ == "__main__":
+    main()
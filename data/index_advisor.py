@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 索引建议工具
+在已导入数据的数据库上对后端实际执行的查询（声明的查询形态或MongoDB profiler捕获的查询）
+运行 explain("executionStats")，找出全表扫描、内存排序和扫描/返回比例过高的查询，
+按 等值-排序-范围 规则给出复合索引建议，可直接创建并对比创建前后的查询延迟
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import json_util
+from colorama import Fore, init
+from pymongo import ASCENDING, DESCENDING, MongoClient
+
+from index_catalog import INDEX_CATALOG
+from integrity_check import write_report
+
+init(autoreset=True)
+
+# 扫描的索引键/文档数超过返回文档数的该倍数时视为索引选择性不足
+DEFAULT_MAX_RATIO = 10
+# 测量延迟时每个查询的执行次数（取中位数）
+DEFAULT_REPEAT = 5
+DEFAULT_PROFILE_LIMIT = 1000
+
+# 这些条件无法为索引提供有效的扫描范围，不放入建议的索引
+UNSELECTIVE_OPERATORS = {'$ne', '$nin', '$not', '$exists', '$regex', '$elemMatch', '$size', '$type', '$where'}
+RANGE_OPERATORS = {'$gt', '$gte', '$lt', '$lte'}
+
+
+class Sample:
+    """
+    查询条件中的占位值，运行时从已导入的数据中取真实的值
+
+    Args:
+        collection: 取值的集合
+        field: 字段路径（如 category.sport），数组字段取其中的元素
+        many: 大于0时取多个不同的值（用于$in）
+    """
+
+    def __init__(self, collection: str, field: str, many: int = 0):
+        self.collection = collection
+        self.field = field
+        self.many = many
+
+    def resolve(self, db) -> Any:
+        limit = max(self.many, 1)
+        values: List[Any] = []
+        cursor = db[self.collection].find({self.field: {'$exists': True}}, {self.field: 1}).sort('_id', ASCENDING)
+        for doc in cursor.limit(limit * 10):
+            for value in field_values(doc, self.field):
+                if value not in values:
+                    values.append(value)
+            if len(values) >= limit:
+                break
+        if not values:
+            raise ValueError(f"{self.collection}.{self.field} 没有数据，无法生成查询条件")
+        return values[:limit] if self.many else values[0]
+
+
+def field_values(doc: Any, path: str) -> Iterator[Any]:
+    """按点号路径取值，路径上的数组逐个展开"""
+    if isinstance(doc, list):
+        for item in doc:
+            yield from field_values(item, path)
+        return
+    if not path:
+        yield doc
+        return
+    if not isinstance(doc, dict):
+        return
+    head, _, rest = path.partition('.')
+    if head in doc:
+        yield from field_values(doc[head], rest)
+
+
+# 后端实际执行的查询形态：名称、代码位置、集合、查询条件、排序和数量限制
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {
+        'name': 'recent_completed_exams',
+        'source': 'recommendationService.analyzeUserLearningProfile, examController.getExamStats',
+        'collection': 'exams',
+        'filter': {'user': Sample('exams', 'user'), 'status': 'completed'},
+        'sort': [('completedAt', DESCENDING)],
+        'limit': 20,
+    },
+    {
+        'name': 'user_exam_list',
+        'source': 'examController.getExams',
+        'collection': 'exams',
+        'filter': {'user': Sample('exams', 'user')},
+        'sort': [('createdAt', DESCENDING)],
+        'limit': 10,
+    },
+    {
+        'name': 'path_progress',
+        'source': 'recommendationService.estimatePathProgress',
+        'collection': 'knowledgeprogresses',
+        'filter': {
+            'user': Sample('knowledgeprogresses', 'user'),
+            'knowledgePoint': {'$in': Sample('knowledgeprogresses', 'knowledgePoint', many=10)},
+            'status': 'completed',
+        },
+    },
+    {
+        'name': 'completed_learning_paths',
+        'source': 'recommendationService.getPersonalizedLearningPaths',
+        'collection': 'knowledgeprogresses',
+        'filter': {'user': Sample('knowledgeprogresses', 'user'), 'learningPath': {'$exists': True},
+                   'status': 'completed'},
+    },
+    {
+        'name': 'knowledge_base_progress',
+        'source': 'recommendationService.getRecommendedKnowledgePoints',
+        'collection': 'knowledgeprogresses',
+        'filter': {'user': Sample('knowledgeprogresses', 'user'),
+                   'knowledgeBase': Sample('knowledgeprogresses', 'knowledgeBase')},
+    },
+    {
+        'name': 'knowledge_base_points',
+        'source': 'recommendationService.getRecommendedKnowledgePoints',
+        'collection': 'knowledgepoints',
+        'filter': {'knowledgeBaseId': Sample('knowledgepoints', 'knowledgeBaseId'), 'status': 'published'},
+    },
+    {
+        'name': 'public_learning_paths',
+        'source': 'recommendationService.getPersonalizedLearningPaths',
+        'collection': 'learningpaths',
+        'filter': {'status': 'published', 'visibility': {'$in': ['public', 'institution']}},
+    },
+    {
+        'name': 'questions_by_difficulty',
+        'source': 'recommendationService.getProgressiveDifficultyQuestions',
+        'collection': 'questions',
+        'filter': {'status': 'published', 'difficulty': {'$in': ['easy', 'medium']}},
+        'limit': 20,
+    },
+    {
+        'name': 'questions_by_topic',
+        'source': 'recommendationService.getReviewQuestions',
+        'collection': 'questions',
+        'filter': {'status': 'published', 'tags': {'$in': Sample('questions', 'tags', many=3)}, 'difficulty': 'medium'},
+        'limit': 20,
+    },
+    {
+        'name': 'question_list',
+        'source': 'questionController.getQuestions',
+        'collection': 'questions',
+        'filter': {'category.sport': Sample('questions', 'category.sport'), 'status': 'published'},
+        'sort': [('createdAt', DESCENDING)],
+        'limit': 10,
+    },
+    {
+        'name': 'leaderboard',
+        'source': 'statsController.getLeaderboard',
+        'collection': 'users',
+        'filter': {'isActive': True},
+        'sort': [('points', DESCENDING)],
+        'limit': 20,
+    },
+    {
+        'name': 'student_classes',
+        'source': 'classController.getClasses（学生）',
+        'collection': 'classes',
+        'filter': {'students.userId': Sample('classes', 'students.userId')},
+    },
+]
+
+
+def resolve_shape(db, shape: Dict[str, Any]) -> Dict[str, Any]:
+    """将查询条件中的Sample替换为真实的值"""
+    def resolve(value):
+        if isinstance(value, Sample):
+            return value.resolve(db)
+        if isinstance(value, dict):
+            return {key: resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        return value
+    return {**shape, 'filter': resolve(shape['filter'])}
+
+
+def shape_key(value: Any) -> Any:
+    """查询条件的形态：保留字段名和操作符，值统一替换为1，用于合并profiler中重复的查询"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, shape_key(item)) for key, item in value.items()))
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return tuple(shape_key(item) for item in value)
+    return 1
+
+
+def load_profiler_shapes(db, limit: int = DEFAULT_PROFILE_LIMIT) -> List[Dict[str, Any]]:
+    """
+    从system.profile读取最近的find/count查询，按查询形态去重
+
+    需要先在mongosh中开启profiler（如 db.setProfilingLevel(1, {slowms: 0})）并运行一段时间的后端
+    """
+    shapes, seen = [], set()
+    cursor = db['system.profile'].find({'op': {'$in': ['query', 'command']}}).sort('ts', DESCENDING).limit(limit)
+    for entry in cursor:
+        command = entry.get('command') or {}
+        if 'find' in command:
+            collection, query = command['find'], command.get('filter') or {}
+        elif 'count' in command:
+            collection, query = command['count'], command.get('query') or {}
+        else:
+            continue
+        if not isinstance(collection, str) or collection.startswith('system.'):
+            continue
+        sort = list((command.get('sort') or {}).items())
+        key = (collection, shape_key(query), tuple(sort))
+        if key in seen:
+            continue
+        seen.add(key)
+        shapes.append({
+            'name': f"profile:{collection}:{len(shapes) + 1}",
+            'source': 'system.profile',
+            'collection': collection,
+            'filter': query,
+            'sort': sort,
+            'limit': command.get('limit'),
+        })
+    return shapes
+
+
+def propose_index(shape: Dict[str, Any]) -> Optional[Tuple[List[Tuple[str, int]], int]]:
+    """
+    按 等值-排序-范围 规则建议复合索引
+
+    等值字段在前（$in 在没有排序时也视为等值，排在普通等值之后），其次是排序字段，最后是范围字段；
+    顶层的 $or/$and 以及 $ne、$exists、$regex 等条件不参与
+
+    Returns:
+        Optional[Tuple[List[Tuple[str, int]], int]]: 索引键和开头的等值字段数，
+            只按_id查询或没有可用字段时返回None
+    """
+    sort = shape.get('sort') or []
+    equality, in_fields, ranges = [], [], []
+    for field, condition in shape['filter'].items():
+        if field.startswith('$') or field == '_id':
+            continue
+        if isinstance(condition, dict) and any(key.startswith('$') for key in condition):
+            operators = set(condition)
+            if operators & UNSELECTIVE_OPERATORS:
+                continue
+            if operators == {'$eq'}:
+                equality.append(field)
+            elif operators == {'$in'}:
+                (ranges if sort else in_fields).append(field)
+            elif operators <= RANGE_OPERATORS:
+                ranges.append(field)
+        else:
+            equality.append(field)
+
+    keys = [(field, ASCENDING) for field in equality + in_fields]
+    keys += [(field, direction) for field, direction in sort if field not in equality + in_fields]
+    used = {field for field, _ in keys}
+    keys += [(field, ASCENDING) for field in ranges if field not in used]
+    return (keys, len(equality) + len(in_fields)) if keys else None
+
+
+def covered_by(keys: List[Tuple[str, int]], equality: int, indexes: List[List[Tuple[str, int]]]) -> bool:
+    """
+    建议的索引是否已被某个已有索引覆盖：开头的等值字段顺序不限，
+    其余字段依次相同，方向全部相同或全部相反
+    """
+    fields = {field for field, _ in keys[:equality]}
+    rest = keys[equality:]
+    reverse = [(field, -direction) for field, direction in rest]
+    for index in indexes:
+        index = [(field, int(direction)) for field, direction in index if isinstance(direction, (int, float))]
+        if len(index) >= len(keys) and {field for field, _ in index[:equality]} == fields \
+                and index[equality:len(keys)] in (rest, reverse):
+            return True
+    return False
+
+
+def plan_stages(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """遍历执行计划树中的全部阶段"""
+    plan = plan.get('queryPlan', plan)
+    yield plan
+    if 'inputStage' in plan:
+        yield from plan_stages(plan['inputStage'])
+    for child in plan.get('inputStages', []):
+        yield from plan_stages(child)
+
+
+def explain_shape(db, shape: Dict[str, Any]) -> Dict[str, Any]:
+    """运行 explain("executionStats") 并提取关键指标"""
+    command: Dict[str, Any] = {'find': shape['collection'], 'filter': shape['filter']}
+    if shape.get('sort'):
+        command['sort'] = dict(shape['sort'])
+    if shape.get('limit'):
+        command['limit'] = shape['limit']
+    explain = db.command('explain', command, verbosity='executionStats')
+    stats = explain['executionStats']
+    stages = list(plan_stages(explain['queryPlanner']['winningPlan']))
+    returned = stats['nReturned']
+    examined = max(stats['totalKeysExamined'], stats['totalDocsExamined'])
+    return {
+        'plan': ' <- '.join(stage['stage'] for stage in stages),
+        'index': next((stage['indexName'] for stage in stages if 'indexName' in stage), None),
+        'collscan': any(stage['stage'] == 'COLLSCAN' for stage in stages),
+        'blocking_sort': any(stage['stage'] == 'SORT' for stage in stages),
+        'returned': returned,
+        'keys_examined': stats['totalKeysExamined'],
+        'docs_examined': stats['totalDocsExamined'],
+        'ratio': round(examined / max(returned, 1), 1),
+        'explain_ms': stats['executionTimeMillis'],
+    }
+
+
+def measure_latency(db, shape: Dict[str, Any], repeat: int = DEFAULT_REPEAT) -> float:
+    """实际执行查询repeat次，返回耗时中位数（毫秒）"""
+    timings = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        list(db[shape['collection']].find(shape['filter'], sort=shape.get('sort') or None,
+                                          limit=shape.get('limit') or 0))
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def catalog_keys(collection: str) -> List[List[Tuple[str, int]]]:
+    """index_catalog中声明的该集合索引"""
+    return [list(model.document['key'].items()) for model in INDEX_CATALOG.get(collection, [])]
+
+
+class IndexAdvisor:
+    """对一组查询形态运行explain、标记问题并给出索引建议"""
+
+    def __init__(self, db, max_ratio: float = DEFAULT_MAX_RATIO, repeat: int = DEFAULT_REPEAT):
+        self.db = db
+        self.max_ratio = max_ratio
+        self.repeat = repeat
+
+    def flags(self, result: Dict[str, Any]) -> List[str]:
+        flags = []
+        if result['collscan']:
+            flags.append('COLLSCAN')
+        if result['blocking_sort']:
+            flags.append('内存排序')
+        if result['ratio'] > self.max_ratio:
+            flags.append(f"扫描/返回 {result['ratio']:g}")
+        return flags
+
+    def analyze(self, shapes: List[Dict[str, Any]], apply: bool = False) -> Dict[str, Any]:
+        """
+        分析查询形态
+
+        Args:
+            shapes: 查询形态，filter中可以包含Sample占位值
+            apply: 创建建议的索引，并重新测量有问题的查询
+
+        Returns:
+            Dict[str, Any]: 运行报告
+        """
+        entries = []
+        for shape in shapes:
+            entry = {
+                'name': shape['name'],
+                'source': shape.get('source'),
+                'collection': shape['collection'],
+            }
+            try:
+                resolved = resolve_shape(self.db, shape)
+                entry['query'] = json_util.dumps({'filter': resolved['filter'], 'sort': resolved.get('sort'),
+                                                  'limit': resolved.get('limit')}, ensure_ascii=False)
+                before = explain_shape(self.db, resolved)
+                before['latency_ms'] = measure_latency(self.db, resolved, self.repeat)
+            except Exception as e:
+                entry['error'] = str(e)
+                entries.append(entry)
+                continue
+            entry.update({'before': before, 'flags': self.flags(before), '_shape': resolved})
+            entries.append(entry)
+
+        proposals: Dict[Tuple[str, Tuple[Tuple[str, int], ...]], Dict[str, Any]] = {}
+        for entry in entries:
+            if not entry.get('flags'):
+                continue
+            proposed = propose_index(entry['_shape'])
+            if proposed is None:
+                continue
+            keys, equality = proposed
+            collection = entry['collection']
+            existing = [list(info['key']) for info in self.db[collection].index_information().values()]
+            if covered_by(keys, equality, existing):
+                # 已有可用的索引而计划器没有选用，通常是选择性不足，需要人工查看
+                entry['proposal'] = {'keys': keys, 'status': 'exists'}
+                continue
+            proposal = proposals.setdefault((collection, tuple(keys)), {
+                'collection': collection,
+                'keys': keys,
+                'name': '_'.join(f'{field}_{direction}' for field, direction in keys),
+                'declared': covered_by(keys, equality, catalog_keys(collection)),
+                'queries': [],
+            })
+            proposal['queries'].append(entry['name'])
+            entry['proposal'] = {'keys': keys, 'status': 'proposed'}
+
+        if apply:
+            for proposal in proposals.values():
+                start = time.perf_counter()
+                self.db[proposal['collection']].create_index(proposal['keys'], name=proposal['name'])
+                proposal['build_seconds'] = round(time.perf_counter() - start, 3)
+            for entry in entries:
+                if entry.get('proposal', {}).get('status') == 'proposed':
+                    after = explain_shape(self.db, entry['_shape'])
+                    after['latency_ms'] = measure_latency(self.db, entry['_shape'], self.repeat)
+                    entry['after'] = after
+                    entry['proposal']['status'] = 'applied'
+
+        for entry in entries:
+            entry.pop('_shape', None)
+        return {
+            'database': self.db.name,
+            'applied': apply,
+            'max_ratio': self.max_ratio,
+            'queries': entries,
+            'proposals': list(proposals.values()),
+        }
+
+
+def print_advisor_report(report: Dict[str, Any]):
+    """输出索引建议"""
+    print(f"\n{Fore.CYAN}{'='*50}")
+    print(f"{Fore.CYAN}索引建议（{report['database']}）")
+    print(f"{Fore.CYAN}{'='*50}")
+    for entry in report['queries']:
+        if 'error' in entry:
+            print(f"{Fore.YELLOW}  ! {entry['name']}: {entry['error']}")
+            continue
+        before = entry['before']
+        color = Fore.RED if entry['flags'] else Fore.GREEN
+        print(f"{color}  {'✗' if entry['flags'] else '✓'} {entry['name']} ({entry['collection']})"
+              f"{'：' + '，'.join(entry['flags']) if entry['flags'] else ''}")
+        print(f"      计划: {before['plan']}  索引: {before['index'] or '-'}")
+        print(f"      返回 {before['returned']}，扫描键 {before['keys_examined']}，扫描文档 {before['docs_examined']}，"
+              f"延迟 {before['latency_ms']:.3f}ms")
+        if 'after' in entry:
+            after = entry['after']
+            print(f"{Fore.GREEN}      创建索引后: {after['plan']}  索引: {after['index'] or '-'}，"
+                  f"扫描键 {after['keys_examined']}，扫描文档 {after['docs_examined']}，延迟 {after['latency_ms']:.3f}ms")
+        elif entry.get('proposal', {}).get('status') == 'exists':
+            print(f"{Fore.YELLOW}      已有覆盖该查询的索引但未被选用，请检查字段选择性")
+
+    if not report['proposals']:
+        print(f"\n{Fore.GREEN}✓ 没有需要新增的索引")
+        return
+    direction_names = {ASCENDING: 'ASCENDING', DESCENDING: 'DESCENDING'}
+    print(f"\n{Fore.YELLOW}建议的索引（可加入 index_catalog.INDEX_CATALOG）：")
+    for proposal in report['proposals']:
+        keys = ', '.join(f"('{field}', {direction_names[direction]})" for field, direction in proposal['keys'])
+        note = '（已在index_catalog中声明，数据库中尚未创建）' if proposal['declared'] else ''
+        built = f"，创建耗时 {proposal['build_seconds']:.3f}s" if 'build_seconds' in proposal else ''
+        print(f"  '{proposal['collection']}': IndexModel([{keys}]),  # {', '.join(proposal['queries'])}{note}{built}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台索引建议工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python index_advisor.py                          # 分析声明的后端查询形态，只给出建议
+  python index_advisor.py --apply                  # 创建建议的索引并对比前后延迟（请在导入的测试库上运行）
+  python index_advisor.py --shapes profiler        # 分析system.profile中捕获的查询
+  python index_advisor.py --max-ratio 5 --repeat 20 --output advisor.json
+        """
+    )
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--shapes', choices=['declared', 'profiler', 'all'], default='declared',
+                        help='查询来源：declared为声明的后端查询，profiler为system.profile中捕获的查询 (默认: declared)')
+    parser.add_argument('--profile-limit', type=int, default=DEFAULT_PROFILE_LIMIT,
+                        help=f'读取system.profile中最近的记录数 (默认: {DEFAULT_PROFILE_LIMIT})')
+    parser.add_argument('--max-ratio', type=float, default=DEFAULT_MAX_RATIO,
+                        help=f'扫描的键/文档数与返回文档数之比超过该值时标记 (默认: {DEFAULT_MAX_RATIO})')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'测量延迟时每个查询的执行次数，取中位数 (默认: {DEFAULT_REPEAT})')
+    parser.add_argument('--apply', action='store_true',
+                        help='创建建议的索引并重新测量')
+    parser.add_argument('--output', metavar='FILE',
+                        help='JSON报告输出文件')
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        db = client[args.database]
+        shapes = []
+        if args.shapes in ('declared', 'all'):
+            shapes.extend(QUERY_SHAPES)
+        if args.shapes in ('profiler', 'all'):
+            shapes.extend(load_profiler_shapes(db, args.profile_limit))
+        if not shapes:
+            print(f"{Fore.YELLOW}system.profile中没有可分析的查询，请先开启profiler")
+            return
+        report = IndexAdvisor(db, args.max_ratio, args.repeat).analyze(shapes, apply=args.apply)
+    except Exception as e:
+        print(f"{Fore.RED}✗ 索引分析失败：{e}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+    print_advisor_report(report)
+    if args.output:
+        write_report(report, args.output)
+        print(f"\n{Fore.GREEN}✓ 报告已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 数据库索引目录
+集中声明各集合的索引，供数据导入脚本统一创建、计时和重建
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from colorama import Fore
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# 各集合的索引声明
+INDEX_CATALOG: Dict[str, List[IndexModel]] = {
+    # 用户集合索引
+    'users': [
+        IndexModel([('email', ASCENDING)], unique=True),
+        IndexModel([('username', ASCENDING)], unique=True),
+        IndexModel([('institution', ASCENDING)]),
+    ],
+    # 机构集合索引
+    'institutions': [
+        IndexModel([('name', ASCENDING)], unique=True),
+        IndexModel([('type', ASCENDING), ('status', ASCENDING)]),
+    ],
+    # 知识库集合索引
+    'knowledgebases': [
+        IndexModel([('author', ASCENDING), ('status', ASCENDING)]),
+        IndexModel([('category', ASCENDING), ('level', ASCENDING), ('isPublic', ASCENDING)]),
+    ],
+    # 知识点集合索引
+    'knowledgepoints': [
+        IndexModel([('knowledgeBaseId', ASCENDING)]),
+        IndexModel([('category', ASCENDING), ('difficulty', ASCENDING)]),
+    ],
+    # 学习路径集合索引
+    'learningpaths': [
+        IndexModel([('knowledgeBase', ASCENDING)]),
+        IndexModel([('difficulty', ASCENDING), ('status', ASCENDING)]),
+    ],
+    # 题目集合索引
+    'questions': [
+        IndexModel([('category.sport', ASCENDING)]),
+        IndexModel([('category.knowledgeType', ASCENDING)]),
+        IndexModel([('difficulty', ASCENDING), ('status', ASCENDING)]),
+    ],
+    # 考试记录集合索引
+    'exams': [
+        # 用户最近完成的考试（推荐服务分析学习情况），也覆盖只按user查询的考试记录
+        IndexModel([('user', ASCENDING), ('status', ASCENDING), ('completedAt', DESCENDING)]),
+        IndexModel([('status', ASCENDING), ('completedAt', DESCENDING)]),
+        IndexModel([('examType', ASCENDING), ('createdAt', DESCENDING)]),
+    ],
+    # 学习进度集合索引
+    'knowledgeprogresses': [
+        IndexModel([('user', ASCENDING), ('knowledgeBase', ASCENDING)]),
+        IndexModel([('user', ASCENDING), ('status', ASCENDING), ('updatedAt', DESCENDING)]),
+        # 学习路径中已完成的知识点（推荐服务估算路径进度）
+        IndexModel([('user', ASCENDING), ('status', ASCENDING), ('knowledgePoint', ASCENDING)]),
+        IndexModel([('knowledgeBase', ASCENDING), ('status', ASCENDING)]),
+    ],
+    # 班级集合索引
+    'classes': [
+        IndexModel([('teacherId', ASCENDING), ('status', ASCENDING)]),
+        IndexModel([('institutionId', ASCENDING), ('grade', ASCENDING)]),
+        IndexModel([('name', ASCENDING)]),
+        IndexModel([('students.userId', ASCENDING)]),
+    ],
+    # 推荐候选题目集合索引（recommendation_candidates.py写入，按_id即用户读取，expiresAt到期后自动删除）
+    'recommendationcandidates': [
+        IndexModel([('expiresAt', ASCENDING)], expireAfterSeconds=0),
+    ],
+    # 题目共错近邻集合索引（question_neighbors.py写入，按题目读取近邻列表）
+    'questionneighbors': [
+        IndexModel([('questionId', ASCENDING)], unique=True),
+        IndexModel([('generatedAt', ASCENDING)]),
+    ],
+    # 统计快照集合索引（stats_snapshots.py写入，按用户和日期范围读取每日汇总）
+    'statsnapshots': [
+        IndexModel([('user', ASCENDING), ('day', DESCENDING)]),
+        IndexModel([('type', ASCENDING), ('day', ASCENDING)]),
+    ],
+    # 排行榜分桶索引（leaderboards.py写入，按起始名次分页、按分数查询名次）
+    'leaderboards': [
+        IndexModel([('board', ASCENDING), ('metric', ASCENDING), ('startRank', ASCENDING)]),
+        IndexModel([('board', ASCENDING), ('metric', ASCENDING), ('minScore', DESCENDING), ('startRank', ASCENDING)]),
+    ],
+}
+
+
+def index_name(model: IndexModel) -> str:
+    """返回索引名称（如 status_1_completedAt_-1）"""
+    return model.document['name']
+
+
+def is_secondary(model: IndexModel) -> bool:
+    """非唯一索引可以在大批量导入前删除、导入后重建"""
+    return not model.document.get('unique', False)
+
+
+def build_indexes(db, collections: Optional[Iterable[str]] = None, workers: int = 4,
+                  timing: bool = False) -> List[Dict[str, Any]]:
+    """
+    按索引目录创建索引，不同集合的索引并行创建
+
+    Args:
+        db: pymongo数据库对象
+        collections: 要创建索引的集合，默认为目录中的全部集合
+        workers: 并行创建索引的最大集合数量
+        timing: 是否逐个创建索引以记录每个索引的耗时
+
+    Returns:
+        List[Dict[str, Any]]: 每个索引的创建结果（集合、索引名、耗时、大小）
+    """
+    names = [name for name in (collections or INDEX_CATALOG) if name in INDEX_CATALOG]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = executor.map(lambda name: _build_collection_indexes(db, name, timing), names)
+        return [entry for entries in results for entry in entries]
+
+
+def _build_collection_indexes(db, collection_name: str, timing: bool) -> List[Dict[str, Any]]:
+    """创建单个集合的索引"""
+    collection = db[collection_name]
+    models = INDEX_CATALOG[collection_name]
+    entries = []
+
+    if timing:
+        # 逐个创建以获得每个索引的耗时
+        for model in models:
+            start = time.perf_counter()
+            collection.create_indexes([model])
+            entries.append({'collection': collection_name, 'index': index_name(model),
+                            'seconds': time.perf_counter() - start})
+    else:
+        # 一次提交全部索引，服务端只需扫描集合一次
+        start = time.perf_counter()
+        collection.create_indexes(models)
+        elapsed = time.perf_counter() - start
+        entries = [{'collection': collection_name, 'index': index_name(model), 'seconds': None}
+                   for model in models]
+        if entries:
+            entries[0]['collection_seconds'] = elapsed
+
+    sizes = _index_sizes(db, collection_name)
+    for entry in entries:
+        entry['size_bytes'] = sizes.get(entry['index'])
+    return entries
+
+
+def _index_sizes(db, collection_name: str) -> Dict[str, int]:
+    """通过collStats读取索引大小"""
+    try:
+        return dict(db.command('collStats', collection_name).get('indexSizes', {}))
+    except Exception:
+        return {}
+
+
+def drop_secondary_indexes(db, collections: Iterable[str]) -> List[str]:
+    """
+    删除目录中声明的非唯一索引，用于大批量导入前减少索引维护开销
+
+    唯一索引仍然保留，以便导入过程中继续约束数据。必须明确给出要导入的集合：
+    目录中还包括离线任务写入的集合（如带TTL索引的recommendationcandidates），导入不会重建它们的索引
+
+    Args:
+        db: pymongo数据库对象
+        collections: 要处理的集合
+
+    Returns:
+        List[str]: 被删除的索引（集合.索引名）
+    """
+    dropped = []
+    for collection_name in collections:
+        collection = db[collection_name]
+        existing = collection.index_information()
+        for model in INDEX_CATALOG.get(collection_name, []):
+            name = index_name(model)
+            if is_secondary(model) and name in existing:
+                collection.drop_index(name)
+                dropped.append(f"{collection_name}.{name}")
+    return dropped
+
+
+def print_index_report(entries: List[Dict[str, Any]]):
+    """输出索引创建耗时及大小"""
+    print(f"\n{Fore.YELLOW}索引创建耗时:")
+    print(f"  {'集合':<22}{'索引':<40}{'耗时(s)':>10}{'大小(KB)':>12}")
+    for entry in entries:
+        seconds = entry['seconds']
+        if seconds is None:
+            seconds = entry.get('collection_seconds')
+        seconds_text = f"{seconds:.3f}" if seconds is not None else '-'
+        size = entry.get('size_bytes')
+        size_text = f"{size / 1024:.1f}" if size is not None else '-'
+        print(f"  {entry['collection']:<22}{entry['index']:<40}{seconds_text:>10}{size_text:>12}")
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 运行指标采集工具
+为导入和导出工具记录各阶段的墙钟时间与CPU时间、各数据库命令的次数与
+延迟分布、读写字节数，可选采集cProfile和tracemalloc数据，输出JSON报告
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from colorama import Fore
+from pymongo import monitoring
+
+# 命令延迟直方图的桶上界（毫秒），最后一个桶收集超过最大上界的命令
+LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000]
+
+# 报告中列出的cProfile函数和tracemalloc分配位置数量
+PROFILE_TOP = 25
+
+# Python 3.12起cProfile基于sys.monitoring实现，同一时刻只能启用一个分析器，
+# 为每个线程单独创建分析器会报 "Another profiling tool is already active"
+PER_THREAD_PROFILING = sys.version_info < (3, 12)
+
+
+def _bucket_label(index: int) -> str:
+    """直方图桶的名称，如 '<=10ms'、'>5000ms'"""
+    if index < len(LATENCY_BUCKETS_MS):
+        return f"<={LATENCY_BUCKETS_MS[index]:g}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]:g}ms"
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    按命令名和集合统计数据库命令的次数、失败次数和延迟分布
+
+    通过 MongoClient(event_listeners=[...]) 注册，在驱动的各个线程中回调
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._targets: Dict[Any, str] = {}
+        self.operations: Dict[str, Dict[str, Any]] = {}
+
+    def started(self, event):
+        # 命令文档中以命令名为键的值即为目标集合（如 {'insert': 'exams', ...}）
+        target = event.command.get(event.command_name)
+        name = f"{event.command_name}.{target}" if isinstance(target, str) else event.command_name
+        with self._lock:
+            self._targets[(event.connection_id, event.request_id)] = name
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed: bool):
+        elapsed_ms = event.duration_micros / 1000
+        bucket = len(LATENCY_BUCKETS_MS)
+        for index, upper in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= upper:
+                bucket = index
+                break
+
+        with self._lock:
+            name = self._targets.pop((event.connection_id, event.request_id), event.command_name)
+            entry = self.operations.get(name)
+            if entry is None:
+                entry = self.operations[name] = {
+                    'count': 0, 'failed': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            entry['count'] += 1
+            entry['failed'] += failed
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['histogram'][bucket] += 1
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """按总耗时降序返回各命令的统计"""
+        with self._lock:
+            items = sorted(self.operations.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+            return {
+                name: {
+                    'count': entry['count'],
+                    'failed': entry['failed'],
+                    'total_ms': round(entry['total_ms'], 3),
+                    'avg_ms': round(entry['total_ms'] / entry['count'], 3),
+                    'max_ms': round(entry['max_ms'], 3),
+                    'histogram': {
+                        _bucket_label(index): count
+                        for index, count in enumerate(entry['histogram']) if count
+                    },
+                }
+                for name, entry in items
+            }
+
+
+class Metrics:
+    """
+    一次运行的指标采集器
+
+    阶段计时按线程维护调用栈：嵌套阶段的耗时同时计入外层阶段的总耗时，
+    self_*字段为扣除嵌套阶段后的自身耗时。例如解析迭代器包在转换迭代器内部时，
+    转换阶段的自身耗时不含解析时间。CPU时间为当前线程的CPU时间。
+    """
+
+    def __init__(self, cprofile_file: Optional[str] = None, trace_memory: bool = False):
+        """
+        Args:
+            cprofile_file: cProfile结果（pstats格式）的输出文件，为None时不采集
+            trace_memory: 是否使用tracemalloc记录内存分配峰值和主要分配位置
+        """
+        self.cprofile_file = cprofile_file
+        self.trace_memory = trace_memory
+        self.command_listener = CommandMetrics()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.bytes = {'read': 0, 'written': 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profilers: List[cProfile.Profile] = []
+        self._started_at: Optional[str] = None
+        self._start_wall = 0.0
+        self._start_cpu = 0.0
+        self._elapsed = None
+        self._profile_report: Optional[Dict[str, Any]] = None
+        self._memory_report: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # 运行开始与结束
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """开始计时，按需开启cProfile和tracemalloc"""
+        self._started_at = datetime.now().isoformat()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.cprofile_file:
+            # cProfile只记录调用enable()的线程，之后启动的线程（如并行导入）各自创建分析器；
+            # Python 3.12及以上只能分析主线程
+            if PER_THREAD_PROFILING:
+                threading.setprofile(self._profile_thread)
+            self._profile_thread()
+
+    def _profile_thread(self, *args):
+        """为当前线程创建并启用cProfile分析器"""
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._profilers.append(profiler)
+        profiler.enable()
+
+    def stop(self):
+        """停止计时和分析器，汇总分析结果"""
+        if self._elapsed is not None:
+            return
+        self._elapsed = (time.perf_counter() - self._start_wall, time.process_time() - self._start_cpu)
+
+        if self._profilers:
+            if PER_THREAD_PROFILING:
+                threading.setprofile(None)
+            # 合并各线程的分析结果
+            stats = pstats.Stats(*self._profilers)
+            directory = os.path.dirname(self.cprofile_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            stats.dump_stats(self.cprofile_file)
+            self._profile_report = {
+                'file': self.cprofile_file,
+                'threads': len(self._profilers),
+                'top_cumulative': self._top_functions(stats),
+            }
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics('lineno')[:PROFILE_TOP]
+            tracemalloc.stop()
+            self._memory_report = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top_allocations': [{
+                    'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size_bytes': stat.size,
+                    'count': stat.count,
+                } for stat in statistics],
+            }
+
+    @staticmethod
+    def _top_functions(stats: pstats.Stats) -> List[Dict[str, Any]]:
+        """按累计耗时取耗时最多的函数"""
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        return [{
+            'function': f"{filename}:{line}({name})",
+            'calls': calls,
+            'total_seconds': round(total, 4),
+            'cumulative_seconds': round(cumulative, 4),
+        } for (filename, line, name), (_, calls, total, cumulative, _) in rows]
+
+    # ------------------------------------------------------------------
+    # 阶段计时
+    # ------------------------------------------------------------------
+
+    def _stack(self) -> List[List[float]]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self):
+        # [开始墙钟时间, 开始CPU时间, 嵌套阶段墙钟时间, 嵌套阶段CPU时间]
+        self._stack().append([time.perf_counter(), time.thread_time(), 0.0, 0.0])
+
+    def _exit(self, name: str):
+        stack = self._stack()
+        start_wall, start_cpu, child_wall, child_cpu = stack.pop()
+        wall = time.perf_counter() - start_wall
+        cpu = time.thread_time() - start_cpu
+        if stack:
+            stack[-1][2] += wall
+            stack[-1][3] += cpu
+
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {
+                    'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                    'self_wall_seconds': 0.0, 'self_cpu_seconds': 0.0,
+                }
+            entry['calls'] += 1
+            entry['wall_seconds'] += wall
+            entry['cpu_seconds'] += cpu
+            entry['self_wall_seconds'] += wall - child_wall
+            entry['self_cpu_seconds'] += cpu - child_cpu
+
+    @contextmanager
+    def stage(self, name: str):
+        """记录代码块的耗时"""
+        self._enter()
+        try:
+            yield
+        finally:
+            self._exit(name)
+
+    def timed_iter(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """
+        包装迭代器，只记录获取每个元素的耗时（不含调用方处理元素的时间）
+
+        Args:
+            name: 阶段名称
+            iterable: 被包装的可迭代对象
+        """
+        iterator = iter(iterable)
+        while True:
+            self._enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit(name)
+            yield item
+
+    def timed_call(self, name: str, func: Callable) -> Callable:
+        """包装函数，记录每次调用的耗时"""
+        def wrapper(*args, **kwargs):
+            self._enter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit(name)
+        return wrapper
+
+    # ------------------------------------------------------------------
+    # 计数
+    # ------------------------------------------------------------------
+
+    def count(self, name: str, value: int = 1):
+        """累加计数器（如处理的文档数量）"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_bytes(self, direction: str, size: int):
+        """累加读取（read）或写入（written）的字节数"""
+        with self._lock:
+            self.bytes[direction] += size
+
+    # ------------------------------------------------------------------
+    # 报告
+    # ------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """生成指标报告，运行尚未结束时报告截至当前的数据"""
+        if self._elapsed is not None:
+            wall, cpu = self._elapsed
+        else:
+            wall, cpu = time.perf_counter() - self._start_wall, time.process_time() - self._start_cpu
+
+        with self._lock:
+            stages = {
+                name: {key: round(value, 4) if isinstance(value, float) else value for key, value in entry.items()}
+                for name, entry in sorted(self.stages.items())
+            }
+            report = {
+                'started_at': self._started_at,
+                'generated_at': datetime.now().isoformat(),
+                'wall_seconds': round(wall, 3),
+                'cpu_seconds': round(cpu, 3),
+                'stages': stages,
+                'operations': self.command_listener.report(),
+                'counters': dict(self.counters),
+                'bytes': dict(self.bytes),
+            }
+        if self._profile_report:
+            report['cprofile'] = self._profile_report
+        if self._memory_report:
+            report['tracemalloc'] = self._memory_report
+        return report
+
+    def write(self, output_file: str) -> Dict[str, Any]:
+        """将指标报告写入JSON文件并返回报告"""
+        report = self.report()
+        directory = os.path.dirname(output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+def print_metrics_summary(report: Dict[str, Any], limit: int = 10):
+    """输出耗时最多的阶段和数据库命令"""
+    print(f"\n{Fore.YELLOW}运行指标:")
+    print(f"  - 总耗时: {report['wall_seconds']:.3f}s (CPU {report['cpu_seconds']:.3f}s)")
+    print(f"  - 读取: {report['bytes']['read'] / 1048576:.2f} MB, "
+          f"写入: {report['bytes']['written'] / 1048576:.2f} MB")
+
+    stages = sorted(report['stages'].items(), key=lambda item: item[1]['self_wall_seconds'], reverse=True)
+    if stages:
+        print(f"  {Fore.CYAN}{'阶段':<36} {'次数':>10} {'自身耗时':>10} {'总耗时':>10} {'CPU':>10}")
+        for name, entry in stages[:limit]:
+            print(f"  {name:<38} {entry['calls']:>12} {entry['self_wall_seconds']:>13.3f}s "
+                  f"{entry['wall_seconds']:>12.3f}s {entry['cpu_seconds']:>9.3f}s")
+
+    operations = list(report['operations'].items())
+    if operations:
+        print(f"  {Fore.CYAN}{'数据库命令':<34} {'次数':>10} {'平均':>10} {'最大':>10}")
+        for name, entry in operations[:limit]:
+            print(f"  {name:<38} {entry['count']:>12} {entry['avg_ms']:>10.2f}ms {entry['max_ms']:>10.2f}ms")
+
+
+def finish_metrics(metrics: Metrics, output_file: Optional[str] = None) -> Dict[str, Any]:
+    """结束采集，输出摘要，指定output_file时写入JSON报告"""
+    metrics.stop()
+    report = metrics.write(output_file) if output_file else metrics.report()
+    print_metrics_summary(report)
+    if output_file:
+        print(f"  - 指标报告: {output_file}")
+    if metrics.cprofile_file:
+        print(f"  - cProfile: {metrics.cprofile_file}（python -m pstats {metrics.cprofile_file}）")
+    if 'tracemalloc' in report:
+        print(f"  - 内存分配峰值: {report['tracemalloc']['peak_bytes'] / 1048576:.2f} MB")
+    return report
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 引用完整性检查工具
+每个被引用集合的_id只加载一次，外键检查全部在内存中完成，
+输出可供程序处理的悬空引用报告
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from colorama import Fore, init
+from pymongo import MongoClient
+
+from objectid_fields import parse_field_path, to_object_id
+
+init(autoreset=True)
+
+# 各集合的外键声明：(字段路径, 被引用集合)，路径语法与objectid_fields相同
+FOREIGN_KEYS: Dict[str, List[Tuple[str, str]]] = {
+    'users': [('institution', 'institutions')],
+    'classes': [
+        ('institutionId', 'institutions'),
+        ('teacherId', 'users'),
+        ('students[].userId', 'users'),
+    ],
+    'knowledgepoints': [('knowledgeBaseId', 'knowledgebases')],
+    'learningpaths': [
+        ('knowledgeBase', 'knowledgebases'),
+        ('knowledgePoints[].pointId', 'knowledgepoints'),
+    ],
+    'exams': [
+        ('user', 'users'),
+        ('answers[].questionId', 'questions'),
+    ],
+    'knowledgeprogresses': [
+        ('user', 'users'),
+        ('knowledgeBase', 'knowledgebases'),
+        ('knowledgePoint', 'knowledgepoints'),
+    ],
+}
+
+# 加载_id和外键字段时每批返回的文档数量
+CURSOR_BATCH_SIZE = 10000
+
+# 报告中每项检查最多列出的悬空引用数量
+DEFAULT_SAMPLE_LIMIT = 100
+
+
+def iter_path_values(doc: Dict[str, Any], segments: List[str]) -> Iterator[Any]:
+    """
+    按字段路径取出文档中的全部值，缺失或为null的值会被跳过
+
+    Args:
+        doc: 文档
+        segments: parse_field_path返回的路径片段
+    """
+    value: Any = doc
+    for i, segment in enumerate(segments):
+        if value.__class__ is not dict:
+            return
+        is_array = segment.endswith('[]')
+        value = value.get(segment[:-2] if is_array else segment)
+        if value is None:
+            return
+        if is_array:
+            if value.__class__ is not list:
+                return
+            rest = segments[i + 1:]
+            for item in value:
+                if rest:
+                    yield from iter_path_values(item, rest)
+                elif item is not None:
+                    yield item
+            return
+    yield value
+
+
+def normalize_id(value: Any) -> Any:
+    """将字符串形式的ObjectId转换为ObjectId，便于与_id集合比较"""
+    return to_object_id(value) if value.__class__ is str else value
+
+
+def load_id_set(db, collection_name: str) -> Set[Any]:
+    """通过只返回_id的游标加载集合的全部_id"""
+    cursor = db[collection_name].find({}, {'_id': 1}).batch_size(CURSOR_BATCH_SIZE)
+    return {doc['_id'] for doc in cursor}
+
+
+def new_reference_checks(collection_name: str, id_sets: Dict[str, Set[Any]]) -> List[Dict[str, Any]]:
+    """为集合的每个外键创建一条空的检查结果"""
+    return [{
+        'collection': collection_name,
+        'field': path,
+        'references': target,
+        'segments': parse_field_path(path),
+        'ids': id_sets[target],
+        'checked': 0,
+        'dangling_count': 0,
+        'dangling': [],
+    } for path, target in FOREIGN_KEYS.get(collection_name, [])]
+
+
+def check_document(doc: Dict[str, Any], checks: List[Dict[str, Any]], sample_limit: int = DEFAULT_SAMPLE_LIMIT):
+    """检查单个文档的外键，结果累加到checks中"""
+    for check in checks:
+        ids = check['ids']
+        for value in iter_path_values(doc, check['segments']):
+            check['checked'] += 1
+            if value in ids or normalize_id(value) in ids:
+                continue
+            check['dangling_count'] += 1
+            if len(check['dangling']) < sample_limit:
+                check['dangling'].append({'_id': str(doc.get('_id')), 'value': str(value)})
+
+
+def finish_reference_checks(checks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """移除检查过程中使用的内部字段，返回可序列化的检查结果"""
+    for check in checks:
+        del check['segments'], check['ids']
+    return checks
+
+
+def check_references(docs: Iterable[Dict[str, Any]], collection_name: str,
+                     id_sets: Dict[str, Set[Any]], sample_limit: int = DEFAULT_SAMPLE_LIMIT) -> List[Dict[str, Any]]:
+    """
+    在内存中检查一个集合的全部外键
+
+    Args:
+        docs: 集合中的文档（至少包含_id和外键字段）
+        collection_name: 集合名称
+        id_sets: 被引用集合名称 → _id集合
+        sample_limit: 每项检查最多记录的悬空引用数量
+
+    Returns:
+        List[Dict[str, Any]]: 每个外键一条检查结果
+    """
+    checks = new_reference_checks(collection_name, id_sets)
+    for doc in docs:
+        check_document(doc, checks, sample_limit)
+    return finish_reference_checks(checks)
+
+
+def _projection(collection_name: str) -> Dict[str, int]:
+    """只返回外键所在的顶层字段"""
+    projection = {}
+    for path, _ in FOREIGN_KEYS[collection_name]:
+        field = parse_field_path(path)[0]
+        projection[field[:-2] if field.endswith('[]') else field] = 1
+    return projection
+
+
+def verify_integrity(db, collections: Iterable[str] = None, workers: int = 4,
+                     sample_limit: int = DEFAULT_SAMPLE_LIMIT) -> Dict[str, Any]:
+    """
+    检查数据库中的引用完整性
+
+    先并行加载所有被引用集合的_id，再并行扫描各引用集合，
+    每个集合只读取一次且只返回外键字段。
+
+    Args:
+        db: pymongo数据库对象
+        collections: 要检查的引用集合，默认为FOREIGN_KEYS中的全部集合
+        workers: 并行读取的最大集合数量
+        sample_limit: 每项检查最多记录的悬空引用数量
+
+    Returns:
+        Dict[str, Any]: 检查报告
+    """
+    start = time.perf_counter()
+    names = [name for name in (collections or FOREIGN_KEYS) if name in FOREIGN_KEYS]
+    targets = sorted({target for name in names for _, target in FOREIGN_KEYS[name]})
+
+    def scan(collection_name):
+        cursor = db[collection_name].find({}, _projection(collection_name)).batch_size(CURSOR_BATCH_SIZE)
+        return check_references(cursor, collection_name, id_sets, sample_limit)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        id_sets = dict(zip(targets, executor.map(lambda name: load_id_set(db, name), targets)))
+        checks = [check for results in executor.map(scan, names) for check in results]
+
+    return {
+        'database': db.name,
+        'generated_at': datetime.now().isoformat(),
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+        'loaded_ids': {name: len(ids) for name, ids in id_sets.items()},
+        'total_dangling': sum(check['dangling_count'] for check in checks),
+        'checks': checks,
+    }
+
+
+def print_integrity_report(report: Dict[str, Any]):
+    """输出引用完整性检查结果"""
+    print(f"\n{Fore.YELLOW}验证数据关联关系:")
+    for check in report['checks']:
+        name = f"{check['collection']}.{check['field']} → {check['references']}"
+        if check.get('file'):
+            name = f"{check['file']}: {name}"
+        if check['dangling_count']:
+            samples = ', '.join(item['value'] for item in check['dangling'][:5])
+            print(f"  {Fore.RED}✗ {name}: {check['dangling_count']}/{check['checked']} 个悬空引用 ({samples})")
+        else:
+            print(f"  {Fore.GREEN}✓ {name}: {check['checked']} 个引用")
+    print(f"  - 耗时: {report['elapsed_seconds']:.3f}s")
+
+
+def write_report(report: Dict[str, Any], output_file: str):
+    """将检查报告写入JSON文件"""
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台引用完整性检查工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python integrity_check.py                                  # 检查全部外键
+  python integrity_check.py --output integrity_report.json   # 输出JSON报告
+  python integrity_check.py --collections exams classes      # 只检查指定集合
+        """
+    )
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--collections', nargs='+', choices=list(FOREIGN_KEYS),
+                        help='要检查的引用集合 (默认: 全部)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='并行读取的最大集合数量 (默认: 4)')
+    parser.add_argument('--sample-limit', type=int, default=DEFAULT_SAMPLE_LIMIT,
+                        help=f'每项检查最多列出的悬空引用数量 (默认: {DEFAULT_SAMPLE_LIMIT})')
+    parser.add_argument('--output', default=None,
+                        help='JSON报告输出文件')
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        report = verify_integrity(client[args.database], args.collections, args.workers, args.sample_limit)
+    except Exception as e:
+        print(f"{Fore.RED}✗ 引用完整性检查失败：{e}")
+        sys.exit(2)
+    finally:
+        client.close()
+
+    print_integrity_report(report)
+    if args.output:
+        write_report(report, args.output)
+        print(f"\n{Fore.GREEN}✓ 报告已写入 {args.output}")
+    sys.exit(1 if report['total_dangling'] else 0)
+
+
+if __name__ == '__main__':
+    main()
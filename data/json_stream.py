@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 流式JSON读取工具
+逐条读取顶层JSON数组或NDJSON（每行一个JSON对象）文件中的文档，
+支持gzip/zstd压缩文件和原始BSON文件，内存占用与文件大小无关
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from bson import ObjectId, decode_file_iter, json_util
+from bson.codec_options import CodecOptions
+from bson.errors import InvalidBSON
+from bson.raw_bson import RawBSONDocument
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 每次从文件读取的字符数
+CHUNK_SIZE = 1 << 16
+
+# 分片导出清单文件的后缀（见 data_exporter.py --partitions）
+MANIFEST_SUFFIX = '.manifest.json'
+
+# 查找数据文件时依次尝试的后缀
+DATA_FILE_SUFFIXES = ['.json', '.json.gz', '.ndjson', '.ndjson.gz', '.ndjson.zst', '.bson', MANIFEST_SUFFIX]
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# 解析错误位于缓冲区末尾这么多字符以内时视为值被截断（如 "tru"、"-Infinit"、"1.5e"）
+_TRUNCATION_WINDOW = 16
+
+# 由多个键组成的扩展JSON类型（如 {"$regex": ..., "$options": ...}）
+_MULTI_KEY_TYPES = frozenset(['$ref', '$regex', '$binary', '$code'])
+
+
+def _object_hook(dct: Dict[str, Any]) -> Any:
+    """
+    还原扩展JSON类型
+
+    导出和生成的数据中最常见的 {"$oid": ...} 和ISO格式的 {"$date": ...}
+    直接转换（json_util基于strptime解析日期，大文件中开销明显），
+    其他扩展JSON类型仍交给json_util处理。
+    """
+    if len(dct) != 1:
+        return dct if _MULTI_KEY_TYPES.isdisjoint(dct) else json_util.object_hook(dct)
+    key, value = next(iter(dct.items()))
+    if key == '$oid':
+        return ObjectId(value)
+    if key == '$date' and value.__class__ is str:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return json_util.object_hook(dct)
+        # 与json_util的默认行为一致：返回不带时区的UTC时间
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    if key.startswith('$'):
+        return json_util.object_hook(dct)
+    return dct
+
+
+def open_text(file_path: str) -> TextIO:
+    """以UTF-8文本方式打开文件，.gz和.zst文件自动解压"""
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, 'rt', encoding='utf-8-sig')
+    if file_path.endswith('.zst'):
+        if zstandard is None:
+            raise ValueError(f"读取 {file_path} 需要安装zstandard：pip install zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8-sig')
+    return open(file_path, 'r', encoding='utf-8-sig')
+
+
+def resolve_data_file(file_path: str) -> Optional[str]:
+    """
+    查找数据文件的实际路径
+
+    同名的.json、.json.gz、.ndjson、.ndjson.gz、.ndjson.zst、.bson文件以及
+    分片清单.manifest.json均可作为数据来源，按此顺序返回第一个存在的文件
+
+    Args:
+        file_path: 配置中的文件路径（如 questions.json）
+
+    Returns:
+        Optional[str]: 存在的文件路径，均不存在时返回None
+    """
+    if os.path.exists(file_path):
+        return file_path
+
+    stem = file_path
+    for suffix in sorted(DATA_FILE_SUFFIXES, key=len, reverse=True):
+        if stem.endswith(suffix):
+            stem = stem[:-len(suffix)]
+            break
+
+    for suffix in DATA_FILE_SUFFIXES:
+        candidate = stem + suffix
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def data_file_size(file_path: str) -> int:
+    """数据文件在磁盘上的字节数，分片清单计入清单本身及全部分片文件"""
+    size = os.path.getsize(file_path)
+    if file_path.endswith(MANIFEST_SUFFIX):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        base_dir = os.path.dirname(file_path)
+        for shard in manifest.get('shards', []):
+            size += data_file_size(os.path.join(base_dir, shard['file']))
+    return size
+
+
+def iter_json_documents(file_path: str, chunk_size: int = CHUNK_SIZE, skip: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取JSON文档
+
+    文件首个非空字符为 '[' 时按顶层JSON数组解析，否则按以空白分隔的
+    JSON对象序列（NDJSON）解析，NDJSON中的MongoDB扩展JSON（如 {"$oid": ...}、
+    {"$date": ...}）会还原为对应的BSON类型。.bson文件按原始BSON读取，
+    分片清单文件按分片序号依次读取各分片。
+
+    Args:
+        file_path: 数据文件路径
+        chunk_size: 每次读取的字符数
+        skip: 跳过开头的文档数量（用于断点续传）。跳过的文档不做类型还原，
+            .bson文件按长度前缀直接定位，分片清单中文档数已知的整个分片不会被打开
+
+    Yields:
+        Dict[str, Any]: 单个文档
+
+    Raises:
+        ValueError: JSON格式错误或元素不是JSON对象
+    """
+    if file_path.endswith(MANIFEST_SUFFIX):
+        yield from iter_manifest_documents(file_path, chunk_size, skip)
+        return
+    if file_path.endswith('.bson'):
+        yield from iter_bson_documents(file_path, skip)
+        return
+
+    with open_text(file_path) as f:
+        yield from _iter_values(f, chunk_size, skip)
+
+
+def iter_bson_documents(file_path: str, skip: int = 0) -> Iterator[RawBSONDocument]:
+    """
+    逐条读取mongodump格式的原始BSON文件
+
+    返回RawBSONDocument，字段在首次访问时才解码，可直接交给pymongo写入
+
+    Args:
+        file_path: .bson文件路径
+        skip: 跳过开头的文档数量，按每个文档的长度前缀直接定位
+
+    Yields:
+        RawBSONDocument: 单个文档
+    """
+    codec_options = CodecOptions(document_class=RawBSONDocument)
+    with open(file_path, 'rb') as f:
+        for _ in range(skip):
+            header = f.read(4)
+            if len(header) < 4:
+                return
+            f.seek(int.from_bytes(header, 'little') - 4, io.SEEK_CUR)
+        try:
+            yield from decode_file_iter(f, codec_options)
+        except InvalidBSON as e:
+            raise ValueError(f"BSON格式错误：{e}") from e
+
+
+def iter_manifest_documents(manifest_path: str, chunk_size: int = CHUNK_SIZE,
+                            skip: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    按分片序号依次读取分片导出的全部文档
+
+    Args:
+        manifest_path: 分片清单文件路径，分片文件与清单位于同一目录
+        chunk_size: 每次读取的字符数
+        skip: 跳过开头的文档数量，文档数不超过剩余跳过数量的分片整体跳过
+
+    Yields:
+        Dict[str, Any]: 单个文档
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(manifest_path)
+    for shard in sorted(manifest.get('shards', []), key=lambda shard: shard['index']):
+        documents = shard.get('documents')
+        if documents is not None and skip >= documents:
+            skip -= documents
+            continue
+        yield from iter_json_documents(os.path.join(base_dir, shard['file']), chunk_size, skip)
+        skip = 0
+
+
+def _iter_values(f: TextIO, chunk_size: int, skip: int = 0) -> Iterator[Dict[str, Any]]:
+    """从文本流中增量解析JSON对象，开头的skip个对象只做语法解析后丢弃"""
+    buffer = f.read(chunk_size)
+    eof = not buffer
+    pos = _WHITESPACE.match(buffer, 0).end()
+
+    is_array = buffer[pos:pos + 1] == '['
+    if is_array:
+        pos += 1
+        decoder = json.JSONDecoder()
+    else:
+        # 导出工具以扩展JSON格式写入NDJSON，读取时还原ObjectId、日期等类型
+        decoder = json.JSONDecoder(object_hook=_object_hook)
+    # 跳过的文档无需还原扩展JSON类型
+    decode = json.JSONDecoder().raw_decode if skip else decoder.raw_decode
+
+    # 数组模式下，上一个元素之后必须出现 ',' 或 ']'
+    expect_separator = False
+    index = 0
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+
+        if pos >= len(buffer):
+            if eof:
+                if is_array:
+                    raise ValueError("JSON数组未正常结束，缺少 ']'")
+                return
+            buffer, pos, eof = _read_more(f, buffer, pos, chunk_size)
+            continue
+
+        char = buffer[pos]
+        if is_array:
+            if char == ']':
+                if index and not expect_separator:
+                    raise ValueError(f"第{index}个元素之后的 ',' 后缺少元素")
+                _check_trailing(f, buffer, pos + 1, eof, chunk_size)
+                return
+            if expect_separator:
+                if char != ',':
+                    raise ValueError(f"第{index}个元素之后缺少 ','")
+                pos += 1
+                expect_separator = False
+                continue
+
+        try:
+            value, end = decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof or not _is_truncated(e, buffer):
+                raise ValueError(f"第{index + 1}个元素JSON格式错误：{e}") from e
+            buffer, pos, eof = _read_more(f, buffer, pos, max(chunk_size, len(buffer)))
+            continue
+
+        # 解析恰好止于缓冲区末尾时，值可能被截断（如数字），需读取更多内容后重试
+        if end == len(buffer) and not eof:
+            buffer, pos, eof = _read_more(f, buffer, pos, chunk_size)
+            continue
+
+        index += 1
+        if not isinstance(value, dict):
+            raise ValueError(f"第{index}个元素不是JSON对象")
+
+        pos = end
+        expect_separator = is_array
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+        if index <= skip:
+            if index == skip:
+                decode = decoder.raw_decode
+            continue
+        yield value
+
+
+def _is_truncated(error: json.JSONDecodeError, buffer: str) -> bool:
+    """
+    解析错误是否可能只是因为缓冲区截断了当前元素
+
+    未闭合的字符串一直延伸到缓冲区末尾（错误位置是字符串开头），其他截断的值错误位置都在末尾附近；
+    除此之外的错误读取更多内容也无法修复，立即报错，避免把文件剩余部分全部读入内存
+    """
+    return error.msg.startswith('Unterminated string') or error.pos >= len(buffer) - _TRUNCATION_WINDOW
+
+
+def _check_trailing(f: TextIO, buffer: str, pos: int, eof: bool, chunk_size: int):
+    """顶层JSON数组结束后只允许出现空白字符"""
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos < len(buffer):
+            raise ValueError(f"JSON数组结束后存在多余内容：{buffer[pos:pos + 20]!r}")
+        if eof:
+            return
+        buffer, pos, eof = _read_more(f, buffer, pos, chunk_size)
+
+
+def _read_more(f: TextIO, buffer: str, pos: int, size: int):
+    """丢弃已解析部分并追加读取新内容"""
+    chunk = f.read(size)
+    return buffer[pos:] + chunk, 0, not chunk
@@ -0,0 +1,646 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 排行榜预计算
+由已完成考试的成绩维护全站、机构和班级排行榜。每个榜单按名次存为若干分桶，
+每个分桶保存一段有序的用户和分数数组，按名次分页或查询单个用户的名次都只需一次索引查找。
+每次运行只处理水位线之后完成的考试，只重写内容发生变化的分桶
+"""
+
+import argparse
+import os
+import sys
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from bson import ObjectId
+from colorama import Fore, init
+from pymongo import DeleteMany, MongoClient, ReplaceOne, UpdateOne
+from tqdm import tqdm
+
+from index_catalog import build_indexes
+from integrity_check import normalize_id, write_report
+from json_stream import iter_json_documents, resolve_data_file
+from stats_snapshots import date_range_query, to_utc
+
+init(autoreset=True)
+
+LEADERBOARDS_COLLECTION = 'leaderboards'
+LEADERBOARD_USERS_COLLECTION = 'leaderboardusers'
+
+# 记录水位线的文档_id（与分桶存放在同一集合，没有board字段）
+STATE_ID = 'watermarks'
+
+# 排名指标，对应getLeaderboard的排序类型（积分不由考试产生，以累计考试得分代替）
+METRICS = ['totalScore', 'accuracy', 'totalQuestions', 'totalTime']
+
+# 答题数少于该值的用户不参与正确率排名，避免只答过几道题的用户排在前面
+DEFAULT_MIN_ANSWERS = 20
+
+# 每个分桶的用户数；增量更新后超过两倍时拆分
+DEFAULT_BUCKET_SIZE = 500
+
+# 完成时间晚于 当前时间-lag 的考试留到下一次运行，避免漏掉正在写入的考试
+DEFAULT_LAG_SECONDS = 60
+
+WRITE_BATCH_SIZE = 1000
+QUERY_BATCH_SIZE = 1000
+
+# 数据来源：数据文件名（--data-dir，第一个之外的文件不存在时跳过）、集合名称、查询条件和投影
+SOURCES = {
+    'exams': (['exams.json'], 'exams', {'status': 'completed'}, {
+        'user': 1, 'status': 1, 'completedAt': 1, 'result.score': 1, 'result.totalTime': 1, 'answers.isCorrect': 1,
+    }),
+    'users': (['users.json', 'additional_students.json'], 'users', {}, {'isActive': 1, 'institution': 1}),
+    'classes': (['classes.json'], 'classes', {}, {'students.userId': 1}),
+}
+
+
+def iter_source(name: str, db=None, data_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """从数据库集合（只返回需要的字段）或数据目录中的数据文件逐条读取文档"""
+    file_names, collection, query, projection = SOURCES[name]
+    if not data_dir:
+        yield from db[collection].find(query, projection).batch_size(10000)
+        return
+    for i, file_name in enumerate(file_names):
+        resolved_path = resolve_data_file(os.path.join(data_dir, file_name))
+        if not resolved_path:
+            if i == 0:
+                raise ValueError(f"文件不存在：{os.path.join(data_dir, file_name)}")
+            continue
+        yield from iter_json_documents(resolved_path)
+
+
+def empty_totals() -> Dict[str, Any]:
+    return {'exams': 0, 'totalScore': 0.0, 'answers': 0, 'correctAnswers': 0, 'totalTime': 0}
+
+
+def add_exam(totals: Dict[str, Any], exam: Dict[str, Any]):
+    """将一次已完成考试的成绩累加到用户的合计中"""
+    result = exam.get('result') or {}
+    answers = exam.get('answers') or ()
+    totals['exams'] += 1
+    if isinstance(result.get('score'), (int, float)):
+        totals['totalScore'] += result['score']
+    if isinstance(result.get('totalTime'), (int, float)):
+        totals['totalTime'] += result['totalTime']
+    totals['answers'] += len(answers)
+    totals['correctAnswers'] += sum(answer.get('isCorrect') is True for answer in answers)
+
+
+def metric_scores(totals: Dict[str, Any], min_answers: int) -> Dict[str, Optional[float]]:
+    """由合计计算各排名指标，不参与该指标排名时为None"""
+    answers = totals['answers']
+    return {
+        'totalScore': round(float(totals['totalScore']), 2),
+        'accuracy': round(totals['correctAnswers'] / answers * 100, 2) if answers and answers >= min_answers else None,
+        'totalQuestions': float(answers),
+        'totalTime': float(totals['totalTime']),
+    }
+
+
+def user_boards(user: Optional[Dict[str, Any]], classes: Iterable[Any]) -> List[str]:
+    """用户所在的榜单：全站、所属机构和所在班级；已停用或不存在的用户不上榜"""
+    if user is None or user.get('isActive', True) is False:
+        return []
+    boards = ['global']
+    if user.get('institution') is not None:
+        boards.append(f"institution:{normalize_id(user['institution'])}")
+    boards.extend(f'class:{class_id}' for class_id in sorted(set(map(str, classes))))
+    return boards
+
+
+class RankedBoard:
+    """
+    单个榜单的一个指标：按分数降序排列的用户和分数数组
+
+    数组由集合中的分桶拼接而成，每个元素记录所在分桶。更新时删除变化的用户，
+    再按新分数二分插入，新元素归入前一个元素所在的分桶；只有内容变化的分桶需要重写，
+    其余分桶最多更新起始名次
+    """
+
+    def __init__(self, board: str, metric: str, bucket_size: int = DEFAULT_BUCKET_SIZE):
+        self.board = board
+        self.metric = metric
+        self.bucket_size = max(1, bucket_size)
+        self.users = np.empty(0, dtype=object)
+        self.scores = np.empty(0, dtype=np.float64)
+        self.bucket = np.empty(0, dtype=np.int64)
+        self.buckets: List[Dict[str, Any]] = []
+
+    @classmethod
+    def load(cls, collection, board: str, metric: str, bucket_size: int = DEFAULT_BUCKET_SIZE) -> 'RankedBoard':
+        """读取榜单现有的全部分桶"""
+        ranked = cls(board, metric, bucket_size)
+        ranked.buckets = list(collection.find(
+            {'board': board, 'metric': metric}, {'startRank': 1, 'users': 1, 'scores': 1}
+        ).sort('startRank', 1))
+        users = [user for bucket in ranked.buckets for user in bucket['users']]
+        ranked.users = np.empty(len(users), dtype=object)
+        ranked.users[:] = users
+        ranked.scores = np.fromiter((score for bucket in ranked.buckets for score in bucket['scores']),
+                                    dtype=np.float64, count=len(users))
+        ranked.bucket = np.repeat(np.arange(len(ranked.buckets)), [len(b['users']) for b in ranked.buckets])
+        return ranked
+
+    def apply(self, changes: Dict[Any, Optional[float]], replace: bool = False):
+        """
+        更新用户的分数
+
+        Args:
+            changes: 用户 → 新分数，None表示移出榜单
+            replace: 移出changes之外的全部用户（全量重建）
+        """
+        if replace:
+            keep = np.zeros(len(self.users), dtype=bool)
+        else:
+            keep = np.fromiter((user not in changes for user in self.users), dtype=bool, count=len(self.users))
+        users, scores, bucket = self.users[keep], self.scores[keep], self.bucket[keep]
+
+        entries = sorted(((score, user) for user, score in changes.items() if score is not None),
+                         key=lambda entry: -entry[0])
+        if entries:
+            new_scores = np.array([score for score, _ in entries], dtype=np.float64)
+            new_users = np.empty(len(entries), dtype=object)
+            new_users[:] = [user for _, user in entries]
+            # 分数相同时排在已有用户之后
+            positions = np.searchsorted(-scores, -new_scores, side='right')
+            if len(bucket):
+                new_bucket = bucket[np.maximum(positions - 1, 0)]
+            else:
+                new_bucket = np.full(len(entries), -1, dtype=np.int64)
+            users = np.insert(users, positions, new_users)
+            scores = np.insert(scores, positions, new_scores)
+            bucket = np.insert(bucket, positions, new_bucket)
+        self.users, self.scores, self.bucket = users, scores, bucket
+
+    def operations(self, now: datetime) -> Tuple[List[Any], Dict[str, int]]:
+        """生成写入分桶的bulk_write操作，以及重写、仅更新名次和删除的分桶数"""
+        operations: List[Any] = []
+        counts = {'written': 0, 'shifted': 0, 'deleted': 0}
+        used: Set[int] = set()
+        size = len(self.users)
+        starts = np.flatnonzero(np.r_[True, self.bucket[1:] != self.bucket[:-1]]) if size else np.empty(0, int)
+        ends = np.r_[starts[1:], size].astype(np.int64)
+
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            index = int(self.bucket[start])
+            if index >= 0 and end - start <= 2 * self.bucket_size:
+                chunks = [(start, end)]
+            else:
+                chunks = [(i, min(i + self.bucket_size, end)) for i in range(start, end, self.bucket_size)]
+            for k, (chunk_start, chunk_end) in enumerate(chunks):
+                old = self.buckets[index] if index >= 0 and k == 0 else None
+                users = self.users[chunk_start:chunk_end].tolist()
+                scores = self.scores[chunk_start:chunk_end].tolist()
+                start_rank = chunk_start + 1
+                if old is not None:
+                    used.add(index)
+                    if old['users'] == users and old['scores'] == scores:
+                        if old['startRank'] != start_rank:
+                            operations.append(UpdateOne({'_id': old['_id']}, {'$set': {'startRank': start_rank}}))
+                            counts['shifted'] += 1
+                        continue
+                bucket_id = old['_id'] if old is not None else ObjectId()
+                operations.append(ReplaceOne({'_id': bucket_id}, {
+                    '_id': bucket_id,
+                    'board': self.board,
+                    'metric': self.metric,
+                    'startRank': start_rank,
+                    'count': len(users),
+                    'maxScore': scores[0],
+                    'minScore': scores[-1],
+                    'users': users,
+                    'scores': scores,
+                    'updatedAt': now,
+                }, upsert=True))
+                counts['written'] += 1
+
+        removed = [bucket['_id'] for i, bucket in enumerate(self.buckets) if i not in used]
+        if removed:
+            operations.append(DeleteMany({'_id': {'$in': removed}}))
+            counts['deleted'] = len(removed)
+        return operations, counts
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        return [{'user': str(user), 'score': score}
+                for user, score in zip(self.users[:limit].tolist(), self.scores[:limit].tolist())]
+
+
+def rank_of_score(db, board: str, metric: str, score: float) -> Optional[int]:
+    """
+    分数在榜单中的名次（并列时名次相同）
+
+    分桶的minScore随起始名次单调不增，第一个minScore不高于该分数的分桶内必然包含
+    排在该分数之后的第一个用户，名次为该分桶起始名次加上桶内更高分数的个数
+    """
+    bucket = db[LEADERBOARDS_COLLECTION].find_one(
+        {'board': board, 'metric': metric, 'minScore': {'$lte': score}},
+        {'startRank': 1, 'scores': 1},
+        sort=[('minScore', -1), ('startRank', 1)],
+    )
+    if bucket is None:
+        return None
+    return bucket['startRank'] + bisect_left([-value for value in bucket['scores']], -score)
+
+
+def get_user_rank(db, board: str, metric: str, user: Any) -> Optional[Dict[str, Any]]:
+    """
+    用户在榜单中的名次
+
+    Returns:
+        Optional[Dict[str, Any]]: {rank, score, total}，用户不在该榜单时返回None
+    """
+    doc = db[LEADERBOARD_USERS_COLLECTION].find_one({'_id': normalize_id(user)}, {'boards': 1, 'scores': 1})
+    if doc is None or board not in doc.get('boards', []) or doc['scores'].get(metric) is None:
+        return None
+    score = doc['scores'][metric]
+    last = db[LEADERBOARDS_COLLECTION].find_one({'board': board, 'metric': metric},
+                                               {'startRank': 1, 'count': 1}, sort=[('startRank', -1)])
+    return {
+        'rank': rank_of_score(db, board, metric, score),
+        'score': score,
+        'total': last['startRank'] + last['count'] - 1 if last else 0,
+    }
+
+
+def get_leaderboard_page(db, board: str, metric: str, page: int = 1, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    按名次分页读取榜单
+
+    Returns:
+        List[Dict[str, Any]]: [{rank, user, score}]，并列的用户名次相同
+    """
+    collection = db[LEADERBOARDS_COLLECTION]
+    first = (max(1, page) - 1) * limit + 1
+    head = collection.find_one({'board': board, 'metric': metric, 'startRank': {'$lte': first}},
+                               {'startRank': 1}, sort=[('startRank', -1)])
+    if head is None:
+        return []
+    cursor = collection.find(
+        {'board': board, 'metric': metric, 'startRank': {'$gte': head['startRank'], '$lt': first + limit}},
+        {'startRank': 1, 'users': 1, 'scores': 1},
+    ).sort('startRank', 1)
+
+    entries = []
+    for bucket in cursor:
+        for offset, (user, score) in enumerate(zip(bucket['users'], bucket['scores'])):
+            position = bucket['startRank'] + offset
+            if first <= position < first + limit:
+                entries.append({'position': position, 'user': user, 'score': score})
+
+    page_entries = []
+    for i, entry in enumerate(entries):
+        if i == 0:
+            # 本页第一个用户可能与上一页的用户并列
+            rank = rank_of_score(db, board, metric, entry['score'])
+        elif entry['score'] != entries[i - 1]['score']:
+            rank = entry['position']
+        page_entries.append({'rank': rank, 'user': entry['user'], 'score': entry['score']})
+    return page_entries
+
+
+class LeaderboardBuilder:
+    """
+    排行榜维护
+
+    leaderboardusers集合保存每个用户的考试成绩合计、所在榜单和各指标分数，以及已累加到的考试完成时间
+    （appliedThrough）：中途失败后重跑时，已累加过的考试不会重复计入
+    """
+
+    def __init__(self, db=None, min_answers: int = DEFAULT_MIN_ANSWERS, bucket_size: int = DEFAULT_BUCKET_SIZE,
+                 lag_seconds: int = DEFAULT_LAG_SECONDS, batch_size: int = WRITE_BATCH_SIZE, dry_run: bool = False):
+        self.db = db
+        self.min_answers = min_answers
+        self.bucket_size = bucket_size
+        self.lag = timedelta(seconds=max(0, lag_seconds))
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        self.now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        self.bucket_counts = {'written': 0, 'shifted': 0, 'deleted': 0}
+        self.preview: Dict[str, List[Dict[str, Any]]] = {}
+
+    def rebuild(self, data_dir: Optional[str] = None) -> Dict[str, Any]:
+        """由全部已完成的考试（数据库或导出的数据文件）重建所有榜单"""
+        totals: Dict[Any, Dict[str, Any]] = {}
+        # 从数据库重建时与增量更新一样只计入lag之前完成的考试，导出文件则以其中最晚的完成时间为水位线
+        cutoff = self.now - self.lag if data_dir is None else None
+        applied_through = cutoff
+        for exam in tqdm(iter_source('exams', self.db, data_dir), desc="读取考试记录", unit="条"):
+            if exam.get('status') != 'completed' or exam.get('user') is None:
+                continue
+            completed = to_utc(exam.get('completedAt'))
+            if cutoff is not None and completed is not None and completed > cutoff:
+                continue
+            add_exam(totals.setdefault(normalize_id(exam['user']), empty_totals()), exam)
+            if cutoff is None and completed is not None and (applied_through is None or completed > applied_through):
+                applied_through = completed
+
+        users = {normalize_id(user['_id']): user for user in iter_source('users', self.db, data_dir)
+                 if normalize_id(user['_id']) in totals}
+        classes = self._classes(iter_source('classes', self.db, data_dir), totals)
+
+        members: Dict[str, Dict[Any, Dict[str, Optional[float]]]] = {}
+        docs = []
+        for user_id, user_totals in totals.items():
+            boards = user_boards(users.get(user_id), classes.get(user_id, ()))
+            scores = metric_scores(user_totals, self.min_answers)
+            for board in boards:
+                members.setdefault(board, {})[user_id] = scores
+            docs.append(self._user_doc(user_id, user_totals, boards, scores, applied_through))
+
+        existing = set()
+        if self.db is not None:
+            existing = set(self.db[LEADERBOARDS_COLLECTION].distinct('board'))
+        for board in tqdm(sorted(set(members) | existing), desc="生成榜单", unit="个"):
+            board_members = members.get(board, {})
+            for metric in METRICS:
+                self._update_board(board, metric, {user: scores[metric] for user, scores in board_members.items()},
+                                   replace=True)
+
+        if not self.dry_run:
+            self._write(self.db[LEADERBOARD_USERS_COLLECTION], [
+                ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in docs
+            ])
+            self.db[LEADERBOARD_USERS_COLLECTION].delete_many({'updatedAt': {'$lt': self.now}})
+            self._save_state(applied_through)
+        return {
+            'mode': 'rebuild',
+            'exams': sum(user_totals['exams'] for user_totals in totals.values()),
+            'users_updated': len(docs),
+            'boards_updated': len(set(members) | existing),
+            'watermark': applied_through.isoformat() if applied_through else None,
+        }
+
+    def update(self) -> Dict[str, Any]:
+        """累加水位线之后完成的考试，只更新这些考试的用户所在的榜单；还没有水位线时全量重建"""
+        state = self.db[LEADERBOARDS_COLLECTION].find_one({'_id': STATE_ID})
+        if state is None:
+            return self.rebuild()
+
+        cutoff = self.now - self.lag
+        completed_at: Dict[str, Any] = {'$lte': cutoff}
+        if state.get('examsCompletedAt') is not None:
+            completed_at['$gt'] = state['examsCompletedAt']
+        # 与rebuild中to_utc的解析规则一致：导入工具写入的日期字符串也要匹配
+        query = {'status': 'completed', **date_range_query('completedAt', completed_at)}
+        exams: Dict[Any, List[Dict[str, Any]]] = {}
+        for exam in self.db.exams.find(query, SOURCES['exams'][3]).batch_size(10000):
+            if exam.get('user') is not None:
+                exams.setdefault(exam['user'], []).append(exam)
+
+        user_ids = list(exams)
+        stored = self._find(LEADERBOARD_USERS_COLLECTION, user_ids, {'appliedThrough': 1, 'totals': 1, 'boards': 1})
+        users = self._find('users', user_ids, SOURCES['users'][3])
+        classes: Dict[Any, List[Any]] = {}
+        for i in range(0, len(user_ids), QUERY_BATCH_SIZE):
+            batch = user_ids[i:i + QUERY_BATCH_SIZE]
+            cursor = self.db.classes.find({'students.userId': {'$in': batch}}, SOURCES['classes'][3])
+            for user_id, class_ids in self._classes(cursor, set(batch)).items():
+                classes.setdefault(user_id, []).extend(class_ids)
+
+        changes: Dict[str, Dict[Any, Dict[str, Optional[float]]]] = {}
+        docs, applied = [], 0
+        for user_id, user_exams in exams.items():
+            previous = stored.get(user_id, {})
+            totals = dict(previous.get('totals') or empty_totals())
+            applied_through = previous.get('appliedThrough')
+            for exam in user_exams:
+                completed = to_utc(exam.get('completedAt'))
+                if applied_through is not None and completed is not None and completed <= applied_through:
+                    continue
+                add_exam(totals, exam)
+                applied += 1
+            boards = user_boards(users.get(user_id), classes.get(user_id, ()))
+            scores = metric_scores(totals, self.min_answers)
+            # 不再属于的榜单（如调换班级）也要移出
+            for board in set(boards) | set(previous.get('boards', [])):
+                changes.setdefault(board, {})[user_id] = scores if board in boards else None
+            docs.append(self._user_doc(user_id, totals, boards, scores, cutoff))
+
+        for board, board_changes in changes.items():
+            for metric in METRICS:
+                self._update_board(board, metric, {
+                    user: scores[metric] if scores else None for user, scores in board_changes.items()
+                })
+
+        if not self.dry_run:
+            self._write(self.db[LEADERBOARD_USERS_COLLECTION], [
+                ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in docs
+            ])
+            self._save_state(cutoff)
+        return {
+            'mode': 'incremental',
+            'exams': applied,
+            'users_updated': len(docs),
+            'boards_updated': len(changes),
+            'watermark': cutoff.isoformat(),
+        }
+
+    def _update_board(self, board: str, metric: str, changes: Dict[Any, Optional[float]], replace: bool = False):
+        if self.db is not None:
+            ranked = RankedBoard.load(self.db[LEADERBOARDS_COLLECTION], board, metric, self.bucket_size)
+        else:
+            ranked = RankedBoard(board, metric, self.bucket_size)
+        ranked.apply(changes, replace=replace)
+        if board == 'global':
+            self.preview[metric] = ranked.top(10)
+        operations, counts = ranked.operations(self.now)
+        for key, value in counts.items():
+            self.bucket_counts[key] += value
+        if not self.dry_run:
+            self._write(self.db[LEADERBOARDS_COLLECTION], operations)
+
+    def _user_doc(self, user_id: Any, totals: Dict[str, Any], boards: List[str],
+                  scores: Dict[str, Optional[float]], applied_through: Optional[datetime]) -> Dict[str, Any]:
+        return {
+            '_id': user_id,
+            'totals': totals,
+            'boards': boards,
+            'scores': scores,
+            'appliedThrough': applied_through,
+            'updatedAt': self.now,
+        }
+
+    @staticmethod
+    def _classes(classes: Iterable[Dict[str, Any]], user_ids) -> Dict[Any, List[Any]]:
+        """用户 → 所在班级_id（classes.students[].userId）"""
+        result: Dict[Any, List[Any]] = {}
+        for class_doc in classes:
+            for student in class_doc.get('students') or ():
+                user_id = normalize_id(student.get('userId'))
+                if user_id in user_ids:
+                    result.setdefault(user_id, []).append(normalize_id(class_doc['_id']))
+        return result
+
+    def _find(self, collection: str, ids: List[Any], projection: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+        found = {}
+        for i in range(0, len(ids), QUERY_BATCH_SIZE):
+            for doc in self.db[collection].find({'_id': {'$in': ids[i:i + QUERY_BATCH_SIZE]}}, projection):
+                found[doc['_id']] = doc
+        return found
+
+    def _save_state(self, watermark: Optional[datetime]):
+        # 分桶和用户合计全部写入后才推进水位线
+        build_indexes(self.db, [LEADERBOARDS_COLLECTION])
+        self.db[LEADERBOARDS_COLLECTION].replace_one({'_id': STATE_ID}, {
+            '_id': STATE_ID,
+            'examsCompletedAt': watermark,
+            'minAnswers': self.min_answers,
+            'updatedAt': self.now,
+        }, upsert=True)
+
+    def _write(self, collection, operations: List[Any]):
+        for i in range(0, len(operations), self.batch_size):
+            collection.bulk_write(operations[i:i + self.batch_size], ordered=False)
+
+
+def build_leaderboards(db=None, data_dir: Optional[str] = None, rebuild: bool = False,
+                       min_answers: int = DEFAULT_MIN_ANSWERS, bucket_size: int = DEFAULT_BUCKET_SIZE,
+                       lag_seconds: int = DEFAULT_LAG_SECONDS, batch_size: int = WRITE_BATCH_SIZE,
+                       dry_run: bool = False) -> Dict[str, Any]:
+    """
+    更新或重建排行榜
+
+    Args:
+        db: pymongo数据库对象，dry_run且指定data_dir时可以为None
+        data_dir: 从数据目录（如导出快照）全量重建，为None时从数据库读取
+        rebuild: 忽略水位线全量重建（指定data_dir时总是全量重建）
+        min_answers: 参与正确率排名的最少答题数
+        bucket_size: 每个分桶的用户数
+        lag_seconds: 最近多少秒内完成的考试留到下一次运行
+        batch_size: 每批bulk_write的文档数量
+        dry_run: 只计算不写入
+
+    Returns:
+        Dict[str, Any]: 运行报告
+
+    Raises:
+        ValueError: 缺少数据库连接或数据文件
+    """
+    if db is None and not (data_dir and dry_run):
+        raise ValueError("写入排行榜需要数据库连接")
+
+    start = time.perf_counter()
+    builder = LeaderboardBuilder(db, min_answers, bucket_size, lag_seconds, batch_size, dry_run)
+    report: Dict[str, Any] = {
+        'generated_at': builder.now.isoformat(),
+        'source': data_dir or 'database',
+        'dry_run': dry_run,
+    }
+    if data_dir or rebuild:
+        report.update(builder.rebuild(data_dir))
+    else:
+        report.update(builder.update())
+    report.update({
+        'buckets': builder.bucket_counts,
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+        'preview': builder.preview,
+    })
+    return report
+
+
+def print_leaderboards_report(report: Dict[str, Any]):
+    """输出排行榜更新结果"""
+    print(f"\n{Fore.CYAN}{'='*50}")
+    print(f"{Fore.CYAN}排行榜更新结果")
+    print(f"{Fore.CYAN}{'='*50}")
+    print(f"  - 数据来源: {report['source']}，模式: {'全量重建' if report['mode'] == 'rebuild' else '增量更新'}")
+    print(f"  - 计入考试: {report['exams']} 次，更新用户: {report['users_updated']} 人，"
+          f"涉及榜单: {report['boards_updated']} 个")
+    buckets = report['buckets']
+    print(f"  - 分桶: 重写 {buckets['written']}，仅更新名次 {buckets['shifted']}，删除 {buckets['deleted']}")
+    print(f"  - 水位线: {report['watermark']}")
+    print(f"  - 耗时: {report['elapsed_seconds']:.3f}s")
+
+    for metric, entries in report['preview'].items():
+        if entries:
+            top = '，'.join(f"{entry['user']}({entry['score']:g})" for entry in entries[:3])
+            print(f"  - 全站 {metric} 前3: {top}")
+    if report['dry_run']:
+        print(f"\n{Fore.YELLOW}试运行，未写入数据库")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台排行榜预计算工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python leaderboards.py                                   # 累加水位线之后完成的考试
+  python leaderboards.py --rebuild                         # 由exams集合全量重建
+  python leaderboards.py --data-dir ./snapshot             # 由导出快照全量重建
+  python leaderboards.py --data-dir ./snapshot --dry-run   # 只计算，不连接数据库
+  python leaderboards.py --show class:659200800003000000000000 --metric accuracy --page 2
+  python leaderboards.py --user 659200800002000000000000 --show global
+        """
+    )
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--data-dir', default=None,
+                        help='从数据目录（如data_exporter.py --merge生成的快照）读取考试记录、用户和班级并全量重建')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='忽略水位线，由exams集合全量重建')
+    parser.add_argument('--min-answers', type=int, default=DEFAULT_MIN_ANSWERS,
+                        help=f'参与正确率排名的最少答题数 (默认: {DEFAULT_MIN_ANSWERS})')
+    parser.add_argument('--bucket-size', type=int, default=DEFAULT_BUCKET_SIZE,
+                        help=f'每个分桶的用户数 (默认: {DEFAULT_BUCKET_SIZE})')
+    parser.add_argument('--lag-seconds', type=int, default=DEFAULT_LAG_SECONDS,
+                        help=f'最近多少秒内完成的考试留到下一次运行 (默认: {DEFAULT_LAG_SECONDS})')
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE,
+                        help=f'每批bulk_write的文档数量 (默认: {WRITE_BATCH_SIZE})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只计算并输出各指标的全站前几名，不写入数据库')
+    parser.add_argument('--show', metavar='BOARD',
+                        help='不更新，读取榜单（global、institution:<_id>、class:<_id>）')
+    parser.add_argument('--metric', choices=METRICS, default='totalScore',
+                        help='--show 读取的排名指标 (默认: totalScore)')
+    parser.add_argument('--page', type=int, default=1, help='--show 读取的页码 (默认: 1)')
+    parser.add_argument('--limit', type=int, default=20, help='--show 每页的用户数 (默认: 20)')
+    parser.add_argument('--user', help='与 --show 一起使用，查询该用户的名次')
+    parser.add_argument('--output', metavar='FILE',
+                        help='JSON报告输出文件')
+    args = parser.parse_args()
+    if args.user and not args.show:
+        parser.error('--user 需要与 --show 一起使用')
+
+    # 从数据目录试运行时不需要连接数据库
+    client = None
+    if args.show or not (args.data_dir and args.dry_run):
+        client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        if args.show:
+            db = client[args.database]
+            if args.user:
+                rank = get_user_rank(db, args.show, args.metric, args.user)
+                print(f"{args.user} 在 {args.show} 的 {args.metric} 排名: " +
+                      (f"第 {rank['rank']} / {rank['total']} 名（{rank['score']:g}）" if rank else '未上榜'))
+            else:
+                for entry in get_leaderboard_page(db, args.show, args.metric, args.page, args.limit):
+                    print(f"  {entry['rank']:>6}  {entry['user']}  {entry['score']:g}")
+            return
+        report = build_leaderboards(
+            client[args.database] if client else None, args.data_dir, args.rebuild, args.min_answers,
+            max(1, args.bucket_size), args.lag_seconds, max(1, args.batch_size), args.dry_run
+        )
+    except Exception as e:
+        print(f"{Fore.RED}✗ 排行榜更新失败：{e}")
+        sys.exit(1)
+    finally:
+        if client:
+            client.close()
+
+    print_leaderboards_report(report)
+    if args.output:
+        write_report(report, args.output)
+        print(f"\n{Fore.GREEN}✓ 报告已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
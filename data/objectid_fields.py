@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - ObjectId字段转换工具
+按集合声明需要转换为ObjectId的字段路径，并编译为只访问这些路径的专用转换函数
+
+字段路径语法:
+  user                      顶层字段
+  metadata.createdBy        嵌套对象字段
+  adminUsers[]              字符串ID数组
+  answers[].questionId      对象数组中每个元素的字段
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# 各集合中存储为ObjectId的字段路径
+# 沿用原导入脚本按字段名转换的范围（_id、名称含Id的字段及author、creator等引用字段）；
+# 字符串ID数组只转换backend/src/models中声明为ObjectId引用的字段，
+# knowledgepoints.prerequisites/related等声明为String的数组保持字符串
+OBJECT_ID_FIELDS: Dict[str, List[str]] = {
+    'institutions': ['_id', 'adminUsers[]', 'createdBy'],
+    'users': ['_id', 'institution'],
+    'knowledgebases': ['_id', 'author', 'allowedInstitutions[]', 'collaborators[]'],
+    'knowledgepoints': [
+        '_id', 'knowledgeBase', 'knowledgeBaseId', 'parentId', 'createdBy',
+        'version.history[].authorId', 'quality.assessedBy'
+    ],
+    'learningpaths': ['_id', 'knowledgeBase', 'knowledgePoints[].pointId', 'createdBy'],
+    'questions': ['_id', 'creator', 'reviewedBy', 'parentQuestion'],
+    'exams': ['_id', 'user', 'answers[].questionId'],
+    'knowledgeprogresses': ['_id', 'user', 'knowledgeBase', 'knowledgePoint', 'learningPath'],
+    'classes': ['_id', 'institutionId', 'teacherId', 'students[].userId', 'metadata.createdBy'],
+}
+
+Converter = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_converter_cache: Dict[str, Converter] = {}
+
+
+def to_object_id(value: Any) -> Any:
+    """将24位十六进制字符串转换为ObjectId，其他值原样返回"""
+    if value.__class__ is str and len(value) == 24:
+        try:
+            return ObjectId(value)
+        except InvalidId:
+            return value
+    return value
+
+
+def parse_field_path(path: str) -> List[str]:
+    """
+    将字段路径拆分为片段
+
+    Args:
+        path: 字段路径，如 answers[].questionId
+
+    Returns:
+        List[str]: 片段列表，数组片段保留 [] 后缀，如 ['answers[]', 'questionId']
+    """
+    segments = path.split('.')
+    if not all(segment and segment != '[]' for segment in segments):
+        raise ValueError(f"无效的字段路径：{path}")
+    return segments
+
+
+def _build_trie(paths: Iterable[str]) -> Dict[str, Any]:
+    """将字段路径合并为前缀树，相同前缀只遍历一次"""
+    trie: Dict[str, Any] = {}
+    for path in paths:
+        node = trie
+        segments = parse_field_path(path)
+        for i, segment in enumerate(segments):
+            is_array = segment.endswith('[]')
+            key = segment[:-2] if is_array else segment
+            entry = node.setdefault(key, {'convert': False, 'convert_items': False,
+                                          'fields': {}, 'item_fields': {}})
+            is_last = i == len(segments) - 1
+            if is_last:
+                entry['convert_items' if is_array else 'convert'] = True
+            else:
+                node = entry['item_fields' if is_array else 'fields']
+    return trie
+
+
+def _emit(trie: Dict[str, Any], var: str, lines: List[str], indent: str, depth: int):
+    """为前缀树的一层生成转换代码"""
+    value = f'v{depth}'
+    item = f'e{depth}'
+    for key, entry in trie.items():
+        lines.append(f'{indent}{value} = {var}.get({key!r})')
+        if entry['convert']:
+            lines.append(f'{indent}if {value}.__class__ is str and len({value}) == 24:')
+            lines.append(f'{indent}    {var}[{key!r}] = _to_object_id({value})')
+        if entry['fields']:
+            lines.append(f'{indent}if {value}.__class__ is dict:')
+            _emit(entry['fields'], value, lines, indent + '    ', depth + 1)
+        if entry['convert_items'] or entry['item_fields']:
+            lines.append(f'{indent}if {value}.__class__ is list:')
+            if entry['convert_items']:
+                lines.append(f'{indent}    {var}[{key!r}] = {value} = [_to_object_id({item}) for {item} in {value}]')
+            if entry['item_fields']:
+                lines.append(f'{indent}    for {item} in {value}:')
+                lines.append(f'{indent}        if {item}.__class__ is dict:')
+                _emit(entry['item_fields'], item, lines, indent + '            ', depth + 1)
+
+
+def compile_converter(paths: Iterable[str], name: str = 'convert') -> Converter:
+    """
+    将字段路径列表编译为专用转换函数
+
+    生成的函数原地修改并返回传入的文档，只访问声明的字段路径，
+    不会遍历文档中的其他字段。
+
+    Args:
+        paths: 字段路径列表
+        name: 生成函数的名称
+
+    Returns:
+        Converter: 转换函数
+    """
+    lines = [f'def {name}(doc):']
+    _emit(_build_trie(paths), 'doc', lines, '    ', 0)
+    lines.append('    return doc')
+    source = '\n'.join(lines)
+
+    namespace: Dict[str, Any] = {'_to_object_id': to_object_id}
+    exec(compile(source, f'<objectid_fields:{name}>', 'exec'), namespace)
+    converter = namespace[name]
+    converter.__source__ = source
+    return converter
+
+
+def get_converter(collection_name: str) -> Converter:
+    """
+    获取集合对应的ObjectId转换函数（编译结果会被缓存）
+
+    Args:
+        collection_name: MongoDB集合名称，未声明的集合只转换_id
+
+    Returns:
+        Converter: 转换函数
+    """
+    converter = _converter_cache.get(collection_name)
+    if converter is None:
+        paths = OBJECT_ID_FIELDS.get(collection_name, ['_id'])
+        converter = compile_converter(paths, f'convert_{collection_name}')
+        _converter_cache[collection_name] = converter
+    return converter
+
+
+def _legacy_walkers() -> Dict[str, Converter]:
+    """原有三个脚本中的递归转换实现，仅用于基准测试对比"""
+
+    def seeder_walker(item):
+        if isinstance(item, dict):
+            result = {}
+            for key, value in item.items():
+                if key == '_id' and isinstance(value, str) and len(value) == 24:
+                    try:
+                        result[key] = ObjectId(value)
+                    except Exception:
+                        result[key] = value
+                elif isinstance(value, str) and len(value) == 24 and (
+                    'Id' in key or key in ['author', 'creator', 'createdBy', 'reviewedBy', 'institution', 'knowledgeBase', 'pointId']
+                ):
+                    try:
+                        result[key] = ObjectId(value)
+                    except Exception:
+                        result[key] = value
+                elif isinstance(value, list):
+                    result[key] = [seeder_walker(v) for v in value]
+                elif isinstance(value, dict):
+                    result[key] = seeder_walker(value)
+                else:
+                    result[key] = value
+            return result
+        elif isinstance(item, list):
+            return [seeder_walker(v) for v in item]
+        return item
+
+    def class_walker(data):
+        if isinstance(data, dict):
+            result = {}
+            for key, value in data.items():
+                if key == '_id' and isinstance(value, str):
+                    result[key] = ObjectId(value)
+                elif key in ['userId', 'teacherId', 'institutionId', 'institution'] and isinstance(value, str) and len(value) == 24:
+                    result[key] = ObjectId(value)
+                else:
+                    result[key] = class_walker(value)
+            return result
+        elif isinstance(data, list):
+            return [class_walker(item) for item in data]
+        return data
+
+    def additional_walker(data):
+        if isinstance(data, dict):
+            converted = {}
+            for key, value in data.items():
+                if key == '_id' or key.endswith('Id') or key.endswith('id') or key in [
+                    'user', 'questionId', 'knowledgeBase', 'knowledgePoint', 'learningPath', 'author', 'creator', 'reviewedBy'
+                ]:
+                    if isinstance(value, str) and len(value) == 24:
+                        try:
+                            converted[key] = ObjectId(value)
+                        except Exception:
+                            converted[key] = value
+                    else:
+                        converted[key] = value
+                else:
+                    converted[key] = additional_walker(value)
+            return converted
+        elif isinstance(data, list):
+            return [additional_walker(item) for item in data]
+        return data
+
+    return {
+        'data_seeder.convert_item': seeder_walker,
+        'import_class_data.convert_object_ids': class_walker,
+        'import_additional_data.convert_object_ids': additional_walker,
+    }
+
+
+def run_benchmark(data_dir: str = '.', documents: int = 20000, repeat: int = 3):
+    """
+    对比编译转换函数与原递归实现的单文档转换耗时
+
+    Args:
+        data_dir: 种子数据目录
+        documents: 每个集合参与测试的文档数量（不足时循环复制样例数据）
+        repeat: 重复次数，取最优结果
+    """
+    samples = {
+        'users': 'users.json',
+        'classes': 'classes.json',
+        'knowledgepoints': 'knowledge_points.json',
+        'learningpaths': 'learning_paths.json',
+        'exams': 'exams.json',
+        'knowledgeprogresses': 'knowledge_progress.json',
+    }
+    walkers = _legacy_walkers()
+
+    print(f"{'集合':<22}{'实现':<44}{'μs/文档':>10}{'编译版加速':>10}")
+    for collection_name, filename in samples.items():
+        file_path = os.path.join(data_dir, filename)
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        payload = json.dumps((raw * (documents // len(raw) + 1))[:documents])
+
+        def best_time(func):
+            best = float('inf')
+            for _ in range(repeat):
+                docs = json.loads(payload)
+                start = time.perf_counter()
+                for doc in docs:
+                    func(doc)
+                best = min(best, time.perf_counter() - start)
+            return best / documents * 1e6
+
+        compiled = best_time(get_converter(collection_name))
+        print(f"{collection_name:<22}{'objectid_fields.get_converter':<44}{compiled:>10.2f}{'1.0x':>10}")
+        for name, walker in walkers.items():
+            legacy = best_time(walker)
+            print(f"{collection_name:<22}{name:<44}{legacy:>10.2f}{legacy / compiled:>9.1f}x")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='ObjectId字段转换工具')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='运行转换性能基准测试')
+    parser.add_argument('--documents', type=int, default=20000,
+                        help='每个集合参与基准测试的文档数量 (默认: 20000)')
+    parser.add_argument('--show-source', metavar='COLLECTION',
+                        help='打印指定集合编译生成的转换函数源码')
+    args = parser.parse_args()
+
+    if args.show_source:
+        print(get_converter(args.show_source).__source__)
+    if args.benchmark:
+        run_benchmark(documents=args.documents)
+    if not args.show_source and not args.benchmark:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
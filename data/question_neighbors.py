@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 题目共错近邻计算
+由考试记录中的错题构造 用户×题目 稀疏矩阵，用稀疏矩阵乘法分块计算题目之间的共错次数和相似度，
+为每道题保留前K个"答错这道题的学生也常答错"的题目，写入questionneighbors集合
+"""
+
+import argparse
+import os
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from colorama import Fore, init
+from pymongo import MongoClient, ReplaceOne
+from scipy import sparse
+from tqdm import tqdm
+
+from index_catalog import build_indexes
+from integrity_check import normalize_id, write_report
+from json_stream import iter_json_documents, resolve_data_file
+
+init(autoreset=True)
+
+NEIGHBORS_COLLECTION = 'questionneighbors'
+
+# 相似度：count为共错人数，jaccard为共错人数/答错任一题的人数，cosine为共错人数/sqrt(两题答错人数之积)
+METRICS = ['count', 'jaccard', 'cosine']
+
+DEFAULT_TOP_K = 20
+# 共错人数少于该值的题目对不作为近邻（偶然的共错没有参考价值）
+DEFAULT_MIN_COUNT = 2
+# 每次参与矩阵乘法的题目行数，决定单次乘积的内存上限
+DEFAULT_CHUNK_ROWS = 2048
+WRITE_BATCH_SIZE = 1000
+
+# 读取考试记录时只返回答题人和答题结果
+EXAM_PROJECTION = {'user': 1, 'answers.questionId': 1, 'answers.isCorrect': 1}
+
+
+class WrongAnswerMatrix:
+    """
+    累计错题并构造 用户×题目 的0/1稀疏矩阵
+
+    用户和题目_id编码为连续整数，每条错题只追加两个整数；同一用户多次答错同一道题只计一次
+    """
+
+    def __init__(self):
+        self.user_codes: Dict[Any, int] = {}
+        self.question_ids: List[Any] = []
+        self.question_codes: Dict[Any, int] = {}
+        self.exams = 0
+        self.wrong_answers = 0
+        self._users = array('q')
+        self._questions = array('q')
+
+    def add_exam(self, exam: Dict[str, Any]):
+        """追加一条考试记录中的错题"""
+        self.exams += 1
+        if exam.get('user') is None:
+            return
+        user_id = normalize_id(exam['user'])
+        user = self.user_codes.get(user_id)
+        for answer in exam.get('answers') or ():
+            question_id = answer.get('questionId')
+            if answer.get('isCorrect') is not False or question_id is None:
+                continue
+            question_id = normalize_id(question_id)
+            question = self.question_codes.get(question_id)
+            if question is None:
+                question = self.question_codes[question_id] = len(self.question_ids)
+                self.question_ids.append(question_id)
+            if user is None:
+                user = self.user_codes[user_id] = len(self.user_codes)
+            self._users.append(user)
+            self._questions.append(question)
+        self.wrong_answers = len(self._users)
+
+    def to_csr(self) -> sparse.csr_matrix:
+        """返回 用户×题目 的0/1矩阵"""
+        users = np.frombuffer(self._users, dtype=np.int64)
+        questions = np.frombuffer(self._questions, dtype=np.int64)
+        shape = (len(self.user_codes), len(self.question_ids))
+        matrix = sparse.coo_matrix((np.ones(len(users), dtype=np.float32), (users, questions)), shape=shape).tocsr()
+        # tocsr会合并重复的 (用户, 题目)，合并后的值即答错次数，二值化后只表示是否答错过
+        matrix.data[:] = 1
+        return matrix
+
+
+def chunk_neighbors(question_users: sparse.csr_matrix, user_questions: sparse.csr_matrix,
+                    wrong_counts: np.ndarray, start: int, stop: int, metric: str,
+                    top_k: int, min_count: int) -> Iterable[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    计算 [start, stop) 行题目的近邻
+
+    Args:
+        question_users: 题目×用户矩阵
+        user_questions: 用户×题目矩阵
+        wrong_counts: 每道题的答错人数
+        start, stop: 题目行范围
+        metric: 相似度（见METRICS）
+        top_k: 每道题保留的近邻数量
+        min_count: 最小共错人数
+
+    Yields:
+        Tuple[int, np.ndarray, np.ndarray, np.ndarray]: (题目编号, 近邻题目编号, 共错人数, 相似度)，按相似度降序
+    """
+    # 共错矩阵的一个行块：C[i, j] = 同时答错题目i和题目j的人数
+    cooccurrence = (question_users[start:stop] @ user_questions).tocsr()
+    cooccurrence.sum_duplicates()
+
+    for row in range(stop - start):
+        begin, end = cooccurrence.indptr[row], cooccurrence.indptr[row + 1]
+        neighbors = cooccurrence.indices[begin:end]
+        counts = cooccurrence.data[begin:end]
+        question = start + row
+        keep = (neighbors != question) & (counts >= min_count)
+        if not keep.any():
+            continue
+        neighbors, counts = neighbors[keep], counts[keep]
+
+        if metric == 'jaccard':
+            scores = counts / (wrong_counts[question] + wrong_counts[neighbors] - counts)
+        elif metric == 'cosine':
+            scores = counts / np.sqrt(wrong_counts[question] * wrong_counts[neighbors])
+        else:
+            scores = counts.astype(np.float64)
+
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            neighbors, counts, scores = neighbors[best], counts[best], scores[best]
+        # 相似度相同时共错人数多的在前
+        order = np.lexsort((-counts, -scores))
+        yield question, neighbors[order], counts[order], scores[order]
+
+
+def build_question_neighbors(db=None, input_file: Optional[str] = None, metric: str = 'jaccard',
+                             top_k: int = DEFAULT_TOP_K, min_count: int = DEFAULT_MIN_COUNT,
+                             chunk_rows: int = DEFAULT_CHUNK_ROWS, batch_size: int = WRITE_BATCH_SIZE,
+                             dry_run: bool = False) -> Dict[str, Any]:
+    """
+    计算全部题目的共错近邻并写入questionneighbors集合
+
+    Args:
+        db: pymongo数据库对象，dry_run且指定input_file时可以为None
+        input_file: 考试记录数据文件（如导出的exams_export.json），为None时从exams集合读取
+        metric: 相似度（见METRICS）
+        top_k: 每道题保留的近邻数量
+        min_count: 最小共错人数
+        chunk_rows: 每次参与矩阵乘法的题目行数
+        batch_size: 每批bulk_write的文档数量
+        dry_run: 只计算不写入
+
+    Returns:
+        Dict[str, Any]: 运行报告
+
+    Raises:
+        ValueError: 参数无效、缺少数据库连接或数据文件不存在
+    """
+    if metric not in METRICS:
+        raise ValueError(f"未知的相似度：{metric}（可选：{', '.join(METRICS)}）")
+    if db is None and not (input_file and dry_run):
+        raise ValueError("写入近邻需要数据库连接")
+
+    start = time.perf_counter()
+    report: Dict[str, Any] = {
+        'generated_at': datetime.now().isoformat(),
+        'source': input_file or 'exams',
+        'metric': metric,
+        'top_k': top_k,
+        'min_count': min_count,
+        'dry_run': dry_run,
+    }
+
+    if input_file:
+        resolved_path = resolve_data_file(input_file)
+        if not resolved_path:
+            raise ValueError(f"文件不存在：{input_file}")
+        report['source'] = resolved_path
+        exams, total = iter_json_documents(resolved_path), None
+    else:
+        exams = db.exams.find({}, EXAM_PROJECTION).batch_size(10000)
+        total = db.exams.estimated_document_count()
+
+    wrong = WrongAnswerMatrix()
+    for exam in tqdm(exams, total=total, desc="读取考试记录", unit="条"):
+        wrong.add_exam(exam)
+
+    user_questions = wrong.to_csr()
+    question_users = user_questions.T.tocsr()
+    wrong_counts = np.diff(question_users.indptr).astype(np.float64)
+    report.update({
+        'exams': wrong.exams,
+        'wrong_answers': wrong.wrong_answers,
+        'users': user_questions.shape[0],
+        'questions': user_questions.shape[1],
+        'matrix_nnz': int(user_questions.nnz),
+        'load_seconds': round(time.perf_counter() - start, 3),
+    })
+
+    generated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    collection = None
+    if not dry_run:
+        collection = db[NEIGHBORS_COLLECTION]
+        # 写入按questionId upsert，先建好唯一索引：每次upsert走索引查找，并发写入也不会产生重复文档
+        build_indexes(db, [NEIGHBORS_COLLECTION])
+    compute_start = time.perf_counter()
+    written, with_neighbors, pairs, operations, sample = 0, 0, 0, [], []
+
+    def flush():
+        nonlocal written, operations
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+
+    question_count = user_questions.shape[1]
+    chunk_rows = max(1, chunk_rows)
+    with tqdm(total=question_count, desc="计算共错近邻", unit="题") as pbar:
+        for chunk_start in range(0, question_count, chunk_rows):
+            chunk_stop = min(chunk_start + chunk_rows, question_count)
+            for question, neighbors, counts, scores in chunk_neighbors(
+                    question_users, user_questions, wrong_counts, chunk_start, chunk_stop,
+                    metric, top_k, min_count):
+                with_neighbors += 1
+                pairs += len(neighbors)
+                doc = {
+                    'questionId': wrong.question_ids[question],
+                    'wrongCount': int(wrong_counts[question]),
+                    'metric': metric,
+                    'neighbors': [
+                        {'questionId': wrong.question_ids[neighbor], 'count': int(count), 'score': round(float(score), 4)}
+                        for neighbor, count, score in zip(neighbors.tolist(), counts.tolist(), scores.tolist())
+                    ],
+                    'generatedAt': generated_at,
+                }
+                if dry_run:
+                    if len(sample) < 5:
+                        sample.append(doc)
+                    continue
+                operations.append(ReplaceOne({'questionId': doc['questionId']}, doc, upsert=True))
+                if len(operations) >= batch_size:
+                    flush()
+            pbar.update(chunk_stop - chunk_start)
+
+    report.update({
+        'questions_with_neighbors': with_neighbors,
+        'neighbor_pairs': pairs,
+        'compute_seconds': round(time.perf_counter() - compute_start, 3),
+    })
+
+    if dry_run:
+        report['sample'] = [{
+            'questionId': str(doc['questionId']),
+            'wrongCount': doc['wrongCount'],
+            'neighbors': [{**item, 'questionId': str(item['questionId'])} for item in doc['neighbors'][:10]],
+        } for doc in sample]
+    else:
+        flush()
+        # 本次没有近邻的题目保留着上一次的结果，全部写入后删除
+        report['removed'] = collection.delete_many({'generatedAt': {'$lt': generated_at}}).deleted_count
+        report['written'] = written
+
+    report['elapsed_seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def print_neighbors_report(report: Dict[str, Any]):
+    """输出共错近邻计算结果"""
+    print(f"\n{Fore.CYAN}{'='*50}")
+    print(f"{Fore.CYAN}题目共错近邻计算结果")
+    print(f"{Fore.CYAN}{'='*50}")
+    print(f"  - 数据来源: {report['source']}")
+    print(f"  - 考试记录: {report['exams']} 条，错题: {report['wrong_answers']} 条")
+    print(f"  - 用户×题目矩阵: {report['users']} × {report['questions']}，非零元素 {report['matrix_nnz']}")
+    print(f"  - 相似度: {report['metric']}，每题前 {report['top_k']} 个，最小共错人数 {report['min_count']}")
+    print(f"  - 有近邻的题目: {report['questions_with_neighbors']} 道，近邻对: {report['neighbor_pairs']}")
+    print(f"  - 读取耗时: {report['load_seconds']:.3f}s，计算耗时: {report['compute_seconds']:.3f}s")
+
+    if report['dry_run']:
+        print(f"\n{Fore.YELLOW}试运行，未写入数据库。部分结果：")
+        for doc in report['sample']:
+            neighbors = ', '.join(f"{item['questionId']}({item['count']})" for item in doc['neighbors'][:3])
+            print(f"  - {doc['questionId']}（{doc['wrongCount']} 人答错）: {neighbors}")
+        return
+
+    print(f"  - 写入文档: {report['written']} 条，删除过期文档: {report['removed']} 条")
+    print(f"  - 总耗时: {report['elapsed_seconds']:.3f}s")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台题目共错近邻计算工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python question_neighbors.py                                   # 从exams集合计算并写入questionneighbors
+  python question_neighbors.py --metric cosine --top-k 10 --min-count 3
+  python question_neighbors.py --input exams_export.json --dry-run    # 从导出文件计算，不写入
+  python question_neighbors.py --chunk-rows 512                  # 降低单次矩阵乘法的内存占用
+        """
+    )
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--input', metavar='FILE',
+                        help='从考试记录数据文件读取答题（支持data_seeder.py可读取的全部格式），默认读取exams集合')
+    parser.add_argument('--metric', choices=METRICS, default='jaccard',
+                        help='相似度：count共错人数，jaccard杰卡德系数，cosine余弦相似度 (默认: jaccard)')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help=f'每道题保留的近邻数量 (默认: {DEFAULT_TOP_K})')
+    parser.add_argument('--min-count', type=int, default=DEFAULT_MIN_COUNT,
+                        help=f'最小共错人数 (默认: {DEFAULT_MIN_COUNT})')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f'每次参与矩阵乘法的题目行数 (默认: {DEFAULT_CHUNK_ROWS})')
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE,
+                        help=f'每批bulk_write的文档数量 (默认: {WRITE_BATCH_SIZE})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只计算并输出部分结果，不写入数据库')
+    parser.add_argument('--output', metavar='FILE',
+                        help='JSON报告输出文件')
+    args = parser.parse_args()
+
+    # 从文件试运行时不需要连接数据库
+    client = None
+    if not (args.input and args.dry_run):
+        client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        report = build_question_neighbors(
+            client[args.database] if client else None, args.input, args.metric,
+            max(1, args.top_k), max(1, args.min_count), args.chunk_rows, max(1, args.batch_size), args.dry_run
+        )
+    except Exception as e:
+        print(f"{Fore.RED}✗ 题目共错近邻计算失败：{e}")
+        sys.exit(1)
+    finally:
+        if client:
+            client.close()
+
+    print_neighbors_report(report)
+    if args.output:
+        write_report(report, args.output)
+        print(f"\n{Fore.GREEN}✓ 报告已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
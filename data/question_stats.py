@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 题目统计重算工具
+从考试记录的answers[]重新计算每道题的作答次数、正确次数、正确率和平均用时，
+批量写回questions.stats。答题记录按列存入NumPy数组，分组汇总由bincount完成，
+也可以交给MongoDB的$group聚合在服务器端完成
+"""
+
+import argparse
+import os
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from colorama import Fore, init
+from pymongo import MongoClient, UpdateOne
+from tqdm import tqdm
+
+from integrity_check import normalize_id, write_report
+from json_stream import iter_json_documents, resolve_data_file
+
+init(autoreset=True)
+
+# 每累计多少条答题记录转换为NumPy数组并汇总一次，决定常驻内存的上限
+CHUNK_ANSWERS = 1 << 20
+
+# 每批bulk_write的更新数量
+WRITE_BATCH_SIZE = 1000
+
+# 读取考试记录时只返回答题字段
+EXAM_PROJECTION = {'answers.questionId': 1, 'answers.isCorrect': 1, 'answers.timeSpent': 1}
+
+# 服务器端分组：每道题的作答次数、正确次数、用时合计和有用时记录的次数
+# （$sum忽略非数值的timeSpent，与本地计算时跳过缺失用时的规则一致；
+# 字符串形式的题目_id与本地计算的normalize_id一样转换为ObjectId，无法转换时保留原值）
+GROUP_PIPELINE = [
+    {'$project': EXAM_PROJECTION},
+    {'$unwind': '$answers'},
+    {'$match': {'answers.questionId': {'$ne': None}}},
+    {'$set': {'answers.questionId': {'$convert': {
+        'input': '$answers.questionId', 'to': 'objectId', 'onError': '$answers.questionId',
+    }}}},
+    {'$group': {
+        '_id': '$answers.questionId',
+        'attempts': {'$sum': 1},
+        'correct': {'$sum': {'$cond': [{'$eq': ['$answers.isCorrect', True]}, 1, 0]}},
+        'timeSum': {'$sum': '$answers.timeSpent'},
+        'timed': {'$sum': {'$cond': [{'$isNumber': '$answers.timeSpent'}, 1, 0]}},
+    }},
+]
+
+# 没有任何作答记录的题目（--reset-unanswered）
+EMPTY_STATS = {'totalAttempts': 0, 'correctAttempts': 0, 'accuracy': 0, 'averageTime': 0}
+
+
+class AnswerColumns:
+    """
+    按列累计答题记录并按题目分组汇总
+
+    题目_id编码为连续整数下标，每条答题记录追加到紧凑的array缓冲区；
+    缓冲区满CHUNK_ANSWERS条后转换为NumPy数组，用bincount一次完成全部题目的分组求和，
+    内存占用只与题目数量和分块大小有关
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_ANSWERS):
+        self.chunk_size = max(1, chunk_size)
+        self.question_ids: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+        self.exams = 0
+        self.answers = 0
+
+        self.attempts = np.zeros(0, dtype=np.int64)
+        self.correct = np.zeros(0, dtype=np.int64)
+        self.time_sum = np.zeros(0, dtype=np.float64)
+        self.timed = np.zeros(0, dtype=np.int64)
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._code = array('q')
+        self._is_correct = array('b')
+        # 缺失或非数值的timeSpent记为NaN，不计入平均用时
+        self._time_spent = array('d')
+
+    def add_exam(self, exam: Dict[str, Any]):
+        """追加一条考试记录中的全部答题"""
+        self.exams += 1
+        codes = self.codes
+        for answer in exam.get('answers') or ():
+            question_id = answer.get('questionId')
+            if question_id is None:
+                continue
+            question_id = normalize_id(question_id)
+            code = codes.get(question_id)
+            if code is None:
+                code = codes[question_id] = len(self.question_ids)
+                self.question_ids.append(question_id)
+
+            time_spent = answer.get('timeSpent')
+            self._code.append(code)
+            self._is_correct.append(answer.get('isCorrect') is True)
+            self._time_spent.append(
+                time_spent if isinstance(time_spent, (int, float)) and time_spent.__class__ is not bool
+                else np.nan
+            )
+            if len(self._code) >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """将缓冲区中的答题记录汇总到各题目的累计值"""
+        if not self._code:
+            return
+        codes = np.frombuffer(self._code, dtype=np.int64)
+        is_correct = np.frombuffer(self._is_correct, dtype=np.int8)
+        time_spent = np.frombuffer(self._time_spent, dtype=np.float64)
+        size = len(self.question_ids)
+
+        self._grow(size)
+        self.attempts += np.bincount(codes, minlength=size)
+        self.correct += np.bincount(codes, weights=is_correct, minlength=size).astype(np.int64)
+        has_time = ~np.isnan(time_spent)
+        self.time_sum += np.bincount(codes[has_time], weights=time_spent[has_time], minlength=size)
+        self.timed += np.bincount(codes[has_time], minlength=size)
+
+        self.answers += len(codes)
+        self._reset_buffers()
+
+    def _grow(self, size: int):
+        """新出现的题目在累计数组末尾补零"""
+        extra = size - len(self.attempts)
+        if extra > 0:
+            self.attempts = np.concatenate([self.attempts, np.zeros(extra, dtype=np.int64)])
+            self.correct = np.concatenate([self.correct, np.zeros(extra, dtype=np.int64)])
+            self.time_sum = np.concatenate([self.time_sum, np.zeros(extra, dtype=np.float64)])
+            self.timed = np.concatenate([self.timed, np.zeros(extra, dtype=np.int64)])
+
+    def totals(self) -> Tuple[List[Any], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """汇总剩余缓冲区并返回（题目_id, 作答次数, 正确次数, 用时合计, 有用时的次数）"""
+        self.flush()
+        return self.question_ids, self.attempts, self.correct, self.time_sum, self.timed
+
+
+def compute_stats(question_ids: List[Any], attempts: np.ndarray, correct: np.ndarray,
+                  time_sum: np.ndarray, timed: np.ndarray) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """
+    由分组累计值计算questions.stats
+
+    正确率为百分数并保留两位小数（与questions.json中的84.62一致），平均用时单位为秒、保留一位小数
+
+    Yields:
+        Tuple[Any, Dict[str, Any]]: (题目_id, stats)
+    """
+    attempts = np.asarray(attempts, dtype=np.int64)
+    correct = np.asarray(correct, dtype=np.int64)
+    time_sum = np.asarray(time_sum, dtype=np.float64)
+    timed = np.asarray(timed, dtype=np.int64)
+
+    accuracy = np.round(np.divide(correct * 100.0, attempts, out=np.zeros(len(attempts)), where=attempts > 0), 2)
+    average_time = np.round(np.divide(time_sum, timed, out=np.zeros(len(timed)), where=timed > 0), 1)
+
+    for question_id, total, right, acc, avg in zip(question_ids, attempts.tolist(), correct.tolist(),
+                                                   accuracy.tolist(), average_time.tolist()):
+        yield question_id, {
+            'totalAttempts': total,
+            'correctAttempts': right,
+            'accuracy': acc,
+            'averageTime': avg,
+        }
+
+
+def collect_answers(exams: Iterable[Dict[str, Any]], chunk_size: int = CHUNK_ANSWERS,
+                    total: Optional[int] = None) -> AnswerColumns:
+    """逐条读取考试记录并按列累计答题"""
+    columns = AnswerColumns(chunk_size)
+    with tqdm(total=total, desc="读取考试记录", unit="条") as pbar:
+        for exam in exams:
+            columns.add_exam(exam)
+            pbar.update(1)
+    return columns
+
+
+def group_on_server(db) -> Tuple[List[Any], List[int], List[int], List[float], List[int]]:
+    """用$group聚合在MongoDB中完成分组，只把每道题的汇总结果传回客户端"""
+    question_ids, attempts, correct, time_sum, timed = [], [], [], [], []
+    for row in db.exams.aggregate(GROUP_PIPELINE, allowDiskUse=True):
+        question_ids.append(row['_id'])
+        attempts.append(row['attempts'])
+        correct.append(row['correct'])
+        time_sum.append(row['timeSum'])
+        timed.append(row['timed'])
+    return question_ids, attempts, correct, time_sum, timed
+
+
+def write_question_stats(collection, stats: Iterable[Tuple[Any, Dict[str, Any]]],
+                         batch_size: int = WRITE_BATCH_SIZE) -> Dict[str, int]:
+    """
+    以bulk_write批量更新questions.stats，不存在的题目不会被创建
+
+    Returns:
+        Dict[str, int]: matched（找到的题目数）、modified（统计值有变化的题目数）、missing（已删除题目的数量）
+    """
+    counts = {'matched': 0, 'modified': 0, 'missing': 0}
+
+    def flush(operations):
+        result = collection.bulk_write(operations, ordered=False)
+        counts['matched'] += result.matched_count
+        counts['modified'] += result.modified_count
+        counts['missing'] += len(operations) - result.matched_count
+
+    operations = []
+    for question_id, values in stats:
+        fields = {f'stats.{key}': value for key, value in values.items()}
+        operations.append(UpdateOne({'_id': question_id}, {'$set': fields}))
+        if len(operations) >= batch_size:
+            flush(operations)
+            operations = []
+    if operations:
+        flush(operations)
+    return counts
+
+
+def reset_unanswered(collection, answered: Iterable[Any], batch_size: int = WRITE_BATCH_SIZE) -> int:
+    """将没有任何作答记录的题目的统计值清零，返回修改的题目数量"""
+    answered = set(answered)
+    cursor = collection.find({}, {'_id': 1}).batch_size(10000)
+    unanswered = [doc['_id'] for doc in cursor if doc['_id'] not in answered]
+    fields = {f'stats.{key}': value for key, value in EMPTY_STATS.items()}
+
+    modified = 0
+    for i in range(0, len(unanswered), batch_size):
+        result = collection.update_many({'_id': {'$in': unanswered[i:i + batch_size]}}, {'$set': fields})
+        modified += result.modified_count
+    return modified
+
+
+def recompute_question_stats(db=None, input_file: Optional[str] = None, use_pipeline: bool = False,
+                             chunk_size: int = CHUNK_ANSWERS, batch_size: int = WRITE_BATCH_SIZE,
+                             reset: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    重新计算并写回全部题目的统计值
+
+    Args:
+        db: pymongo数据库对象，dry_run且指定input_file时可以为None
+        input_file: 考试记录数据文件（如导出的exams_export.json），为None时从exams集合读取
+        use_pipeline: 用$group聚合在服务器端分组（不能与input_file同时使用）
+        chunk_size: 每次转换为NumPy数组的答题记录数量
+        batch_size: 每批bulk_write的更新数量
+        reset: 是否将没有作答记录的题目统计值清零
+        dry_run: 只计算不写入
+
+    Returns:
+        Dict[str, Any]: 运行报告
+
+    Raises:
+        ValueError: 参数组合无效或数据文件不存在
+    """
+    if use_pipeline and input_file:
+        raise ValueError("--pipeline 只能用于从数据库读取考试记录")
+    if db is None and not (input_file and dry_run):
+        raise ValueError("写回统计值需要数据库连接")
+
+    start = time.perf_counter()
+    report: Dict[str, Any] = {
+        'generated_at': datetime.now().isoformat(),
+        'mode': 'pipeline' if use_pipeline else 'numpy',
+        'source': input_file or 'exams',
+        'dry_run': dry_run,
+    }
+
+    if use_pipeline:
+        print(f"{Fore.YELLOW}在MongoDB中按题目分组（$group）...")
+        question_ids, attempts, correct, time_sum, timed = group_on_server(db)
+        report['answers'] = int(sum(attempts))
+    else:
+        if input_file:
+            resolved_path = resolve_data_file(input_file)
+            if not resolved_path:
+                raise ValueError(f"文件不存在：{input_file}")
+            report['source'] = resolved_path
+            exams, total = iter_json_documents(resolved_path), None
+        else:
+            exams = db.exams.find({}, EXAM_PROJECTION).batch_size(10000)
+            total = db.exams.estimated_document_count()
+        columns = collect_answers(exams, chunk_size, total)
+        question_ids, attempts, correct, time_sum, timed = columns.totals()
+        report['exams'] = columns.exams
+        report['answers'] = columns.answers
+    report['aggregate_seconds'] = round(time.perf_counter() - start, 3)
+    report['questions'] = len(question_ids)
+
+    stats = compute_stats(question_ids, attempts, correct, time_sum, timed)
+    if dry_run:
+        report['sample'] = [{'_id': str(question_id), **values} for question_id, values in stats][:10]
+    else:
+        write_start = time.perf_counter()
+        report.update(write_question_stats(db.questions, stats, batch_size))
+        if reset:
+            report['reset'] = reset_unanswered(db.questions, question_ids, batch_size)
+        report['write_seconds'] = round(time.perf_counter() - write_start, 3)
+
+    report['elapsed_seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def print_stats_report(report: Dict[str, Any]):
+    """输出统计重算结果"""
+    print(f"\n{Fore.CYAN}{'='*50}")
+    print(f"{Fore.CYAN}题目统计重算结果")
+    print(f"{Fore.CYAN}{'='*50}")
+    print(f"  - 计算方式: {report['mode']}")
+    print(f"  - 数据来源: {report['source']}")
+    if 'exams' in report:
+        print(f"  - 考试记录: {report['exams']} 条")
+    print(f"  - 答题记录: {report['answers']} 条")
+    print(f"  - 涉及题目: {report['questions']} 道")
+    print(f"  - 分组耗时: {report['aggregate_seconds']:.3f}s")
+
+    if report['dry_run']:
+        print(f"\n{Fore.YELLOW}试运行，未写入数据库。部分结果：")
+        for item in report['sample']:
+            print(f"  - {item['_id']}: 作答 {item['totalAttempts']} 次，正确率 {item['accuracy']}%，"
+                  f"平均用时 {item['averageTime']}s")
+        return
+
+    print(f"  - 更新题目: {report['modified']} 道（{report['matched'] - report['modified']} 道无变化）")
+    if report['missing']:
+        print(f"  {Fore.YELLOW}⚠ {report['missing']} 道题目已不存在，未写入")
+    if 'reset' in report:
+        print(f"  - 清零未作答题目: {report['reset']} 道")
+    print(f"  - 写入耗时: {report['write_seconds']:.3f}s")
+    print(f"  - 总耗时: {report['elapsed_seconds']:.3f}s")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台题目统计重算工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python question_stats.py                                 # 从exams集合重算并写回questions.stats
+  python question_stats.py --pipeline                      # 由MongoDB的$group完成分组
+  python question_stats.py --input exams_export.json --dry-run  # 从导出文件计算，不写入
+  python question_stats.py --reset-unanswered --output question_stats_report.json
+        """
+    )
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--input', metavar='FILE',
+                        help='从考试记录数据文件读取答题（支持data_seeder.py可读取的全部格式），默认读取exams集合')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='用MongoDB的$group聚合完成分组，只传回每道题的汇总结果')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_ANSWERS,
+                        help=f'每次转换为NumPy数组的答题记录数量 (默认: {CHUNK_ANSWERS})')
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE,
+                        help=f'每批bulk_write的更新数量 (默认: {WRITE_BATCH_SIZE})')
+    parser.add_argument('--reset-unanswered', action='store_true',
+                        help='将没有任何作答记录的题目统计值清零')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只计算并输出部分结果，不写入数据库')
+    parser.add_argument('--output', metavar='FILE',
+                        help='JSON报告输出文件')
+    args = parser.parse_args()
+    if args.pipeline and args.input:
+        parser.error('--pipeline 不能与 --input 同时使用')
+
+    # 从文件试运行时不需要连接数据库
+    client = None
+    if not (args.input and args.dry_run):
+        client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        report = recompute_question_stats(
+            client[args.database] if client else None, args.input, args.pipeline,
+            args.chunk_size, max(1, args.batch_size), args.reset_unanswered, args.dry_run
+        )
+    except Exception as e:
+        print(f"{Fore.RED}✗ 题目统计重算失败：{e}")
+        sys.exit(1)
+    finally:
+        if client:
+            client.close()
+
+    print_stats_report(report)
+    if args.output:
+        write_report(report, args.output)
+        print(f"\n{Fore.GREEN}✓ 报告已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 推荐候选题目预计算
+离线复现 recommendationService.getSmartQuestionRecommendations 中的用户学习状态分析，
+为每个用户预先排好薄弱环节强化、渐进式难度和复习巩固三类候选题目，
+写入recommendationcandidates集合：后端按用户_id一次索引查询即可读取，过期文档由TTL索引自动删除
+"""
+
+import argparse
+import os
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from colorama import Fore, init
+from pymongo import MongoClient, ReplaceOne
+from tqdm import tqdm
+
+from index_catalog import build_indexes
+from integrity_check import normalize_id, write_report
+from json_stream import iter_json_documents, resolve_data_file
+
+init(autoreset=True)
+
+CANDIDATES_COLLECTION = 'recommendationcandidates'
+
+# 与analyzeUserLearningProfile一致：只分析最近20次已完成的考试，
+# 分类正确率低于60%为薄弱、高于80%为已掌握，最多保留5个薄弱分类和10个最近话题
+RECENT_EXAMS = 20
+WEAK_ACCURACY = 0.6
+STRONG_ACCURACY = 0.8
+MAX_WEAK_CATEGORIES = 5
+MAX_STRONG_CATEGORIES = 5
+MAX_RECENT_TOPICS = 10
+
+# 学习进度平均分低于该值的运动项目也视为薄弱
+WEAK_PROGRESS_SCORE = 60
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+EASY, MEDIUM, HARD = range(3)
+
+# 题目没有作答统计时按难度估计的正确率
+DEFAULT_ACCURACY = {EASY: 0.8, MEDIUM: 0.6, HARD: 0.4}
+
+# 各类候选的基础分与推荐服务中的score一致，类内按相关度在 [基础分, 基础分+0.1) 内排序，
+# 因此合并后的顺序仍是 薄弱环节 > 渐进式 > 复习
+BUCKET_SCORES = {'weakness': 0.9, 'progressive': 0.8, 'review': 0.7}
+
+DEFAULT_PER_BUCKET = 20
+DEFAULT_TTL_HOURS = 24
+WRITE_BATCH_SIZE = 1000
+
+# 数据来源：数据文件名（--data-dir）、集合名称、查询条件和投影
+SOURCES = {
+    'questions': ('questions.json', 'questions', {}, {
+        'category.sport': 1, 'category.knowledgeType': 1, 'difficulty': 1, 'tags': 1,
+        'status': 1, 'stats.accuracy': 1, 'stats.totalAttempts': 1,
+    }),
+    'knowledge_bases': ('knowledge_bases.json', 'knowledgebases', {}, {'category': 1}),
+    'exams': ('exams.json', 'exams', {'status': 'completed'}, {
+        'user': 1, 'status': 1, 'completedAt': 1, 'answers.questionId': 1, 'answers.isCorrect': 1,
+    }),
+    'knowledge_progress': ('knowledge_progress.json', 'knowledgeprogresses', {}, {
+        'user': 1, 'knowledgeBase': 1, 'score': 1,
+    }),
+}
+
+
+def to_timestamp(value: Any) -> float:
+    """将日期（datetime或ISO字符串）转换为UTC时间戳，缺失时视为最早"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return -np.inf
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return -np.inf
+
+
+def group_bounds(sorted_keys: np.ndarray, size: int) -> np.ndarray:
+    """已排序的分组键在每组中的起止位置，第i组为 [bounds[i], bounds[i+1])"""
+    return np.searchsorted(sorted_keys, np.arange(size + 1))
+
+
+def csr_index(keys: np.ndarray, values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """按键分组的压缩索引：values[order]中第i组为 [ptr[i], ptr[i+1])"""
+    order = np.argsort(keys, kind='stable')
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=ptr[1:])
+    return ptr, values[order]
+
+
+def gather(ptr: np.ndarray, values: np.ndarray, groups: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """取出多个分组的全部值，同时返回每个值所属分组在groups中的序号"""
+    slices = [values[ptr[group]:ptr[group + 1]] for group in groups]
+    if not slices:
+        return np.zeros(0, dtype=values.dtype), np.zeros(0, dtype=np.int64)
+    owner = np.repeat(np.arange(len(slices)), [len(part) for part in slices])
+    return np.concatenate(slices), owner
+
+
+def top_k(positions: np.ndarray, relevance: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """按相关度取前k个，结果按相关度降序排列"""
+    if len(positions) > k:
+        keep = np.argpartition(-relevance, k - 1)[:k]
+        positions, relevance = positions[keep], relevance[keep]
+    order = np.argsort(-relevance, kind='stable')
+    return positions[order], relevance[order]
+
+
+class QuestionCatalog:
+    """
+    题目的列式索引
+
+    全部题目都参与学习状态分析（与推荐服务中populate的结果一致），
+    只有已发布的题目会进入候选池。候选池按分类、标签和难度预先建好索引，
+    每个用户只对相关的少量题目做向量化打分
+    """
+
+    def __init__(self, questions: Iterable[Dict[str, Any]]):
+        self.ids: List[Any] = []
+        self.positions: Dict[Any, int] = {}
+        self.categories: List[str] = []
+        self.category_codes: Dict[str, int] = {}
+        self.sports: List[str] = []
+        self.sport_codes: Dict[str, int] = {}
+        self.category_sport: List[int] = []
+        self.tags: List[str] = []
+        self.tag_codes: Dict[str, int] = {}
+        # 每道题的标签编号，按题目在文档中的顺序（用于提取最近话题）
+        self.question_tags: List[List[int]] = []
+
+        category, difficulty, accuracy, published = array('i'), array('b'), array('d'), array('b')
+        for question in questions:
+            self.positions[normalize_id(question['_id'])] = len(self.ids)
+            self.ids.append(normalize_id(question['_id']))
+
+            info = question.get('category') or {}
+            key = f"{info.get('sport') or '未分类'}-{info.get('knowledgeType') or '基础'}"
+            code = self.category_codes.get(key)
+            if code is None:
+                code = self.category_codes[key] = len(self.categories)
+                self.categories.append(key)
+                sport = info.get('sport') or '未分类'
+                self.category_sport.append(self.sport_codes.setdefault(sport, len(self.sport_codes)))
+            category.append(code)
+
+            level = DIFFICULTIES.index(question['difficulty']) if question.get('difficulty') in DIFFICULTIES else -1
+            difficulty.append(level)
+            stats = question.get('stats') or {}
+            if stats.get('totalAttempts'):
+                accuracy.append((stats.get('accuracy') or 0) / 100)
+            else:
+                accuracy.append(DEFAULT_ACCURACY.get(level, 0.5))
+            published.append(question.get('status') == 'published')
+            self.question_tags.append([self.tag_codes.setdefault(tag, len(self.tag_codes))
+                                       for tag in question.get('tags') or []])
+
+        self.sports = list(self.sport_codes)
+        self.tags = list(self.tag_codes)
+        self.category = np.frombuffer(category, dtype=np.int32).astype(np.int64)
+        self.difficulty = np.frombuffer(difficulty, dtype=np.int8)
+        self.accuracy = np.frombuffer(accuracy, dtype=np.float64)
+        self.published = np.frombuffer(published, dtype=np.int8).astype(bool)
+        self.category_sport_array = np.asarray(self.category_sport, dtype=np.int64)
+        self._build_pools()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build_pools(self):
+        # 薄弱环节候选池：按分类分组的已发布简单/中等题目（薄弱环节从简单题开始）
+        weak = np.flatnonzero(self.published & (self.difficulty >= EASY) & (self.difficulty <= MEDIUM))
+        self.weak_ptr, self.weak_pool = csr_index(self.category[weak], weak, len(self.categories))
+
+        # 复习候选池：按标签分组的已发布题目
+        rows = [(tag, position) for position in np.flatnonzero(self.published).tolist()
+                for tag in set(self.question_tags[position])]
+        tags = np.fromiter((tag for tag, _ in rows), dtype=np.int64, count=len(rows))
+        members = np.fromiter((position for _, position in rows), dtype=np.int64, count=len(rows))
+        self.tag_ptr, self.tag_pool = csr_index(tags, members, len(self.tags))
+
+        # 渐进式候选池：按难度组合分组、按题目正确率排序，用二分查找定位与用户水平接近的题目
+        self._progressive: Dict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]] = {}
+        for levels in [(MEDIUM,), (MEDIUM, HARD), (EASY, MEDIUM)]:
+            pool = np.flatnonzero(self.published & np.isin(self.difficulty, levels))
+            pool = pool[np.argsort(self.accuracy[pool], kind='stable')]
+            self._progressive[levels] = (pool, self.accuracy[pool])
+
+    def progressive_pool(self, levels: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        """指定难度组合的已发布题目及其正确率（按正确率升序）"""
+        return self._progressive[levels]
+
+
+class LearningHistory:
+    """
+    按列累计已完成考试的答题记录和学习进度
+
+    用户_id编码为连续整数，考试、答题、学习进度分别存入紧凑的array缓冲区，
+    最近20次考试的筛选和各用户、各分类的正确率统计都在NumPy数组上分组完成
+    """
+
+    def __init__(self, catalog: QuestionCatalog):
+        self.catalog = catalog
+        self.user_ids: List[Any] = []
+        self.user_codes: Dict[Any, int] = {}
+        self.exam_user, self.exam_time = array('q'), array('d')
+        self.answer_exam, self.answer_question, self.answer_correct = array('q'), array('i'), array('b')
+        self.progress_user, self.progress_sport, self.progress_score = array('q'), array('q'), array('d')
+
+    def _user_code(self, user_id: Any) -> int:
+        user_id = normalize_id(user_id)
+        code = self.user_codes.get(user_id)
+        if code is None:
+            code = self.user_codes[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        return code
+
+    def add_exam(self, exam: Dict[str, Any]):
+        """追加一次已完成考试的全部答题，引用不存在题目的答题只计入总数"""
+        if exam.get('status') != 'completed' or exam.get('user') is None:
+            return
+        exam_index = len(self.exam_user)
+        self.exam_user.append(self._user_code(exam['user']))
+        self.exam_time.append(to_timestamp(exam.get('completedAt')))
+        positions = self.catalog.positions
+        for answer in exam.get('answers') or ():
+            question_id = answer.get('questionId')
+            self.answer_exam.append(exam_index)
+            self.answer_question.append(positions.get(normalize_id(question_id), -1)
+                                        if question_id is not None else -1)
+            self.answer_correct.append(answer.get('isCorrect') is True)
+
+    def add_progress(self, progress: Dict[str, Any], base_sports: Dict[Any, int]):
+        """追加一条有得分的学习进度，运动项目取自所属知识库的category"""
+        score = progress.get('score')
+        sport = base_sports.get(normalize_id(progress.get('knowledgeBase')))
+        if progress.get('user') is None or sport is None or not isinstance(score, (int, float)):
+            return
+        self.progress_user.append(self._user_code(progress['user']))
+        self.progress_sport.append(sport)
+        self.progress_score.append(score)
+
+    def recent_answers(self) -> Dict[str, np.ndarray]:
+        """
+        每个用户最近RECENT_EXAMS次考试中的答题
+
+        返回按用户、考试由新到旧、答题顺序排列的列数组，以及每个用户的起止位置
+        """
+        users = len(self.user_ids)
+        exam_user = np.frombuffer(self.exam_user, dtype=np.int64)
+        exam_time = np.frombuffer(self.exam_time, dtype=np.float64)
+
+        # 按用户分组、组内按完成时间倒序，组内序号即考试的新旧排名
+        order = np.lexsort((-exam_time, exam_user))
+        bounds = group_bounds(exam_user[order], users)
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order)) - np.repeat(bounds[:-1], np.diff(bounds))
+
+        answer_exam = np.frombuffer(self.answer_exam, dtype=np.int64)
+        keep = rank[answer_exam] < RECENT_EXAMS
+        answer_exam = answer_exam[keep]
+        question = np.frombuffer(self.answer_question, dtype=np.int32)[keep].astype(np.int64)
+        correct = np.frombuffer(self.answer_correct, dtype=np.int8)[keep].astype(bool)
+        user = exam_user[answer_exam]
+
+        order = np.lexsort((np.flatnonzero(keep), rank[answer_exam], user))
+        user, question, correct = user[order], question[order], correct[order]
+        return {
+            'user': user,
+            'question': question,
+            'correct': correct,
+            'bounds': group_bounds(user, users),
+        }
+
+    def category_accuracy(self, answers: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """每个用户在各分类（运动项目-知识类型）上的作答次数和正确率"""
+        known = answers['question'] >= 0
+        categories = len(self.catalog.categories)
+        key = answers['user'][known] * categories + self.catalog.category[answers['question'][known]]
+        groups, inverse = np.unique(key, return_inverse=True)
+        total = np.bincount(inverse)
+        correct = np.bincount(inverse, weights=answers['correct'][known])
+        user = groups // categories
+        return {
+            'user': user,
+            'category': groups % categories,
+            'accuracy': correct / total,
+            'bounds': group_bounds(user, len(self.user_ids)),
+        }
+
+    def sport_scores(self) -> Dict[str, np.ndarray]:
+        """每个用户在各运动项目上的学习进度平均分"""
+        user = np.frombuffer(self.progress_user, dtype=np.int64)
+        sport = np.frombuffer(self.progress_sport, dtype=np.int64)
+        score = np.frombuffer(self.progress_score, dtype=np.float64)
+        sports = max(len(self.catalog.sports), 1)
+        groups, inverse = np.unique(user * sports + sport, return_inverse=True)
+        average = np.bincount(inverse, weights=score) / np.bincount(inverse)
+        user = groups // sports
+        return {
+            'user': user,
+            'sport': groups % sports,
+            'score': average,
+            'bounds': group_bounds(user, len(self.user_ids)),
+        }
+
+
+class CandidateBuilder:
+    """根据学习状态为单个用户生成候选题目"""
+
+    def __init__(self, catalog: QuestionCatalog, history: LearningHistory, per_bucket: int = DEFAULT_PER_BUCKET):
+        self.catalog = catalog
+        self.history = history
+        self.per_bucket = max(1, per_bucket)
+        self.answers = history.recent_answers()
+        self.categories = history.category_accuracy(self.answers)
+        self.sports = history.sport_scores()
+
+    def build(self, user: int) -> Dict[str, Any]:
+        """返回用户的学习状态和候选题目"""
+        catalog = self.catalog
+        start, end = self.answers['bounds'][user], self.answers['bounds'][user + 1]
+        questions = self.answers['question'][start:end]
+        correct = self.answers['correct'][start:end]
+
+        total = end - start
+        accuracy = float(correct.sum() / total) if total else 0.0
+        preferred = HARD if accuracy > STRONG_ACCURACY else EASY if accuracy < 0.5 else MEDIUM
+        known = questions >= 0
+        incorrect = np.unique(questions[known & ~correct])
+
+        # 分类正确率：薄弱分类按正确率从低到高取前5个
+        start, end = self.categories['bounds'][user], self.categories['bounds'][user + 1]
+        category = self.categories['category'][start:end]
+        category_accuracy = self.categories['accuracy'][start:end]
+        weak = np.argsort(category_accuracy, kind='stable')
+        weak = weak[category_accuracy[weak] < WEAK_ACCURACY][:MAX_WEAK_CATEGORIES]
+        strong = np.flatnonzero(category_accuracy > STRONG_ACCURACY)[:MAX_STRONG_CATEGORIES]
+        weights = {int(category[i]): 1.0 - float(category_accuracy[i]) for i in weak}
+
+        # 学习进度平均分偏低的运动项目：该项目下的全部分类按分差加入薄弱环节
+        start, end = self.sports['bounds'][user], self.sports['bounds'][user + 1]
+        weak_sports = [(int(sport), float(score)) for sport, score in
+                       zip(self.sports['sport'][start:end], self.sports['score'][start:end])
+                       if score < WEAK_PROGRESS_SCORE]
+        for sport, score in weak_sports:
+            for code in np.flatnonzero(catalog.category_sport_array == sport).tolist():
+                weights[code] = max(weights.get(code, 0.0), (WEAK_PROGRESS_SCORE - score) / 100)
+
+        topics = self._recent_topics(questions[known])
+
+        buckets = [
+            ('weakness', *self._weakness(weights, incorrect)),
+            ('progressive', *self._progressive(accuracy, incorrect)),
+            ('review', *self._review(topics, preferred, incorrect)),
+        ]
+
+        # 与deduplicateAndSort一致：同一道题只保留分数最高的一次
+        candidates, seen = [], set()
+        for bucket, positions, relevance in buckets:
+            base = BUCKET_SCORES[bucket]
+            for position, value in zip(positions.tolist(), relevance.tolist()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                candidates.append({
+                    'questionId': catalog.ids[position],
+                    'type': bucket,
+                    'score': round(base + 0.1 * min(max(value, 0.0), 0.999), 4),
+                })
+        candidates.sort(key=lambda item: -item['score'])
+
+        return {
+            'profile': {
+                'totalQuestions': int(total),
+                'accuracy': round(accuracy, 4),
+                'weakCategories': [catalog.categories[category[i]] for i in weak],
+                'strongCategories': [catalog.categories[category[i]] for i in strong],
+                'weakSports': [catalog.sports[sport] for sport, _ in weak_sports],
+                'preferredDifficulty': DIFFICULTIES[preferred],
+                'recentTopics': [catalog.tags[tag] for tag in topics],
+                'incorrectQuestions': len(incorrect),
+            },
+            'candidates': candidates,
+        }
+
+    def _recent_topics(self, questions: np.ndarray) -> List[int]:
+        """按考试由新到旧取前10个不重复的题目标签"""
+        topics: Dict[int, None] = {}
+        for position in questions.tolist():
+            for tag in self.catalog.question_tags[position]:
+                topics.setdefault(tag)
+            if len(topics) >= MAX_RECENT_TOPICS:
+                break
+        return list(topics)[:MAX_RECENT_TOPICS]
+
+    def _weakness(self, weights: Dict[int, float], incorrect: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """薄弱分类中的简单/中等题目，分类越薄弱、题目整体正确率越高（越容易）越靠前"""
+        catalog = self.catalog
+        groups = list(weights)
+        positions, owner = gather(catalog.weak_ptr, catalog.weak_pool, groups)
+        relevance = 0.7 * np.asarray([weights[group] for group in groups])[owner] + 0.3 * catalog.accuracy[positions]
+        keep = ~np.isin(positions, incorrect)
+        return top_k(positions[keep], relevance[keep], self.per_bucket)
+
+    def _progressive(self, accuracy: float, incorrect: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """与推荐服务相同的难度组合中，整体正确率与用户正确率最接近的题目"""
+        levels = (MEDIUM, HARD) if accuracy > 0.7 else (EASY, MEDIUM) if accuracy < 0.4 else (MEDIUM,)
+        pool, pool_accuracy = self.catalog.progressive_pool(levels)
+        center = int(np.searchsorted(pool_accuracy, accuracy))
+        width = self.per_bucket + len(incorrect)
+        positions = pool[max(0, center - width):center + width]
+        relevance = 1.0 - np.abs(self.catalog.accuracy[positions] - accuracy)
+        keep = ~np.isin(positions, incorrect)
+        return top_k(positions[keep], relevance[keep], self.per_bucket)
+
+    def _review(self, topics: List[int], preferred: int, incorrect: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """包含最近话题标签、难度为偏好难度的题目，命中的话题越多越靠前"""
+        if not topics:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        positions, _ = gather(self.catalog.tag_ptr, self.catalog.tag_pool, topics)
+        positions, hits = np.unique(positions, return_counts=True)
+        keep = (self.catalog.difficulty[positions] == preferred) & ~np.isin(positions, incorrect)
+        return top_k(positions[keep], hits[keep] / len(topics), self.per_bucket)
+
+
+def iter_source(name: str, db=None, data_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """从数据库集合（只返回需要的字段）或数据目录中的数据文件逐条读取文档"""
+    file_name, collection, query, projection = SOURCES[name]
+    if data_dir:
+        resolved_path = resolve_data_file(os.path.join(data_dir, file_name))
+        if not resolved_path:
+            raise ValueError(f"文件不存在：{os.path.join(data_dir, file_name)}")
+        return iter_json_documents(resolved_path)
+    return db[collection].find(query, projection).batch_size(10000)
+
+
+def build_recommendation_candidates(db=None, data_dir: Optional[str] = None,
+                                    per_bucket: int = DEFAULT_PER_BUCKET,
+                                    ttl_hours: float = DEFAULT_TTL_HOURS,
+                                    batch_size: int = WRITE_BATCH_SIZE,
+                                    dry_run: bool = False) -> Dict[str, Any]:
+    """
+    计算全部用户的推荐候选题目并写入recommendationcandidates集合
+
+    Args:
+        db: pymongo数据库对象，dry_run且指定data_dir时可以为None
+        data_dir: 从数据目录（如导出快照）读取，为None时从数据库读取
+        per_bucket: 每类候选保留的题目数量
+        ttl_hours: 候选结果的有效期，过期后由TTL索引删除
+        batch_size: 每批bulk_write的文档数量
+        dry_run: 只计算不写入
+
+    Returns:
+        Dict[str, Any]: 运行报告
+
+    Raises:
+        ValueError: 缺少数据库连接或数据文件
+    """
+    if db is None and not (data_dir and dry_run):
+        raise ValueError("写入候选题目需要数据库连接")
+
+    start = time.perf_counter()
+    report: Dict[str, Any] = {
+        'generated_at': datetime.now().isoformat(),
+        'source': data_dir or 'database',
+        'dry_run': dry_run,
+    }
+
+    print(f"{Fore.YELLOW}加载题目和知识库...")
+    catalog = QuestionCatalog(iter_source('questions', db, data_dir))
+    base_sports = {}
+    for base in iter_source('knowledge_bases', db, data_dir):
+        if base.get('category'):
+            base_sports[normalize_id(base['_id'])] = catalog.sport_codes.setdefault(
+                base['category'], len(catalog.sport_codes))
+    catalog.sports = list(catalog.sport_codes)
+
+    history = LearningHistory(catalog)
+    for exam in tqdm(iter_source('exams', db, data_dir), desc="读取考试记录", unit="条"):
+        history.add_exam(exam)
+    for progress in tqdm(iter_source('knowledge_progress', db, data_dir), desc="读取学习进度", unit="条"):
+        history.add_progress(progress, base_sports)
+    report.update({
+        'questions': len(catalog),
+        'exams': len(history.exam_user),
+        'answers': len(history.answer_exam),
+        'progress_records': len(history.progress_user),
+        'users': len(history.user_ids),
+        'load_seconds': round(time.perf_counter() - start, 3),
+    })
+
+    builder = CandidateBuilder(catalog, history, per_bucket)
+    generated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    expires_at = generated_at + timedelta(hours=ttl_hours)
+
+    compute_start = time.perf_counter()
+    written, operations, buckets = 0, [], {bucket: 0 for bucket in BUCKET_SCORES}
+    sample = []
+    collection = db[CANDIDATES_COLLECTION] if not dry_run else None
+    for user in tqdm(range(len(history.user_ids)), desc="生成候选题目", unit="人"):
+        result = builder.build(user)
+        for candidate in result['candidates']:
+            buckets[candidate['type']] += 1
+        doc = {
+            '_id': history.user_ids[user],
+            **result,
+            'generatedAt': generated_at,
+            'expiresAt': expires_at,
+        }
+        if dry_run:
+            if len(sample) < 5:
+                sample.append(doc)
+            continue
+        operations.append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+        if len(operations) >= batch_size:
+            collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+        written += len(operations)
+    if not dry_run:
+        # TTL索引与其他索引一样声明在index_catalog中
+        build_indexes(db, [CANDIDATES_COLLECTION])
+
+    report.update({
+        'candidates': buckets,
+        'written': written,
+        'compute_seconds': round(time.perf_counter() - compute_start, 3),
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+        'expires_at': expires_at.isoformat(),
+    })
+    if dry_run:
+        report['sample'] = [{
+            '_id': str(doc['_id']),
+            'profile': doc['profile'],
+            'candidates': [{**item, 'questionId': str(item['questionId'])} for item in doc['candidates'][:10]],
+        } for doc in sample]
+    return report
+
+
+def print_candidates_report(report: Dict[str, Any]):
+    """输出候选题目预计算结果"""
+    print(f"\n{Fore.CYAN}{'='*50}")
+    print(f"{Fore.CYAN}推荐候选题目预计算结果")
+    print(f"{Fore.CYAN}{'='*50}")
+    print(f"  - 数据来源: {report['source']}")
+    print(f"  - 题目: {report['questions']} 道，已完成考试: {report['exams']} 次，答题: {report['answers']} 条")
+    print(f"  - 学习进度: {report['progress_records']} 条，用户: {report['users']} 人")
+    print(f"  - 候选数量: 薄弱环节 {report['candidates']['weakness']}，"
+          f"渐进式 {report['candidates']['progressive']}，复习 {report['candidates']['review']}")
+    print(f"  - 读取耗时: {report['load_seconds']:.3f}s，计算耗时: {report['compute_seconds']:.3f}s")
+
+    if report['dry_run']:
+        print(f"\n{Fore.YELLOW}试运行，未写入数据库。部分结果：")
+        for doc in report['sample']:
+            profile = doc['profile']
+            print(f"  - {doc['_id']}: 正确率 {profile['accuracy']:.0%}，薄弱分类 {profile['weakCategories']}，"
+                  f"候选 {len(doc['candidates'])} 道")
+        return
+
+    print(f"  - 写入文档: {report['written']} 条（{report['expires_at']} 过期）")
+    print(f"  - 总耗时: {report['elapsed_seconds']:.3f}s")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台推荐候选题目预计算工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python recommendation_candidates.py                        # 从数据库计算并写入recommendationcandidates
+  python recommendation_candidates.py --per-bucket 30 --ttl-hours 6
+  python recommendation_candidates.py --data-dir ./snapshot --dry-run  # 从导出快照计算，不写入
+        """
+    )
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--data-dir', default=None,
+                        help='从数据目录（如data_exporter.py --merge生成的快照）读取题目、知识库、考试记录和学习进度')
+    parser.add_argument('--per-bucket', type=int, default=DEFAULT_PER_BUCKET,
+                        help=f'每类候选保留的题目数量 (默认: {DEFAULT_PER_BUCKET})')
+    parser.add_argument('--ttl-hours', type=float, default=DEFAULT_TTL_HOURS,
+                        help=f'候选结果的有效期（小时），过期后由TTL索引删除 (默认: {DEFAULT_TTL_HOURS})')
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE,
+                        help=f'每批bulk_write的文档数量 (默认: {WRITE_BATCH_SIZE})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只计算并输出部分结果，不写入数据库')
+    parser.add_argument('--output', metavar='FILE',
+                        help='JSON报告输出文件')
+    args = parser.parse_args()
+
+    # 从数据目录试运行时不需要连接数据库
+    client = None
+    if not (args.data_dir and args.dry_run):
+        client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        report = build_recommendation_candidates(
+            client[args.database] if client else None, args.data_dir, args.per_bucket,
+            args.ttl_hours, max(1, args.batch_size), args.dry_run
+        )
+    except Exception as e:
+        print(f"{Fore.RED}✗ 推荐候选题目预计算失败：{e}")
+        sys.exit(1)
+    finally:
+        if client:
+            client.close()
+
+    print_candidates_report(report)
+    if args.output:
+        write_report(report, args.output)
+        print(f"\n{Fore.GREEN}✓ 报告已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
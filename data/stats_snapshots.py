@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体育知识智能题库平台 - 统计快照物化
+预先计算 statsController 中 getSystemStats、getLearningStats、getQuestionStats 使用的统计结果，
+写入statsnapshots集合，仪表盘读取快照文档即可，不必每次扫描users、questions和exams。
+考试和注册按天汇总，每次运行只重算水位线之后有新数据的日期
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from colorama import Fore, init
+from pymongo import MongoClient, ReplaceOne, UpdateOne
+
+from index_catalog import build_indexes
+from integrity_check import normalize_id, write_report
+
+init(autoreset=True)
+
+SNAPSHOTS_COLLECTION = 'statsnapshots'
+
+# 记录水位线的文档_id
+STATE_ID = 'watermarks'
+
+# 按天汇总的文档保留天数，与getLearningStats最长的时间范围（90d）一致；0表示不删除
+DEFAULT_RETENTION_DAYS = 90
+# 本月完成考试数由每日汇总相加得到，保留天数不能少于一个月
+MIN_RETENTION_DAYS = 31
+
+# 与statsController一致：趋势取最近7天，活跃用户为最近30天登录过的用户，热门题目取前20道
+TREND_DAYS = 7
+ACTIVE_DAYS = 30
+POPULAR_QUESTIONS = 20
+
+# 完成时间晚于 当前时间-lag 的考试留到下一次运行，避免漏掉正在写入的考试
+DEFAULT_LAG_SECONDS = 60
+
+WRITE_BATCH_SIZE = 1000
+
+EXAM_PROJECTION = {
+    'user': 1, 'completedAt': 1, 'result.score': 1, 'result.totalTime': 1, 'result.passed': 1,
+    'answers.questionId': 1, 'answers.isCorrect': 1,
+}
+
+
+def to_utc(value: Any) -> Optional[datetime]:
+    """将日期（datetime或ISO字符串）转换为不带时区的UTC时间，无法识别时返回None"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def iso_string(value: datetime) -> str:
+    """与JavaScript的Date.toISOString()格式相同的UTC时间字符串，如 2024-01-10T10:25:00.000Z"""
+    return value.strftime('%Y-%m-%dT%H:%M:%S.') + f'{value.microsecond // 1000:03d}Z'
+
+
+def date_range_query(field: str, bounds: Dict[str, datetime]) -> Dict[str, Any]:
+    """
+    日期字段的范围查询条件，同时匹配BSON日期和ISO格式的日期字符串
+
+    导入工具按原样写入JSON数据文件中的日期字符串（如 "2024-01-10T10:25:00.000Z"），
+    MongoDB的比较运算符只匹配同类型的值，因此分别用datetime边界和同格式的字符串边界查询。
+    字符串按字典序比较，只有UTC时间（以Z结尾）的ISO字符串能被正确匹配
+
+    Args:
+        field: 日期字段名
+        bounds: 比较运算符到边界的映射，如 {'$gte': start, '$lt': end}
+
+    Returns:
+        Dict[str, Any]: 可直接合并到查询中的 $or 条件
+    """
+    return {'$or': [
+        {field: bounds},
+        {field: {operator: iso_string(value) for operator, value in bounds.items()}},
+    ]}
+
+
+def day_key(value: datetime) -> str:
+    """日期键（UTC），如 2024-01-10"""
+    return value.strftime('%Y-%m-%d')
+
+
+def day_start(key: str) -> datetime:
+    """日期键对应当天0点（UTC）"""
+    return datetime.strptime(key, '%Y-%m-%d')
+
+
+def day_ranges(days: Iterable[str]) -> List[Tuple[datetime, datetime]]:
+    """将日期集合合并为连续的 [开始, 结束) 时间区间，每个区间对应一次索引范围查询"""
+    ranges: List[Tuple[datetime, datetime]] = []
+    for key in sorted(days):
+        start = day_start(key)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], start + timedelta(days=1))
+        else:
+            ranges.append((start, start + timedelta(days=1)))
+    return ranges
+
+
+def trend(daily: Dict[str, Dict[str, Any]], field: str, days: List[str]) -> List[Dict[str, Any]]:
+    """按statsController中按 年/月/日 分组的趋势格式输出，没有数据的日期不出现"""
+    result = []
+    for key in days:
+        count = daily.get(key, {}).get(field, 0)
+        if count:
+            date = day_start(key)
+            result.append({'_id': {'year': date.year, 'month': date.month, 'day': date.day}, 'count': count})
+    return result
+
+
+class ExamRollup:
+    """单日（全站或单个用户）的考试汇总"""
+
+    def __init__(self):
+        self.exams = 0
+        self.passed = 0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.highest_score: Optional[float] = None
+        self.total_time = 0
+        self.answers = 0
+        self.correct = 0
+        # (运动项目, 知识类型) → [作答次数, 正确次数]
+        self.categories: Dict[Tuple[str, str], List[int]] = {}
+        # (运动项目, 知识类型, 难度) → 答错次数
+        self.wrong: Dict[Tuple[str, str, str], int] = {}
+
+    def add(self, exam: Dict[str, Any], questions: Dict[Any, Tuple[str, str, str]]):
+        result = exam.get('result') or {}
+        self.exams += 1
+        self.passed += result.get('passed') is True
+        score = result.get('score')
+        if isinstance(score, (int, float)):
+            self.score_sum += score
+            self.score_count += 1
+            self.highest_score = score if self.highest_score is None else max(self.highest_score, score)
+        if isinstance(result.get('totalTime'), (int, float)):
+            self.total_time += result['totalTime']
+
+        for answer in exam.get('answers') or ():
+            correct = answer.get('isCorrect') is True
+            self.answers += 1
+            self.correct += correct
+            # 与getLearningStats中的$lookup一致：已删除的题目不计入分类统计
+            meta = questions.get(normalize_id(answer.get('questionId')))
+            if meta is None:
+                continue
+            counts = self.categories.setdefault(meta[:2], [0, 0])
+            counts[0] += 1
+            counts[1] += correct
+            if answer.get('isCorrect') is False:
+                self.wrong[meta] = self.wrong.get(meta, 0) + 1
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            'exams': self.exams,
+            'passedExams': self.passed,
+            'scoreSum': self.score_sum,
+            'scoreCount': self.score_count,
+            'highestScore': self.highest_score,
+            'totalTime': self.total_time,
+            'answers': self.answers,
+            'correctAnswers': self.correct,
+            'categories': [
+                {'sport': sport, 'knowledgeType': knowledge_type, 'totalQuestions': total,
+                 'correctAnswers': correct, 'accuracy': round(correct / total * 100, 2)}
+                for (sport, knowledge_type), (total, correct) in self.categories.items()
+            ],
+            'wrongAnswers': sorted(
+                ({'sport': sport, 'knowledgeType': knowledge_type, 'difficulty': difficulty, 'count': count}
+                 for (sport, knowledge_type, difficulty), count in self.wrong.items()),
+                key=lambda item: -item['count']
+            ),
+        }
+
+
+class StatsSnapshotJob:
+    """
+    统计快照任务
+
+    statsnapshots集合中的文档：
+      system / questions         getSystemStats、getQuestionStats返回的data
+      daily:<日期>               全站每日的注册数、完成考试数、分类正确率和错题数
+      learning:<用户>:<日期>     用户每日的考试汇总，getLearningStats按时间范围相加
+      watermarks                 上次处理到的用户_id和考试完成时间
+
+    每日文档由该日的全部源数据重新计算后整体写入，重复运行或中途失败后重跑都不会重复计数
+    """
+
+    def __init__(self, db, retention_days: int = DEFAULT_RETENTION_DAYS,
+                 lag_seconds: int = DEFAULT_LAG_SECONDS, batch_size: int = WRITE_BATCH_SIZE):
+        self.db = db
+        self.snapshots = db[SNAPSHOTS_COLLECTION]
+        self.retention_days = retention_days
+        self.lag = timedelta(seconds=max(0, lag_seconds))
+        self.batch_size = max(1, batch_size)
+        self._questions: Optional[Dict[Any, Tuple[str, str, str]]] = None
+
+    def run(self, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        更新全部快照
+
+        Args:
+            rebuild: 忽略水位线，重算保留期内的全部日期
+
+        Returns:
+            Dict[str, Any]: 运行报告
+        """
+        start = time.perf_counter()
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        cutoff = now - self.lag
+        retention_start = None
+        if self.retention_days:
+            retention_start = day_start(day_key(now - timedelta(days=self.retention_days - 1)))
+
+        state = None if rebuild else self.snapshots.find_one({'_id': STATE_ID})
+        report: Dict[str, Any] = {
+            'generated_at': now.isoformat(),
+            'rebuild': state is None,
+        }
+
+        exam_days = self.dirty_exam_days(state, cutoff, retention_start)
+        report.update(self.rebuild_exam_days(exam_days, now))
+
+        registration_days, last_user_id = self.dirty_registration_days(state, retention_start)
+        self.rebuild_registration_days(registration_days)
+        report['registration_days'] = len(registration_days)
+
+        if retention_start:
+            report['pruned'] = self.snapshots.delete_many({
+                'type': {'$in': ['daily', 'learning']}, 'day': {'$lt': day_key(retention_start)},
+            }).deleted_count
+
+        self.snapshots.replace_one({'_id': 'system'}, self.system_snapshot(now), upsert=True)
+        self.snapshots.replace_one({'_id': 'questions'}, self.question_snapshot(now), upsert=True)
+        build_indexes(self.db, [SNAPSHOTS_COLLECTION])
+
+        # 快照全部写入后才推进水位线，中途失败时下次运行会重算同样的日期
+        self.snapshots.replace_one({'_id': STATE_ID}, {
+            '_id': STATE_ID,
+            'type': 'state',
+            'examsCompletedAt': cutoff,
+            'usersLastId': last_user_id,
+            'updatedAt': now,
+        }, upsert=True)
+
+        report['elapsed_seconds'] = round(time.perf_counter() - start, 3)
+        return report
+
+    @property
+    def questions(self) -> Dict[Any, Tuple[str, str, str]]:
+        """题目_id → (运动项目, 知识类型, 难度)，首次使用时加载"""
+        if self._questions is None:
+            cursor = self.db.questions.find({}, {'category.sport': 1, 'category.knowledgeType': 1, 'difficulty': 1})
+            self._questions = {}
+            for question in cursor.batch_size(10000):
+                category = question.get('category') or {}
+                self._questions[question['_id']] = (
+                    category.get('sport') or '未分类', category.get('knowledgeType') or '基础',
+                    question.get('difficulty') or 'unknown',
+                )
+        return self._questions
+
+    def dirty_exam_days(self, state: Optional[Dict[str, Any]], cutoff: datetime,
+                        retention_start: Optional[datetime]) -> Set[str]:
+        """水位线之后有考试完成的日期（首次运行或重建时为保留期内全部有考试的日期）"""
+        completed_at: Dict[str, Any] = {'$lte': cutoff}
+        if state and state.get('examsCompletedAt'):
+            completed_at['$gt'] = state['examsCompletedAt']
+        if retention_start:
+            completed_at['$gte'] = retention_start
+        cursor = self.db.exams.find({'status': 'completed', **date_range_query('completedAt', completed_at)},
+                                    {'_id': 0, 'completedAt': 1}).batch_size(10000)
+        days = set()
+        for exam in cursor:
+            completed = to_utc(exam.get('completedAt'))
+            if completed is not None:
+                days.add(day_key(completed))
+        return days
+
+    def rebuild_exam_days(self, days: Set[str], now: datetime) -> Dict[str, int]:
+        """重新计算指定日期的全站和各用户考试汇总"""
+        if not days:
+            return {'exam_days': 0, 'exams_scanned': 0, 'learning_documents': 0}
+
+        daily: Dict[str, ExamRollup] = {day: ExamRollup() for day in days}
+        learning: Dict[Tuple[Any, str], ExamRollup] = {}
+        scanned = 0
+        for start, end in day_ranges(days):
+            query = {'status': 'completed', **date_range_query('completedAt', {'$gte': start, '$lt': end})}
+            cursor = self.db.exams.find(query, EXAM_PROJECTION).batch_size(10000)
+            for exam in cursor:
+                completed = to_utc(exam.get('completedAt'))
+                if completed is None:
+                    continue
+                day = day_key(completed)
+                scanned += 1
+                daily[day].add(exam, self.questions)
+                if exam.get('user') is not None:
+                    learning.setdefault((exam['user'], day), ExamRollup()).add(exam, self.questions)
+
+        operations = []
+        for day, rollup in daily.items():
+            operations.append(UpdateOne({'_id': f'daily:{day}'}, {'$set': {
+                'type': 'daily', 'day': day, 'completedExams': rollup.exams, **rollup.to_document(), 'updatedAt': now,
+            }}, upsert=True))
+        for (user, day), rollup in learning.items():
+            operations.append(ReplaceOne({'_id': f'learning:{user}:{day}'}, {
+                '_id': f'learning:{user}:{day}', 'type': 'learning', 'user': user, 'day': day,
+                **rollup.to_document(), 'updatedAt': now,
+            }, upsert=True))
+        self._write(operations)
+
+        # 重算的日期中已不再有考试的用户（如考试被删除）
+        self.snapshots.delete_many({'type': 'learning', 'day': {'$in': sorted(days)}, 'updatedAt': {'$lt': now}})
+        return {'exam_days': len(days), 'exams_scanned': scanned, 'learning_documents': len(learning)}
+
+    def dirty_registration_days(self, state: Optional[Dict[str, Any]],
+                                retention_start: Optional[datetime]) -> Tuple[Set[str], Any]:
+        """_id水位线之后注册的用户所在的日期，同时返回最大的用户_id"""
+        last_id = state.get('usersLastId') if state else None
+        query: Dict[str, Any] = {}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        if retention_start and last_id is None:
+            query.update(date_range_query('createdAt', {'$gte': retention_start}))
+
+        days = set()
+        for user in self.db.users.find(query, {'createdAt': 1}).batch_size(10000):
+            if last_id is None or user['_id'] > last_id:
+                last_id = user['_id']
+            created = to_utc(user.get('createdAt'))
+            if created is not None and (retention_start is None or created >= retention_start):
+                days.add(day_key(created))
+        if state is None and last_id is None:
+            # 保留期内没有新用户时，水位线从现有最大的_id开始
+            newest = self.db.users.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+            last_id = newest['_id'] if newest else None
+        return days, last_id
+
+    def rebuild_registration_days(self, days: Set[str]):
+        """重新统计指定日期的注册用户数"""
+        counts = dict.fromkeys(days, 0)
+        for start, end in day_ranges(days):
+            cursor = self.db.users.find(date_range_query('createdAt', {'$gte': start, '$lt': end}), {'createdAt': 1})
+            for user in cursor.batch_size(10000):
+                created = to_utc(user.get('createdAt'))
+                if created is not None and day_key(created) in counts:
+                    counts[day_key(created)] += 1
+        self._write([
+            UpdateOne({'_id': f'daily:{day}'}, {'$set': {'type': 'daily', 'day': day, 'registrations': count}},
+                      upsert=True)
+            for day, count in counts.items()
+        ])
+
+    def system_snapshot(self, now: datetime) -> Dict[str, Any]:
+        """getSystemStats的返回数据"""
+        db = self.db
+        today = day_key(now)
+        month_start = today[:8] + '01'
+        trend_days = [day_key(now - timedelta(days=offset)) for offset in range(TREND_DAYS, -1, -1)]
+        daily = {doc['day']: doc for doc in self.snapshots.find(
+            {'type': 'daily', 'day': {'$gte': min(trend_days[0], month_start)}},
+            {'day': 1, 'registrations': 1, 'completedExams': 1},
+        )}
+
+        def distribution(collection, match: Dict[str, Any], field: str) -> List[Dict[str, Any]]:
+            return list(collection.aggregate([{'$match': match}, {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}]))
+
+        return {
+            '_id': 'system',
+            'type': 'system',
+            'data': {
+                'overview': {
+                    'totalUsers': db.users.count_documents({'isActive': True}),
+                    'totalQuestions': db.questions.count_documents({'status': 'published'}),
+                    'totalExams': db.exams.estimated_document_count(),
+                    'totalInstitutions': db.institutions.estimated_document_count(),
+                    'activeUsers': db.users.count_documents({
+                        'isActive': True,
+                        'learningStats.lastLoginDate': {'$gte': now - timedelta(days=ACTIVE_DAYS)},
+                    }),
+                    'todayNewUsers': daily.get(today, {}).get('registrations', 0),
+                    'monthlyCompletedExams': sum(doc.get('completedExams', 0) for day, doc in daily.items()
+                                                 if day >= month_start),
+                },
+                'distribution': {
+                    'userRoles': distribution(db.users, {'isActive': True}, 'role'),
+                    'questionDifficulty': distribution(db.questions, {'status': 'published'}, 'difficulty'),
+                    'questionCategory': distribution(db.questions, {'status': 'published'}, 'category'),
+                },
+                'trends': {
+                    'userRegistration': trend(daily, 'registrations', trend_days),
+                    'examCompletion': trend(daily, 'completedExams', trend_days),
+                },
+            },
+            'generatedAt': now,
+        }
+
+    def question_snapshot(self, now: datetime) -> Dict[str, Any]:
+        """
+        getQuestionStats的返回数据（不含按创建者统计的myQuestions，该查询只涉及单个教师的题目）
+
+        热门题目使用stats.totalAttempts/correctAttempts（由question_stats.py维护）
+        """
+        questions = self.db.questions
+
+        def group(match: Dict[str, Any], field: str) -> List[Dict[str, Any]]:
+            pipeline = ([{'$match': match}] if match else []) + [{'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}]
+            return list(questions.aggregate(pipeline))
+
+        popular = []
+        cursor = questions.find(
+            {'status': 'published'}, {'title': 1, 'category': 1, 'difficulty': 1, 'stats': 1}
+        ).sort('stats.totalAttempts', -1).limit(POPULAR_QUESTIONS)
+        for question in cursor:
+            stats = question.get('stats') or {}
+            answered = stats.get('totalAttempts') or 0
+            correct = stats.get('correctAttempts') or 0
+            popular.append({
+                '_id': question['_id'],
+                'title': question.get('title'),
+                'category': question.get('category'),
+                'difficulty': question.get('difficulty'),
+                'answeredCount': answered,
+                'correctCount': correct,
+                'accuracy': correct / answered * 100 if answered else 0,
+            })
+
+        return {
+            '_id': 'questions',
+            'type': 'questions',
+            'data': {
+                'overview': group({}, 'status'),
+                'difficultyDistribution': group({'status': 'published'}, 'difficulty'),
+                'categoryDistribution': group({'status': 'published'}, 'category'),
+                'popularQuestions': popular,
+            },
+            'generatedAt': now,
+        }
+
+    def _write(self, operations: List[Any]):
+        for i in range(0, len(operations), self.batch_size):
+            self.snapshots.bulk_write(operations[i:i + self.batch_size], ordered=False)
+
+
+def print_snapshot_report(report: Dict[str, Any]):
+    """输出快照更新结果"""
+    print(f"\n{Fore.CYAN}{'='*50}")
+    print(f"{Fore.CYAN}统计快照更新结果（{report['generated_at']}）")
+    print(f"{Fore.CYAN}{'='*50}")
+    print(f"  - 模式: {'全量重建' if report['rebuild'] else '增量更新'}")
+    print(f"  - 重算考试日期: {report['exam_days']} 天，读取考试记录: {report['exams_scanned']} 条")
+    print(f"  - 用户每日汇总: {report['learning_documents']} 条")
+    print(f"  - 重算注册日期: {report['registration_days']} 天")
+    if 'pruned' in report:
+        print(f"  - 删除超出保留期的汇总: {report['pruned']} 条")
+    print(f"  - 耗时: {report['elapsed_seconds']:.3f}s")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='体育知识智能题库平台统计快照物化工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python stats_snapshots.py                        # 从水位线增量更新一次
+  python stats_snapshots.py --rebuild              # 忽略水位线，重算保留期内的全部日期
+  python stats_snapshots.py --interval 10          # 每10分钟更新一次，Ctrl+C停止
+  python stats_snapshots.py --retention-days 0 --rebuild  # 不限保留期（如导入2024年的示例数据后）
+        """
+    )
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017'),
+                        help='MongoDB连接字符串 (默认: mongodb://localhost:27017)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_NAME', 'sports_knowledge_platform'),
+                        help='数据库名称 (默认: sports_knowledge_platform)')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='忽略水位线，重算保留期内的全部日期')
+    parser.add_argument('--retention-days', type=int, default=DEFAULT_RETENTION_DAYS,
+                        help=f'每日汇总的保留天数，0表示不删除 (默认: {DEFAULT_RETENTION_DAYS})')
+    parser.add_argument('--lag-seconds', type=int, default=DEFAULT_LAG_SECONDS,
+                        help=f'最近多少秒内完成的考试留到下一次运行 (默认: {DEFAULT_LAG_SECONDS})')
+    parser.add_argument('--interval', type=float, metavar='MINUTES',
+                        help='按固定间隔（分钟）重复运行')
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE,
+                        help=f'每批bulk_write的文档数量 (默认: {WRITE_BATCH_SIZE})')
+    parser.add_argument('--output', metavar='FILE',
+                        help='JSON报告输出文件（重复运行时为最近一次的报告）')
+    args = parser.parse_args()
+    if 0 < args.retention_days < MIN_RETENTION_DAYS:
+        parser.error(f'--retention-days 不能少于 {MIN_RETENTION_DAYS} 天（本月完成考试数需要整月的每日汇总）')
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    job = StatsSnapshotJob(client[args.database], args.retention_days, args.lag_seconds, args.batch_size)
+    rebuild = args.rebuild
+    try:
+        while True:
+            try:
+                report = job.run(rebuild=rebuild)
+            except Exception as e:
+                print(f"{Fore.RED}✗ 统计快照更新失败：{e}")
+                if not args.interval:
+                    sys.exit(1)
+            else:
+                print_snapshot_report(report)
+                if args.output:
+                    write_report(report, args.output)
+                rebuild = False
+            if not args.interval:
+                break
+            time.sleep(args.interval * 60)
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}已停止")
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    main()